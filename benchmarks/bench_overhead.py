@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Shim-overhead benchmark for gitsl against zero-cost sl stand-ins.
+
+Measures what gitsl itself costs per command, with sl taken out of the
+picture:
+
+- end to end: 'python gitsl.py <cmd>' with a native stand-in sl on PATH
+  (a shell script that cats canned output), so the total is interpreter
+  start-up, imports, argument translation and output transformation
+- in process: gitsl.run(<cmd>) with subprocess.run/Popen replaced by
+  instant fakes returning the same canned output, which isolates argument
+  translation and output transformation
+
+Overhead is reported as a percentage of total runtime: of the stand-in
+run, and with --repo also of the real end-to-end run against Sapling.
+Each command has a handler budget; --check exits non-zero when one is
+exceeded.
+
+Usage:
+    python benchmarks/bench_overhead.py                  All commands
+    python benchmarks/bench_overhead.py --check          Enforce budgets
+    python benchmarks/bench_overhead.py --lines 100000   Bigger outputs
+    python benchmarks/bench_overhead.py --repo ~/src/x   Compare with real sl
+
+No Sapling installation is needed unless --repo is given.
+"""
+
+import argparse
+import io
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+# Benchmark name -> gitsl arguments
+COMMANDS: Dict[str, List[str]] = {
+    "status --porcelain": ["status", "--porcelain"],
+    "status --porcelain -b": ["status", "--porcelain", "-b"],
+    "status -z": ["status", "-z"],
+    "status --porcelain=v2 -b": ["status", "--porcelain=v2", "-b"],
+    "log --oneline -n 20": ["log", "--oneline", "-n", "20"],
+    "branch -v": ["branch", "-v"],
+    "stash list": ["stash", "list"],
+    "rev-parse --abbrev-ref HEAD": ["rev-parse", "--abbrev-ref", "HEAD"],
+    "rev-parse --show-toplevel": ["rev-parse", "--show-toplevel"],
+    "diff": ["diff"],
+}
+
+# Per-call budget for in-process handler time (translation + transform)
+# at the default --lines, in milliseconds
+HANDLER_BUDGET_MS: Dict[str, float] = {
+    "status --porcelain": 15.0,
+    "status --porcelain -b": 15.0,
+    "status -z": 10.0,
+    "status --porcelain=v2 -b": 60.0,  # one lstat per entry
+    "log --oneline -n 20": 1.0,
+    "branch -v": 10.0,
+    "stash list": 1.0,
+    "rev-parse --abbrev-ref HEAD": 1.0,
+    "rev-parse --show-toplevel": 1.0,
+    "diff": 1.0,
+}
+
+# Budget for gitsl start-up beyond the bare interpreter, in milliseconds.
+# Commands that spawn sl more than once also count the extra spawns here.
+STARTUP_BUDGET_MS = 100.0
+
+HEAD_OUTPUT = "main\n" + "a" * 40 + "\n" + "a" * 12 + "\ndraft\n"
+BRANCH_V2_OUTPUT = "a" * 40 + "\nmain\nremote/main\n1\n0\n"
+
+
+def get_project_root() -> Path:
+    """Get the project root directory (parent of benchmarks/)."""
+    return Path(__file__).parent.parent.resolve()
+
+
+def build_outputs(lines: int) -> Dict[str, bytes]:
+    """
+    Canned sl output by kind, sized by the number of lines.
+
+    Returns:
+        Mapping of output kind (see output_kind) to raw bytes
+    """
+    codes = "MA?R!"
+    status = [f"{codes[i % len(codes)]} src/dir{i % 100:02d}/file{i:06d}.py" for i in range(lines)]
+    bookmarks = [f"feature-{i:05d}: {i:012x} commit message {i}" for i in range(max(1, lines // 10))]
+    bookmarks.append("main: " + "a" * 12 + " initial commit")
+    shelves = [f"shelve-{i}  (1h ago)  wip {i}" for i in range(max(1, lines // 100))]
+    log = [f"{i:012x} commit message {i}" for i in range(20)]
+    return {
+        "status": ("\n".join(status) + "\n").encode(),
+        "status0": "".join(line + "\0" for line in status).encode(),
+        "head": HEAD_OUTPUT.encode(),
+        "branch_v2": BRANCH_V2_OUTPUT.encode(),
+        "bookmarks": ("\n".join(bookmarks) + "\n").encode(),
+        "shelves": ("\n".join(shelves) + "\n").encode(),
+        "log": ("\n".join(log) + "\n").encode(),
+        "empty": b"",
+    }
+
+
+def output_kind(sl_args: List[str]) -> str:
+    """Pick the canned output for an sl invocation."""
+    if not sl_args:
+        return "empty"
+    command = sl_args[0]
+    if command == "status":
+        return "status0" if "--print0" in sl_args else "status"
+    if command == "log" and sl_args[1:3] == ["-r", "."]:
+        # HEAD information and the porcelain v2 branch headers share '.'
+        return "branch_v2" if "remote/" in " ".join(sl_args) else "head"
+    if command == "log":
+        return "log"
+    if command == "bookmark":
+        return "bookmarks"
+    if command == "shelve":
+        return "shelves"
+    return "empty"
+
+
+# ============================================================
+# END TO END (native stand-in)
+# ============================================================
+
+STANDIN_SCRIPT = """#!/bin/sh
+# Zero-cost sl stand-in: print canned output for the subcommand
+dir="$(dirname "$0")"
+case "$1" in
+    status) case " $* " in *" --print0 "*) exec cat "$dir/status0.out";; esac
+            exec cat "$dir/status.out";;
+    log) case "$*" in *remote/*) exec cat "$dir/branch_v2.out";; esac
+         case "$2 $3" in "-r .") exec cat "$dir/head.out";; esac
+         exec cat "$dir/log.out";;
+    bookmark) exec cat "$dir/bookmarks.out";;
+    shelve) exec cat "$dir/shelves.out";;
+esac
+exit 0
+"""
+
+
+def make_standin(outputs: Dict[str, bytes], directory: Path) -> None:
+    """Write the stand-in sl script and its canned outputs into directory."""
+    for kind, data in outputs.items():
+        (directory / f"{kind}.out").write_bytes(data)
+    script = directory / "sl"
+    script.write_text(STANDIN_SCRIPT)
+    script.chmod(0o755)
+
+
+def time_process(cmd: List[str], cwd: Path, env: Dict[str, str], repeat: int) -> float:
+    """Median wall time of a command in milliseconds, after one warm-up."""
+    samples = []
+    for i in range(repeat + 1):
+        start = time.perf_counter()
+        subprocess.run(cmd, cwd=cwd, env=env, stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL)
+        if i:
+            samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+# ============================================================
+# IN PROCESS (fake subprocess)
+# ============================================================
+
+class FakePopen:
+    """Popen stand-in whose stdout is canned output in memory."""
+
+    def __init__(self, data: bytes, text: bool):
+        self.stdout = io.StringIO(data.decode()) if text else io.BufferedReader(io.BytesIO(data))
+        self.returncode = 0
+
+    def wait(self):
+        return 0
+
+    def kill(self):
+        pass
+
+
+def install_fakes(outputs: Dict[str, bytes]) -> Callable[[], None]:
+    """
+    Replace subprocess.run and subprocess.Popen with instant fakes.
+
+    Returns:
+        Function restoring the originals
+    """
+    real_run, real_popen = subprocess.run, subprocess.Popen
+
+    def fake_run(cmd, capture_output=False, text=False, **kwargs):
+        data = outputs[output_kind(cmd[1:])] if capture_output else b""
+        stdout = data.decode() if text else data
+        return subprocess.CompletedProcess(cmd, 0, stdout, "" if text else b"")
+
+    def fake_popen(cmd, text=False, **kwargs):
+        return FakePopen(outputs[output_kind(cmd[1:])], text)
+
+    subprocess.run = fake_run
+    subprocess.Popen = fake_popen
+
+    def restore():
+        subprocess.run, subprocess.Popen = real_run, real_popen
+    return restore
+
+
+def time_in_process(argv: List[str], outputs: Dict[str, bytes], repeat: int) -> float:
+    """Median milliseconds per gitsl.run(argv) call with fake subprocesses."""
+    sys.path.insert(0, str(get_project_root()))
+    import common
+    import gitsl
+
+    # Passthrough handlers would otherwise exec the real sl
+    common.disable_exec()
+    devnull = open(os.devnull, "w")
+    real_stdout = sys.stdout
+    restore = install_fakes(outputs)
+    samples = []
+    try:
+        sys.stdout = devnull
+        for i in range(repeat + 1):
+            common.invalidate_queries()
+            start = time.perf_counter()
+            gitsl.run(list(argv))
+            sys.stdout.flush()
+            if i:
+                samples.append((time.perf_counter() - start) * 1000)
+    finally:
+        sys.stdout = real_stdout
+        restore()
+        devnull.close()
+    return statistics.median(samples)
+
+
+# ============================================================
+# REPORT
+# ============================================================
+
+def run_benchmark(names: List[str], lines: int, repeat: int,
+                  repo: Optional[Path]) -> List[dict]:
+    """Measure each command end to end and in process."""
+    outputs = build_outputs(lines)
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="gitsl-overhead-") as tmp:
+        tmp_path = Path(tmp)
+        standin_dir = tmp_path / "bin"
+        standin_dir.mkdir()
+        make_standin(outputs, standin_dir)
+        # A fake checkout, so repository discovery succeeds without sl
+        work = tmp_path / "work"
+        (work / ".sl").mkdir(parents=True)
+
+        env = os.environ.copy()
+        env["PATH"] = str(standin_dir) + os.pathsep + env.get("PATH", "")
+        env["GITSL_CACHE"] = "0"
+        os.environ["GITSL_CACHE"] = "0"
+
+        gitsl_cmd = [sys.executable, str(get_project_root() / "gitsl.py")]
+        interpreter_ms = time_process([sys.executable, "-c", "pass"], work, env, repeat)
+        standin_ms = time_process([str(standin_dir / "sl"), "status"], work, env, repeat)
+
+        cwd = os.getcwd()
+        os.chdir(work)
+        try:
+            for name in names:
+                argv = COMMANDS[name]
+                total_ms = time_process(gitsl_cmd + argv, work, env, repeat)
+                handler_ms = time_in_process(argv, outputs, repeat)
+                row = {
+                    "command": name,
+                    "total_ms": total_ms,
+                    "interpreter_ms": interpreter_ms,
+                    "standin_ms": standin_ms,
+                    "handler_ms": handler_ms,
+                    # Whatever is left beyond the bare interpreter is gitsl's
+                    # imports and set-up
+                    "startup_ms": max(0.0, total_ms - interpreter_ms - standin_ms - handler_ms),
+                    "overhead_ms": max(0.0, total_ms - standin_ms),
+                }
+                if repo is not None:
+                    real_env = os.environ.copy()
+                    real_env["GITSL_CACHE"] = "0"
+                    row["real_total_ms"] = time_process(gitsl_cmd + argv, repo, real_env, repeat)
+                rows.append(row)
+        finally:
+            os.chdir(cwd)
+    return rows
+
+
+def print_report(rows: List[dict]) -> List[str]:
+    """
+    Print the overhead table.
+
+    Returns:
+        Descriptions of exceeded budgets
+    """
+    real = any("real_total_ms" in row for row in rows)
+    header = (f"{'command':<28} {'total':>9} {'start-up':>9} {'handler':>9} "
+              f"{'budget':>8} {'overhead':>9}")
+    if real:
+        header += f" {'real total':>11} {'% of real':>10}"
+    print(header)
+    print("-" * len(header))
+
+    exceeded = []
+    for row in rows:
+        budget = HANDLER_BUDGET_MS.get(row["command"])
+        overhead_pct = 100 * row["overhead_ms"] / row["total_ms"] if row["total_ms"] else 0
+        line = (f"{row['command']:<28} {row['total_ms']:>7.1f}ms {row['startup_ms']:>7.1f}ms "
+                f"{row['handler_ms']:>7.2f}ms {budget:>6.1f}ms {overhead_pct:>8.1f}%")
+        if real:
+            real_pct = 100 * row["overhead_ms"] / row["real_total_ms"]
+            line += f" {row['real_total_ms']:>9.1f}ms {real_pct:>9.1f}%"
+        if budget is not None and row["handler_ms"] > budget:
+            line += "  OVER BUDGET"
+            exceeded.append(f"{row['command']}: handler {row['handler_ms']:.2f}ms > {budget}ms")
+        if row["startup_ms"] > STARTUP_BUDGET_MS:
+            exceeded.append(f"{row['command']}: start-up {row['startup_ms']:.1f}ms "
+                            f"> {STARTUP_BUDGET_MS}ms")
+        print(line)
+
+    print()
+    print(f"interpreter alone: {rows[0]['interpreter_ms']:.1f}ms, "
+          f"stand-in sl: {rows[0]['standin_ms']:.1f}ms")
+    print("start-up = total - interpreter - stand-in sl - handler; "
+          "handler = translation + transformation, in process")
+    print("overhead = total - stand-in sl, as a share of total (or of the real run)")
+    return exceeded
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("commands", nargs="*", default=list(COMMANDS),
+                        help="benchmark names (default: all)")
+    parser.add_argument("--lines", type=int, default=10_000,
+                        help="status lines in canned output (bookmarks: lines/10)")
+    parser.add_argument("--repeat", type=int, default=20, help="samples per measurement")
+    parser.add_argument("--repo", type=Path,
+                        help="Sapling checkout to also time real end-to-end runs in")
+    parser.add_argument("--check", action="store_true",
+                        help="exit 1 if a handler or start-up budget is exceeded")
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.commands if name not in COMMANDS]
+    if unknown:
+        print(f"error: unknown command(s): {', '.join(unknown)}", file=sys.stderr)
+        print(f"known: {', '.join(COMMANDS)}", file=sys.stderr)
+        return 1
+    if sys.platform == "win32":
+        print("error: the native sl stand-in needs a POSIX shell", file=sys.stderr)
+        return 1
+
+    rows = run_benchmark(args.commands, args.lines, args.repeat, args.repo)
+    exceeded = print_report(rows)
+    if exceeded and args.check:
+        print("\nbudget exceeded:", file=sys.stderr)
+        for item in exceeded:
+            print(f"  {item}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Scaling benchmark for gitsl over synthetic Sapling repositories.
+
+Measures latency and peak RSS of common gitsl commands in generated
+repositories of increasing size (see repo_generator.py), optionally next
+to the equivalent plain sl command to show gitsl's own overhead.
+
+Usage:
+    python benchmarks/bench_scaling.py                      Default scenarios
+    python benchmarks/bench_scaling.py small files-100k     Specific scenarios
+    python benchmarks/bench_scaling.py all --repeat 3       Every scenario
+    python benchmarks/bench_scaling.py --baseline           Also time plain sl
+    python benchmarks/bench_scaling.py --json results.json  Save raw results
+
+Requires git and Sapling (sl). Repositories are generated on first use and
+cached (GITSL_BENCH_CACHE, default ~/.cache/gitsl-bench).
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import repo_generator
+
+DEFAULT_SCENARIOS = ["small", "bookmarks-10k", "shelves-500"]
+
+# Benchmark name -> (gitsl arguments, equivalent plain sl arguments)
+COMMANDS: Dict[str, tuple] = {
+    "status --porcelain": (["status", "--porcelain"], ["status"]),
+    "log --oneline": (["log", "--oneline"], ["log", "-T", "{node|short} {desc|firstline}\\n"]),
+    "log --oneline -n 20": (["log", "--oneline", "-n", "20"],
+                            ["log", "-l", "20", "-T", "{node|short} {desc|firstline}\\n"]),
+    "branch -v": (["branch", "-v"], ["bookmark"]),
+    "stash list": (["stash", "list"], ["shelve", "--list"]),
+    "rev-parse --abbrev-ref HEAD": (["rev-parse", "--abbrev-ref", "HEAD"],
+                                    ["log", "-r", ".", "-T", "{activebookmark}"]),
+    "rev-parse --show-toplevel": (["rev-parse", "--show-toplevel"], ["root"]),
+}
+
+# Runs the command once and reports wall time and the peak RSS of the
+# largest process in its tree. Running it in a separate wrapper keeps
+# RUSAGE_CHILDREN limited to this one command.
+MEASURE_SNIPPET = """
+import json, resource, subprocess, sys, time
+start = time.perf_counter()
+code = subprocess.run(sys.argv[1:], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL).returncode
+wall = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+if sys.platform == "darwin":
+    rss //= 1024  # bytes on macOS, KiB elsewhere
+print(json.dumps({"wall_ms": wall * 1000, "rss_kb": rss, "exit": code}))
+"""
+
+
+def get_project_root() -> Path:
+    """Get the project root directory (parent of benchmarks/)."""
+    return Path(__file__).parent.parent.resolve()
+
+
+def measure_once(cmd: List[str], cwd: Path, env: Dict[str, str]) -> dict:
+    """Run a command once inside the measuring wrapper."""
+    result = subprocess.run(
+        [sys.executable, "-c", MEASURE_SNIPPET] + cmd,
+        cwd=cwd, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout)
+
+
+def measure(cmd: List[str], cwd: Path, env: Dict[str, str], repeat: int) -> dict:
+    """
+    Measure a command repeat times after one warm-up run.
+
+    Returns:
+        Median wall time, minimum wall time and maximum peak RSS
+    """
+    measure_once(cmd, cwd, env)  # Warm OS and Sapling caches
+    samples = [measure_once(cmd, cwd, env) for _ in range(repeat)]
+    return {
+        "median_ms": statistics.median(s["wall_ms"] for s in samples),
+        "min_ms": min(s["wall_ms"] for s in samples),
+        "rss_kb": max(s["rss_kb"] for s in samples),
+        "exit": samples[-1]["exit"],
+    }
+
+
+def run_scenario(scenario: repo_generator.Scenario, cache_dir: Path, repeat: int,
+                 baseline: bool, commands: List[str]) -> List[dict]:
+    """Benchmark every selected command in one scenario's repository."""
+    repo = repo_generator.generate(scenario, cache_dir)
+    gitsl = [sys.executable, str(get_project_root() / "gitsl.py")]
+    env = os.environ.copy()
+    # Measure cold sl work, not answers remembered from the previous run
+    env["GITSL_CACHE"] = "0"
+
+    rows = []
+    for name in commands:
+        gitsl_args, sl_args = COMMANDS[name]
+        row = {"scenario": scenario.name, "command": name,
+               "gitsl": measure(gitsl + gitsl_args, repo, env, repeat)}
+        if baseline:
+            row["sl"] = measure(["sl"] + sl_args, repo, env, repeat)
+        rows.append(row)
+        print(f"  {scenario.name:<14} {name:<28} {row['gitsl']['median_ms']:>9.1f}ms",
+              file=sys.stderr)
+    return rows
+
+
+def print_report(rows: List[dict], baseline: bool) -> None:
+    """Print a table of median latency and peak RSS per scenario and command."""
+    header = f"{'scenario':<14} {'command':<28} {'median':>10} {'min':>10} {'peak RSS':>10}"
+    if baseline:
+        header += f" {'sl median':>10} {'overhead':>10}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        g = row["gitsl"]
+        line = (f"{row['scenario']:<14} {row['command']:<28} "
+                f"{g['median_ms']:>8.1f}ms {g['min_ms']:>8.1f}ms "
+                f"{g['rss_kb'] / 1024:>8.1f}MB")
+        if baseline:
+            s = row["sl"]
+            line += f" {s['median_ms']:>8.1f}ms {g['median_ms'] - s['median_ms']:>8.1f}ms"
+        if g["exit"] != 0:
+            line += f"  (exit {g['exit']})"
+        print(line)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("scenarios", nargs="*", default=DEFAULT_SCENARIOS,
+                        help="scenario names (see repo_generator.py --list), or 'all'")
+    parser.add_argument("--repeat", type=int, default=5, help="samples per measurement")
+    parser.add_argument("--command", action="append", choices=sorted(COMMANDS),
+                        help="benchmark only this command (repeatable)")
+    parser.add_argument("--baseline", action="store_true",
+                        help="also time the equivalent plain sl command")
+    parser.add_argument("--cache-dir", type=Path, default=repo_generator.get_default_cache_dir(),
+                        help="where generated repositories are kept")
+    parser.add_argument("--json", type=Path, help="write raw results to this file")
+    args = parser.parse_args(argv)
+
+    missing = repo_generator.check_tools()
+    if missing:
+        print(f"error: required tools not found: {', '.join(missing)}", file=sys.stderr)
+        return 1
+
+    names = list(repo_generator.SCENARIOS) if args.scenarios == ["all"] else args.scenarios
+    unknown = [name for name in names if name not in repo_generator.SCENARIOS]
+    if unknown:
+        print(f"error: unknown scenario(s): {', '.join(unknown)}", file=sys.stderr)
+        return 1
+
+    commands = args.command or list(COMMANDS)
+    rows = []
+    for name in names:
+        rows.extend(run_scenario(repo_generator.SCENARIOS[name], args.cache_dir,
+                                 args.repeat, args.baseline, commands))
+
+    print_report(rows, args.baseline)
+    if args.json:
+        args.json.write_text(json.dumps(rows, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Start-up benchmark for gitsl command dispatch.
+
+Compares the import cost of dispatching a single command when handlers are
+loaded lazily (only the module that runs) against loading every handler
+eagerly, which is what gitsl.py did before the command registry.
+
+Usage:
+    python benchmarks/bench_startup.py                 Benchmark default commands
+    python benchmarks/bench_startup.py status log      Benchmark specific commands
+    python benchmarks/bench_startup.py --repeat 50     Change number of samples
+
+No Sapling installation is needed: only imports are measured, no handler runs.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+DEFAULT_COMMANDS = ["status", "rev-parse", "log"]
+
+
+def get_project_root() -> Path:
+    """Get the project root directory (parent of benchmarks/)."""
+    return Path(__file__).parent.parent.resolve()
+
+
+def build_snippet(command: str, eager: bool) -> str:
+    """
+    Build the Python snippet that performs the imports for one dispatch.
+
+    Args:
+        command: git command name to resolve through gitsl.COMMANDS
+        eager: If True, import every handler module (pre-registry behaviour)
+
+    Returns:
+        Source code for 'python -c'
+    """
+    lines = [
+        "import importlib",
+        "import gitsl",
+    ]
+    if eager:
+        lines.append("for m in gitsl.COMMANDS.values(): importlib.import_module(m)")
+    else:
+        lines.append(f"importlib.import_module(gitsl.COMMANDS[{command!r}])")
+    return "\n".join(lines)
+
+
+def measure_import_us(snippet: str, repeat: int) -> float:
+    """
+    Measure cumulative import time of the snippet using -X importtime.
+
+    Returns:
+        Median total microseconds spent importing top-level modules
+    """
+    samples = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", snippet],
+            cwd=get_project_root(),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        total = 0
+        for line in result.stderr.splitlines():
+            # Format: "import time: self [us] | cumulative | imported package"
+            if not line.startswith("import time:") or "cumulative" in line:
+                continue
+            parts = line.split("|")
+            name = parts[2]
+            # Only count top-level entries (nested ones are already cumulative)
+            if name.startswith(" ") and not name.startswith("  "):
+                total += int(parts[1].strip())
+        samples.append(total)
+    return statistics.median(samples)
+
+
+def measure_wall_ms(snippet: str, repeat: int) -> float:
+    """
+    Measure median wall-clock time of running the snippet in a fresh interpreter.
+
+    Returns:
+        Median milliseconds over repeat runs
+    """
+    samples = []
+    env = os.environ.copy()
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-c", snippet],
+            cwd=get_project_root(),
+            env=env,
+            check=True,
+        )
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def run_benchmark(commands: List[str], repeat: int) -> List[Dict[str, float]]:
+    """Run lazy and eager measurements for each command."""
+    rows = []
+    for command in commands:
+        lazy = build_snippet(command, eager=False)
+        eager = build_snippet(command, eager=True)
+        rows.append({
+            "command": command,
+            "lazy_import_ms": measure_import_us(lazy, repeat) / 1000,
+            "eager_import_ms": measure_import_us(eager, repeat) / 1000,
+            "lazy_wall_ms": measure_wall_ms(lazy, repeat),
+            "eager_wall_ms": measure_wall_ms(eager, repeat),
+        })
+    return rows
+
+
+def print_report(rows: List[Dict[str, float]]) -> None:
+    """Print a table comparing lazy and eager dispatch."""
+    header = f"{'command':<12} {'import lazy':>12} {'import eager':>13} {'wall lazy':>10} {'wall eager':>11} {'import saved':>13}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        saved = row["eager_import_ms"] - row["lazy_import_ms"]
+        print(f"{row['command']:<12} "
+              f"{row['lazy_import_ms']:>10.2f}ms "
+              f"{row['eager_import_ms']:>11.2f}ms "
+              f"{row['lazy_wall_ms']:>8.2f}ms "
+              f"{row['eager_wall_ms']:>9.2f}ms "
+              f"{saved:>11.2f}ms")
+
+
+def main() -> int:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("commands", nargs="*", default=DEFAULT_COMMANDS,
+                        help="git commands to benchmark")
+    parser.add_argument("--repeat", type=int, default=20,
+                        help="samples per measurement")
+    args = parser.parse_args()
+
+    # Warm the bytecode cache so the first sample isn't a compile
+    subprocess.run([sys.executable, "-m", "compileall", "-q", "-l", str(get_project_root())],
+                   check=False)
+
+    print_report(run_benchmark(args.commands, args.repeat))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
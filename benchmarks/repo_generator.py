@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Deterministic generator for synthetic Sapling repositories.
+
+History is written with 'git fast-import' (the only practical way to create
+100k commits quickly) and then cloned with 'sl clone --git'. Bookmarks,
+shelves and working copy changes are added with sl itself. The same
+scenario always produces the same files, history and state.
+
+Generated repositories are cached under the cache directory and reused
+while GENERATOR_VERSION and the scenario are unchanged.
+
+Usage:
+    python benchmarks/repo_generator.py small           Generate one scenario
+    python benchmarks/repo_generator.py --list          List scenarios
+    python benchmarks/repo_generator.py all --force     Regenerate everything
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+# Bump when the generated content changes so stale caches are rebuilt
+GENERATOR_VERSION = 1
+
+# Written last; a directory without it is a partial build
+COMPLETE_MARKER = ".gitsl-bench-complete"
+
+# Fixed identity and clock so repositories are reproducible
+AUTHOR = b"Bench <bench@example.com>"
+EPOCH = 1_600_000_000
+
+# Names per 'sl bookmark' call when creating bookmarks
+BOOKMARK_CHUNK = 500
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """Shape of one synthetic repository."""
+    name: str
+    files: int          # tracked files in the first commit
+    commits: int        # total commits, linear history
+    bookmarks: int      # extra bookmarks besides main
+    shelves: int        # shelved changes
+    dirty_percent: int = 1  # percent of files modified / added untracked
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    s.name: s for s in [
+        Scenario("small", files=1_000, commits=1_000, bookmarks=10, shelves=5),
+        Scenario("files-100k", files=100_000, commits=10, bookmarks=10, shelves=5),
+        Scenario("commits-100k", files=1_000, commits=100_000, bookmarks=10, shelves=5),
+        Scenario("bookmarks-10k", files=1_000, commits=1_000, bookmarks=10_000, shelves=5),
+        Scenario("shelves-500", files=1_000, commits=100, bookmarks=10, shelves=500),
+    ]
+}
+
+
+def get_default_cache_dir() -> Path:
+    """Cache directory: GITSL_BENCH_CACHE, else ~/.cache/gitsl-bench."""
+    env_dir = os.environ.get("GITSL_BENCH_CACHE")
+    if env_dir:
+        return Path(env_dir)
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(base) / "gitsl-bench"
+
+
+def file_path(index: int) -> str:
+    """Path of the index-th file: 100 files per directory, two levels deep."""
+    return f"d{index // 10_000:02d}/d{index // 100 % 100:02d}/f{index:06d}.txt"
+
+
+def file_content(index: int, revision: int) -> bytes:
+    """Content of a file at a given revision (small, deterministic)."""
+    return f"file {index}\nrevision {revision}\n".encode() + b"x" * (index % 64) + b"\n"
+
+
+def _data(payload: bytes) -> bytes:
+    return b"data %d\n%s\n" % (len(payload), payload)
+
+
+def fast_import_stream(scenario: Scenario) -> Iterator[bytes]:
+    """
+    Yield a git fast-import stream for the scenario's history.
+
+    The first commit adds every file; each later commit rewrites one
+    pseudo-randomly chosen file, so history grows without growing the tree.
+    """
+    rng = random.Random(f"{scenario.name}-{GENERATOR_VERSION}")
+    for commit in range(scenario.commits):
+        when = b"%d +0000" % (EPOCH + commit * 60)
+        message = f"commit {commit}".encode()
+        header = (
+            b"commit refs/heads/main\n"
+            b"mark :%d\n" % (commit + 1)
+            + b"author " + AUTHOR + b" " + when + b"\n"
+            + b"committer " + AUTHOR + b" " + when + b"\n"
+            + _data(message)
+        )
+        if commit > 0:
+            header += b"from :%d\n" % commit
+        yield header
+
+        if commit == 0:
+            indices = range(scenario.files)
+        else:
+            indices = [rng.randrange(scenario.files)]
+        for index in indices:
+            yield (
+                b"M 100644 inline " + file_path(index).encode() + b"\n"
+                + _data(file_content(index, commit))
+            )
+        yield b"\n"
+
+
+def _run(cmd: List[str], cwd: Path, **kwargs) -> None:
+    subprocess.run(cmd, cwd=cwd, check=True, stdout=subprocess.DEVNULL, **kwargs)
+
+
+def _build_git_source(scenario: Scenario, git_dir: Path) -> None:
+    """Create a bare git repository holding the scenario's history."""
+    _run(["git", "init", "--bare", "-q", str(git_dir)], cwd=git_dir.parent)
+    # Make main the default branch regardless of init.defaultBranch
+    _run(["git", "symbolic-ref", "HEAD", "refs/heads/main"], cwd=git_dir)
+    proc = subprocess.Popen(
+        ["git", "fast-import", "--quiet"], cwd=git_dir, stdin=subprocess.PIPE
+    )
+    with proc.stdin:
+        for chunk in fast_import_stream(scenario):
+            proc.stdin.write(chunk)
+    if proc.wait() != 0:
+        raise RuntimeError("git fast-import failed")
+
+
+def _add_bookmarks(scenario: Scenario, repo: Path) -> None:
+    """Create bookmarks in chunks, spread over the most recent commits."""
+    names = [f"bench/bookmark-{i:05d}" for i in range(scenario.bookmarks)]
+    for chunk_index, start in enumerate(range(0, len(names), BOOKMARK_CHUNK)):
+        rev = f".~{chunk_index % scenario.commits}"
+        _run(["sl", "bookmark", "-r", rev] + names[start:start + BOOKMARK_CHUNK], cwd=repo)
+
+
+def _add_shelves(scenario: Scenario, repo: Path) -> None:
+    """Shelve one distinct change per shelf."""
+    for i in range(scenario.shelves):
+        index = (i * 7919) % scenario.files
+        path = repo / file_path(index)
+        path.write_bytes(file_content(index, -1 - i))
+        _run(["sl", "shelve", "--name", f"bench-shelve-{i:04d}"], cwd=repo)
+
+
+def _dirty_working_copy(scenario: Scenario, repo: Path) -> None:
+    """Modify and add untracked files so status has work to do."""
+    count = max(1, scenario.files * scenario.dirty_percent // 100)
+    step = max(1, scenario.files // count)
+    for index in range(0, scenario.files, step)[:count]:
+        (repo / file_path(index)).write_bytes(file_content(index, -100_000))
+    untracked = repo / "untracked"
+    untracked.mkdir(exist_ok=True)
+    for i in range(count):
+        (untracked / f"u{i:06d}.txt").write_bytes(b"untracked %d\n" % i)
+
+
+def generate(scenario: Scenario, cache_dir: Path, force: bool = False) -> Path:
+    """
+    Build (or reuse) the Sapling repository for a scenario.
+
+    Args:
+        scenario: Repository shape
+        cache_dir: Directory holding generated repositories
+        force: Rebuild even if a complete cached copy exists
+
+    Returns:
+        Path of the Sapling working copy
+    """
+    root = cache_dir / f"{scenario.name}-v{GENERATOR_VERSION}"
+    repo = root / "repo"
+    marker = root / COMPLETE_MARKER
+    if marker.exists() and not force:
+        if json.loads(marker.read_text()) == asdict(scenario):
+            return repo
+
+    if root.exists():
+        shutil.rmtree(root)
+    root.mkdir(parents=True)
+
+    git_dir = root / "source.git"
+    git_dir.mkdir()
+    print(f"[{scenario.name}] writing {scenario.commits} commits with git fast-import...",
+          file=sys.stderr)
+    _build_git_source(scenario, git_dir)
+
+    print(f"[{scenario.name}] cloning with sl...", file=sys.stderr)
+    _run(["sl", "clone", "--git", f"file://{git_dir}", str(repo)], cwd=root)
+    _run(["sl", "goto", "main"], cwd=repo)
+
+    print(f"[{scenario.name}] {scenario.bookmarks} bookmarks, {scenario.shelves} shelves...",
+          file=sys.stderr)
+    _add_bookmarks(scenario, repo)
+    _add_shelves(scenario, repo)
+    _dirty_working_copy(scenario, repo)
+
+    marker.write_text(json.dumps(asdict(scenario)))
+    return repo
+
+
+def check_tools() -> List[str]:
+    """Return the names of required tools that are missing."""
+    return [tool for tool in ("git", "sl") if shutil.which(tool) is None]
+
+
+def main() -> int:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("scenarios", nargs="*", default=["small"],
+                        help="scenario names, or 'all'")
+    parser.add_argument("--list", action="store_true", help="list scenarios and exit")
+    parser.add_argument("--cache-dir", type=Path, default=get_default_cache_dir(),
+                        help="where generated repositories are kept")
+    parser.add_argument("--force", action="store_true", help="regenerate cached repositories")
+    args = parser.parse_args()
+
+    if args.list:
+        for scenario in SCENARIOS.values():
+            print(f"{scenario.name:<14} files={scenario.files} commits={scenario.commits} "
+                  f"bookmarks={scenario.bookmarks} shelves={scenario.shelves}")
+        return 0
+
+    missing = check_tools()
+    if missing:
+        print(f"error: required tools not found: {', '.join(missing)}", file=sys.stderr)
+        return 1
+
+    names = list(SCENARIOS) if args.scenarios == ["all"] else args.scenarios
+    for name in names:
+        if name not in SCENARIOS:
+            print(f"error: unknown scenario '{name}'", file=sys.stderr)
+            return 1
+        print(generate(SCENARIOS[name], args.cache_dir, force=args.force))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
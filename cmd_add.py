@@ -8,11 +8,10 @@ Supported flags:
 - ADD-05: -v/--verbose -> show files being added
 """
 
-import subprocess
 import sys
 from typing import List
 
-from common import ParsedCommand, run_sl
+from common import ParsedCommand, query_sl, run_sl, run_sl_captured
 
 
 def get_deleted_files(pathspec: List[str] = None) -> List[str]:
@@ -25,11 +24,11 @@ def get_deleted_files(pathspec: List[str] = None) -> List[str]:
     Returns:
         List of filenames that are deleted (missing from disk but tracked)
     """
-    cmd = ["sl", "status", "-d", "-n"]  # -d=deleted, -n=no-status-prefix
+    cmd = ["status", "-d", "-n"]  # -d=deleted, -n=no-status-prefix
     if pathspec:
         cmd.extend(pathspec)
 
-    result = subprocess.run(cmd, capture_output=True, text=True)
+    result = query_sl(cmd)
 
     if result.returncode != 0:
         return []
@@ -59,12 +58,12 @@ def handle_update_with_flags(pathspec: List[str], dry_run: bool, verbose: bool)
             print(f"remove '{f}'")
         return 0
 
-    result = subprocess.run(
-        ["sl", "remove", "--mark"] + deleted_files,
-        capture_output=verbose,
-        text=True
-    )
-    if verbose and result.returncode == 0:
+    cmd = ["remove", "--mark"] + deleted_files
+    if not verbose:
+        return run_sl(cmd)
+
+    result = run_sl_captured(cmd)
+    if result.returncode == 0:
         for f in deleted_files:
             print(f"remove '{f}'")
     return result.returncode
@@ -77,7 +76,7 @@ def handle_all_with_flags(remaining: List[str], dry_run: bool, verbose: bool) ->
         cmd.append("-n")
 
     if verbose or dry_run:
-        result = subprocess.run(["sl"] + cmd, capture_output=True, text=True)
+        result = run_sl_captured(cmd)
         if result.stdout:
             for line in result.stdout.strip().splitlines():
                 if line:
@@ -95,7 +94,7 @@ def handle_add_with_flags(remaining: List[str], dry_run: bool, verbose: bool) ->
         cmd.append("-n")
 
     if verbose or dry_run:
-        result = subprocess.run(["sl"] + cmd, capture_output=True, text=True)
+        result = run_sl_captured(cmd)
         if result.stdout:
             for line in result.stdout.strip().splitlines():
                 if line:
@@ -10,13 +10,12 @@ Supported flags:
 - BLAM-07: -n/--show-number -> -n (show line numbers)
 """
 
-import sys
-from common import ParsedCommand, run_sl
+from common import ParsedCommand, SlPlan, execute_plan
 
 
-def handle(parsed: ParsedCommand) -> int:
+def plan(parsed: ParsedCommand) -> SlPlan:
     """
-    Handle 'git blame' command.
+    Translate 'git blame' into an sl plan.
 
     Translations:
     - git blame <file>    -> sl annotate <file>
@@ -33,6 +32,7 @@ def handle(parsed: ParsedCommand) -> int:
     Note: sl has 'blame' as an alias for 'annotate'.
     """
     sl_args = ["annotate"]
+    messages = []
     remaining_args = []
 
     i = 0
@@ -56,34 +56,29 @@ def handle(parsed: ParsedCommand) -> int:
                 line_range = parsed.args[i]
             else:
                 line_range = "?"
-            print(f"Warning: -L {line_range} line range not supported by Sapling annotate. "
-                  f"Consider: sl annotate <file> | sed -n '{line_range}p'",
-                  file=sys.stderr)
+            messages.append(f"Warning: -L {line_range} line range not supported by Sapling annotate. "
+                            f"Consider: sl annotate <file> | sed -n '{line_range}p'")
         elif arg.startswith('-L') and len(arg) > 2:
             # Attached format: -L10,20
             line_range = arg[2:]
-            print(f"Warning: -L{line_range} line range not supported by Sapling annotate. "
-                  f"Consider: sl annotate <file> | sed -n '{line_range}p'",
-                  file=sys.stderr)
+            messages.append(f"Warning: -L{line_range} line range not supported by Sapling annotate. "
+                            f"Consider: sl annotate <file> | sed -n '{line_range}p'")
 
         # BLAM-04: -e/--show-email - not supported
         elif arg in ('-e', '--show-email'):
-            print("Warning: -e/--show-email not supported by Sapling annotate. "
-                  "Author names are shown by default.",
-                  file=sys.stderr)
+            messages.append("Warning: -e/--show-email not supported by Sapling annotate. "
+                            "Author names are shown by default.")
 
         # BLAM-05: -p/--porcelain - not supported
         elif arg in ('-p', '--porcelain'):
-            print("Warning: -p/--porcelain output not supported by Sapling annotate. "
-                  "Use -T template for custom output format.",
-                  file=sys.stderr)
+            messages.append("Warning: -p/--porcelain output not supported by Sapling annotate. "
+                            "Use -T template for custom output format.")
 
         # BLAM-06: -l - long hash (NOT SUPPORTED)
         # CRITICAL: sl -l means "show line number at first appearance" - different!
         elif arg == '-l':
-            print("Warning: -l (long revision hash) not supported by Sapling annotate. "
-                  "Sapling shows short hashes by default.",
-                  file=sys.stderr)
+            messages.append("Warning: -l (long revision hash) not supported by Sapling annotate. "
+                            "Sapling shows short hashes by default.")
             # Do NOT pass through - sl -l has completely different meaning
 
         # BLAM-07: -n/--show-number -> -n (show line numbers)
@@ -97,4 +92,9 @@ def handle(parsed: ParsedCommand) -> int:
         i += 1
 
     sl_args.extend(remaining_args)
-    return run_sl(sl_args)
+    return SlPlan([sl_args], messages=messages)
+
+
+def handle(parsed: ParsedCommand) -> int:
+    """Handle 'git blame' command."""
+    return execute_plan(plan(parsed))
@@ -14,19 +14,15 @@ Supported flags:
 """
 
 import fnmatch
-import subprocess
 import sys
-from common import ParsedCommand, run_sl
+from common import ParsedCommand, get_head_info, query_sl, run_concurrently, run_sl
 
 
 def show_current_branch() -> int:
     """BRAN-06: Show current branch name only."""
-    result = subprocess.run(
-        ['sl', 'log', '-r', '.', '--template', '{activebookmark}'],
-        capture_output=True, text=True
-    )
-    if result.stdout.strip():
-        print(result.stdout.strip())
+    _, head = get_head_info()
+    if head and head.bookmark:
+        print(head.bookmark)
     # No output if detached (matches git behavior)
     return 0
 
@@ -34,10 +30,7 @@ def show_current_branch() -> int:
 def copy_branch(source: str, dest: str) -> int:
     """BRAN-09: Copy a branch (create new bookmark at same commit)."""
     # Get commit where source bookmark points
-    result = subprocess.run(
-        ['sl', 'log', '-r', f'bookmark({source})', '--template', '{node}'],
-        capture_output=True, text=True
-    )
+    result = query_sl(['log', '-r', f'bookmark({source})', '--template', '{node}'])
     if result.returncode != 0 or not result.stdout.strip():
         sys.stderr.write(f"error: branch '{source}' not found\n")
         return 1
@@ -49,21 +42,24 @@ def copy_branch(source: str, dest: str) -> int:
 
 
 def list_bookmarks_verbose() -> int:
-    """BRAN-04: Show bookmarks with commit info."""
-    result = subprocess.run(
-        ['sl', 'bookmark', '--template', '{bookmark}: {node|short} {desc|firstline}\n'],
-        capture_output=True, text=True
+    """BRAN-04: Show bookmarks with commit info, marking the current one."""
+    result, (_, head) = run_concurrently(
+        lambda: query_sl(['bookmark', '--template', '{bookmark}: {node|short} {desc|firstline}\n']),
+        get_head_info,
     )
-    sys.stdout.write(result.stdout)
+    current = head.bookmark if head else ''
+    for line in result.stdout.splitlines():
+        bookmark = line.split(':', 1)[0]
+        # git marks the checked-out branch with '* '
+        marker = '* ' if current and bookmark == current else '  '
+        print(marker + line)
+    sys.stderr.write(result.stderr)
     return result.returncode
 
 
 def list_bookmarks_with_pattern(pattern: str) -> int:
     """BRAN-05: List bookmarks matching a glob pattern."""
-    result = subprocess.run(
-        ['sl', 'bookmark', '--template', '{bookmark}\n'],
-        capture_output=True, text=True
-    )
+    result = query_sl(['bookmark', '--template', '{bookmark}\n'])
     if result.returncode != 0:
         return result.returncode
 
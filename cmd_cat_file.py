@@ -0,0 +1,285 @@
+"""Handler for 'git cat-file' command.
+
+Supported flags:
+- CATF-01: --batch[=<format>] -> stream object contents for names read from stdin
+- CATF-02: --batch-check[=<format>] -> stream object info for names read from stdin
+- CATF-03: --buffer -> flush output only at end of input
+- CATF-04: -p <object> -> sl cat / commit text
+- CATF-05: -t <object> -> object type
+- CATF-06: -s <object> -> object size
+- CATF-07: -e <object> -> exit status only
+- CATF-08: <type> <object> -> contents, checking the type
+
+Objects are named '<rev>:<path>' (a blob, read with 'sl cat') or '<rev>'
+(a commit). HEAD maps to '.', and ':<path>' reads the working copy parent
+since Sapling has no index. Blob ids are git's (SHA-1 of the blob header
+and contents), and ids printed earlier in the same process can be used as
+names. Sapling has no tree objects, so commit contents have no tree line.
+
+Batch modes run every lookup on one warm Sapling command server when sl
+provides one, instead of one sl process per object.
+"""
+
+import hashlib
+import os
+import re
+import sys
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from common import (
+    ParsedCommand, enable_cmdserver, find_repo_root, invalidate_queries, query_sl,
+    query_sl_bytes,
+)
+
+
+DEFAULT_BATCH_FORMAT = "%(objectname) %(objecttype) %(objectsize)"
+
+FORMAT_ATOM = re.compile(r"%\(([^)]*)\)")
+FORMAT_ATOMS = ("objectname", "objecttype", "objectsize", "rest")
+
+# Commit fields, one per line; the description runs to the end
+COMMIT_TEMPLATE = "{node}\\n{p1node}\\n{p2node}\\n{author}\\n{date|hgdate}\\n{desc}"
+
+NULL_NODE = "0" * 40
+
+OBJECT_TYPES = ("blob", "commit")
+
+
+class GitObject(NamedTuple):
+    """A resolved object: git-style id, type and raw contents."""
+    oid: str
+    type: str
+    content: bytes
+
+
+# Blob id -> (rev, path) for ids handed out by this process
+_blob_names: Dict[str, Tuple[str, str]] = {}
+
+
+# ============================================================
+# OBJECT RESOLUTION
+# ============================================================
+
+def translate_rev(rev: str) -> str:
+    """Translate a git revision to a Sapling revset (HEAD -> '.')."""
+    if rev in ("", "@"):
+        return "."
+    if rev.startswith("HEAD"):
+        return "." + rev[4:]
+    return rev
+
+
+def _repo_path(path: str, root: str) -> str:
+    """Make a '<rev>:<path>' path relative to the repository root."""
+    if path.startswith(("./", "../")):
+        path = os.path.relpath(os.path.join(os.getcwd(), path), root)
+    return path.replace(os.sep, "/")
+
+
+def blob_id(content: bytes) -> str:
+    """Git's object id for a blob with these contents."""
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+
+def _resolve_blob(rev: str, path: str, root: str) -> Optional[GitObject]:
+    if not path or path.endswith("/"):
+        return None
+    result = query_sl_bytes(["cat", "-r", translate_rev(rev), "path:" + path], cwd=root)
+    if result.returncode != 0:
+        return None
+    oid = blob_id(result.stdout)
+    _blob_names[oid] = (rev, path)
+    return GitObject(oid, "blob", result.stdout)
+
+
+def _git_timezone(offset: int) -> str:
+    """Sapling's offset (seconds west of UTC) as git's +HHMM."""
+    sign = "-" if offset > 0 else "+"
+    minutes = abs(offset) // 60
+    return f"{sign}{minutes // 60:02d}{minutes % 60:02d}"
+
+
+def _resolve_commit(rev: str) -> Optional[GitObject]:
+    result = query_sl(["log", "-r", translate_rev(rev), "-l", "1", "-T", COMMIT_TEMPLATE])
+    fields = result.stdout.split("\n", 5)
+    if result.returncode != 0 or len(fields) < 6 or not fields[0]:
+        return None
+    node, p1, p2, author, date, desc = fields
+    timestamp, _, offset = date.partition(" ")
+    when = f"{timestamp} {_git_timezone(int(offset or 0))}"
+
+    lines = [f"parent {parent}" for parent in (p1, p2) if parent and parent != NULL_NODE]
+    lines.append(f"author {author} {when}")
+    lines.append(f"committer {author} {when}")
+    text = "\n".join(lines) + "\n\n" + desc.rstrip("\n") + "\n"
+    return GitObject(node, "commit", text.encode("utf-8"))
+
+
+def resolve_object(name: str, root: str) -> Optional[GitObject]:
+    """
+    Look up an object by git name.
+
+    Args:
+        name: '<rev>:<path>', a blob id printed earlier, or a revision
+        root: Repository root
+
+    Returns:
+        The object, or None if it does not exist
+    """
+    if ":" in name:
+        rev, path = name.split(":", 1)
+        return _resolve_blob(rev, _repo_path(path, root), root)
+    if name in _blob_names:
+        return _resolve_blob(*_blob_names[name], root)
+    return _resolve_commit(name)
+
+
+# ============================================================
+# BATCH MODE
+# ============================================================
+
+def expand_format(fmt: str, obj: GitObject, rest: str) -> str:
+    """Fill in a --batch/--batch-check format for one object."""
+    values = {
+        "objectname": obj.oid,
+        "objecttype": obj.type,
+        "objectsize": str(len(obj.content)),
+        "rest": rest,
+    }
+    return FORMAT_ATOM.sub(lambda m: values[m.group(1)], fmt)
+
+
+def run_batch(fmt: str, contents: bool, buffered: bool, root: str) -> int:
+    """
+    CATF-01/CATF-02: Answer one object name per stdin line.
+
+    Args:
+        fmt: Output format for each found object
+        contents: Write the object contents after its info line (--batch)
+        buffered: Flush only at the end (--buffer)
+        root: Repository root
+
+    Returns:
+        Exit code
+    """
+    # Only split off %(rest) when the format asks for it, like git
+    split_rest = "%(rest)" in fmt
+    enable_cmdserver()
+    sys.stdout.flush()
+    out = sys.stdout.buffer
+
+    for line in sys.stdin.buffer:
+        # The repository may change during a long batch (a bookmark or '.'
+        # moving): answer each name from sl, not from an earlier line's memo
+        invalidate_queries()
+        name = os.fsdecode(line.rstrip(b"\n"))
+        rest = ""
+        if split_rest:
+            parts = name.split(None, 1)
+            name = parts[0] if parts else ""
+            rest = parts[1] if len(parts) > 1 else ""
+
+        obj = resolve_object(name, root) if name else None
+        if obj is None:
+            out.write(os.fsencode(f"{name} missing\n"))
+        else:
+            out.write(os.fsencode(expand_format(fmt, obj, rest) + "\n"))
+            if contents:
+                out.write(obj.content + b"\n")
+        if not buffered:
+            out.flush()
+    out.flush()
+    return 0
+
+
+# ============================================================
+# SINGLE OBJECT
+# ============================================================
+
+def show_object(mode: str, name: str, root: str) -> int:
+    """
+    CATF-04..CATF-08: Answer a single object query.
+
+    Args:
+        mode: '-p', '-t', '-s', '-e' or an expected object type
+        name: Object name
+        root: Repository root
+
+    Returns:
+        Exit code (128 for unknown objects, like git)
+    """
+    obj = resolve_object(name, root)
+    if mode == "-e":
+        return 0 if obj is not None else 1
+    if obj is None:
+        sys.stderr.write(f"fatal: Not a valid object name {name}\n")
+        return 128
+
+    if mode == "-t":
+        print(obj.type)
+    elif mode == "-s":
+        print(len(obj.content))
+    else:
+        if mode != "-p" and mode != obj.type:
+            sys.stderr.write(f"fatal: git cat-file {name}: bad file\n")
+            return 128
+        sys.stdout.flush()
+        sys.stdout.buffer.write(obj.content)
+        sys.stdout.buffer.flush()
+    return 0
+
+
+def handle(parsed: ParsedCommand) -> int:
+    """
+    Handle 'git cat-file' command.
+
+    Translations:
+    - git cat-file --batch          -> one 'sl cat' per name, on a command server
+    - git cat-file --batch-check    -> same, printing only id, type and size
+    - git cat-file -p <rev>:<path>  -> sl cat -r <rev> path:<path>
+    - git cat-file -p <rev>         -> sl log -r <rev> (commit text)
+    - git cat-file -t/-s/-e <obj>   -> type, size or existence
+    """
+    batch_format = None
+    contents = False
+    buffered = False
+    mode = None
+    positional = []
+
+    for arg in parsed.args:
+        if arg == "--batch" or arg.startswith("--batch="):
+            batch_format = arg.partition("=")[2] or DEFAULT_BATCH_FORMAT
+            contents = True
+        elif arg == "--batch-check" or arg.startswith("--batch-check="):
+            batch_format = arg.partition("=")[2] or DEFAULT_BATCH_FORMAT
+            contents = False
+        elif arg == "--buffer":
+            buffered = True
+        elif arg in ("-p", "-t", "-s", "-e"):
+            mode = arg
+        elif arg.startswith("-"):
+            sys.stderr.write(f"gitsl: cat-file flag not supported: {arg}\n")
+            return 1
+        else:
+            positional.append(arg)
+
+    root = find_repo_root()
+    if root is None:
+        sys.stderr.write("fatal: not a git repository (or any of the parent directories): .git\n")
+        return 128
+
+    if batch_format is not None:
+        for atom in FORMAT_ATOM.findall(batch_format):
+            if atom not in FORMAT_ATOMS:
+                sys.stderr.write(f"fatal: unknown format element: %({atom})\n")
+                return 128
+        return run_batch(batch_format, contents, buffered, root)
+
+    # 'git cat-file <type> <object>'
+    if mode is None and len(positional) == 2 and positional[0] in OBJECT_TYPES:
+        mode = positional.pop(0)
+    if mode is None or len(positional) != 1:
+        sys.stderr.write("usage: git cat-file (-t | -s | -e | -p | <type>) <object>\n"
+                         "   or: git cat-file (--batch | --batch-check) [--buffer]\n")
+        return 129
+    return show_object(mode, positional[0], root)
@@ -1,11 +1,10 @@
 """Handler for 'git checkout' command."""
 
 import os
-import subprocess
 import sys
 from typing import List, Optional, Tuple
 
-from common import ParsedCommand, run_sl
+from common import ParsedCommand, query_sl, run_sl
 
 
 def _is_valid_revision(arg: str, cwd: Optional[str] = None) -> bool:
@@ -18,12 +17,7 @@ def _is_valid_revision(arg: str, cwd: Optional[str] = None) -> bool:
     - Bookmark names
     - Revset expressions
     """
-    result = subprocess.run(
-        ["sl", "log", "-r", arg, "-T", "{node}", "-l", "1"],
-        capture_output=True,
-        text=True,
-        cwd=cwd
-    )
+    result = query_sl(["log", "-r", arg, "-T", "{node}", "-l", "1"], cwd=cwd)
     return result.returncode == 0
 
 
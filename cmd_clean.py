@@ -7,13 +7,12 @@ Supported flags:
 - CLEN-04: -f, -d, -n -> existing handling (force, directories, dry-run)
 """
 
-import sys
-from common import ParsedCommand, run_sl
+from common import PLAN_RUN, ParsedCommand, SlPlan, execute_plan
 
 
-def handle(parsed: ParsedCommand) -> int:
+def plan(parsed: ParsedCommand) -> SlPlan:
     """
-    Handle 'git clean' command.
+    Translate 'git clean' into an sl plan.
 
     Translations:
     - git clean -f      -> sl purge (force required by gitsl)
@@ -28,6 +27,7 @@ def handle(parsed: ParsedCommand) -> int:
     SAFETY: git requires -f or -n to run. We enforce this.
     """
     args = list(parsed.args)
+    messages = []
 
     # Check for force or dry-run flags (git's safety requirement)
     # Handle both standalone flags and combined short flags (e.g., -fd, -fn)
@@ -40,9 +40,8 @@ def handle(parsed: ParsedCommand) -> int:
     has_only_ignored = any('X' in a for a in args if a.startswith('-') and not a.startswith('--'))
 
     if not has_force and not has_dry_run:
-        print("fatal: clean.requireForce is true and -f not given: refusing to clean",
-              file=sys.stderr)
-        return 128
+        messages.append("fatal: clean.requireForce is true and -f not given: refusing to clean")
+        return SlPlan([], messages=messages, exit_code=128)
 
     sl_args = []
 
@@ -60,8 +59,8 @@ def handle(parsed: ParsedCommand) -> int:
 
     # CLEN-02: -X -> warning (only ignored files not directly supported)
     if has_only_ignored:
-        print("Warning: -X (only ignored files) not directly supported. "
-              "Using --ignored which removes untracked and ignored files.", file=sys.stderr)
+        messages.append("Warning: -X (only ignored files) not directly supported. "
+                        "Using --ignored which removes untracked and ignored files.")
         if "--ignored" not in sl_args:
             sl_args.append("--ignored")
 
@@ -92,4 +91,9 @@ def handle(parsed: ParsedCommand) -> int:
 
         i += 1
 
-    return run_sl(["purge"] + sl_args + filtered_args)
+    return SlPlan([["purge"] + sl_args + filtered_args], PLAN_RUN, messages=messages)
+
+
+def handle(parsed: ParsedCommand) -> int:
+    """Handle 'git clean' command."""
+    return execute_plan(plan(parsed))
@@ -12,13 +12,12 @@ Supported flags:
 - CLON-09: -v/--verbose -> -v (pass through)
 """
 
-import sys
-from common import ParsedCommand, run_sl
+from common import ParsedCommand, SlPlan, execute_plan
 
 
-def handle(parsed: ParsedCommand) -> int:
+def plan(parsed: ParsedCommand) -> SlPlan:
     """
-    Handle 'git clone' command.
+    Translate 'git clone' into an sl plan.
 
     Translations:
     - git clone -b <branch> -> sl clone -u <bookmark>
@@ -34,6 +33,7 @@ def handle(parsed: ParsedCommand) -> int:
     - --no-tags (not applicable)
     """
     sl_args = []
+    messages = []
     remaining_args = []
 
     i = 0
@@ -64,37 +64,38 @@ def handle(parsed: ParsedCommand) -> int:
         elif arg == '--depth':
             if i + 1 < len(parsed.args):
                 i += 1  # Skip the value
-            print("Warning: --depth has no effect in Sapling (uses lazy fetching by default)",
-                  file=sys.stderr)
+            messages.append("Warning: --depth has no effect in Sapling (uses lazy fetching by default)")
         elif arg.startswith('--depth='):
-            print("Warning: --depth has no effect in Sapling (uses lazy fetching by default)",
-                  file=sys.stderr)
+            messages.append("Warning: --depth has no effect in Sapling (uses lazy fetching by default)")
 
         # CLON-03: --single-branch (not applicable)
         elif arg == '--single-branch':
-            print("Warning: --single-branch not applicable to Sapling", file=sys.stderr)
+            messages.append("Warning: --single-branch not applicable to Sapling")
 
         # CLON-04: -o/--origin (unsupported - Sapling uses 'default')
         elif arg in ('-o', '--origin'):
             if i + 1 < len(parsed.args):
                 i += 1  # Skip the value
-            print("Warning: custom remote name not supported. Sapling uses 'default' remote.",
-                  file=sys.stderr)
+            messages.append("Warning: custom remote name not supported. Sapling uses 'default' remote.")
         elif arg.startswith('--origin='):
-            print("Warning: custom remote name not supported. Sapling uses 'default' remote.",
-                  file=sys.stderr)
+            messages.append("Warning: custom remote name not supported. Sapling uses 'default' remote.")
 
         # CLON-06: --recursive/--recurse-submodules (no submodules)
         elif arg in ('--recursive', '--recurse-submodules'):
-            print("Warning: submodules not supported by Sapling", file=sys.stderr)
+            messages.append("Warning: submodules not supported by Sapling")
 
         # CLON-07: --no-tags (not applicable)
         elif arg == '--no-tags':
-            print("Warning: --no-tags not applicable to Sapling", file=sys.stderr)
+            messages.append("Warning: --no-tags not applicable to Sapling")
 
         else:
             remaining_args.append(arg)
 
         i += 1
 
-    return run_sl(["clone"] + sl_args + remaining_args)
+    return SlPlan([["clone"] + sl_args + remaining_args], messages=messages)
+
+
+def handle(parsed: ParsedCommand) -> int:
+    """Handle 'git clone' command."""
+    return execute_plan(plan(parsed))
@@ -12,19 +12,15 @@ Supported flags:
 - COMM-08: -n/--no-verify -> warning (not supported)
 """
 
-import subprocess
 import sys
 import tempfile
 import os
-from common import ParsedCommand, run_sl
+from common import ParsedCommand, query_sl, run_sl
 
 
 def get_user_identity() -> str:
     """Get user identity from sl config for signoff trailer."""
-    result = subprocess.run(
-        ['sl', 'config', 'ui.username'],
-        capture_output=True, text=True
-    )
+    result = query_sl(['config', 'ui.username'])
     return result.stdout.strip() or "Unknown User <unknown@example.com>"
 
 
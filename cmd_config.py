@@ -11,13 +11,12 @@ Supported flags:
 - CONF-08: --all -> warning (multi-valued not supported)
 """
 
-import sys
-from common import ParsedCommand, run_sl
+from common import PLAN_RUN, ParsedCommand, SlPlan, execute_plan
 
 
-def handle(parsed: ParsedCommand) -> int:
+def plan(parsed: ParsedCommand) -> SlPlan:
     """
-    Handle 'git config' command.
+    Translate 'git config' into an sl plan.
 
     Translations:
     - git config <key>          -> sl config <key>
@@ -35,6 +34,7 @@ def handle(parsed: ParsedCommand) -> int:
     - --all (multi-valued keys not supported)
     """
     sl_args = []
+    messages = []
     remaining_args = []
     is_list = False
 
@@ -75,8 +75,7 @@ def handle(parsed: ParsedCommand) -> int:
 
         # CONF-08: --all: warn (multi-valued not supported)
         elif arg == '--all':
-            print("Warning: --all (multi-valued key retrieval) not supported by Sapling config",
-                  file=sys.stderr)
+            messages.append("Warning: --all (multi-valued key retrieval) not supported by Sapling config")
 
         else:
             remaining_args.append(arg)
@@ -85,7 +84,7 @@ def handle(parsed: ParsedCommand) -> int:
 
     # Handle list mode
     if is_list:
-        return run_sl(["config"] + sl_args)
+        return SlPlan([["config"] + sl_args], PLAN_RUN, messages=messages)
 
     # Count positional args (non-flag args)
     positional = [a for a in remaining_args if not a.startswith('-')]
@@ -96,4 +95,9 @@ def handle(parsed: ParsedCommand) -> int:
         if not has_scope:
             sl_args.append('--local')
 
-    return run_sl(["config"] + sl_args + remaining_args)
+    return SlPlan([["config"] + sl_args + remaining_args], PLAN_RUN, messages=messages)
+
+
+def handle(parsed: ParsedCommand) -> int:
+    """Handle 'git config' command."""
+    return execute_plan(plan(parsed))
@@ -15,13 +15,12 @@ Supported flags:
 - DIFF-12: --color-moved -> warning (not supported)
 """
 
-import sys
-from common import ParsedCommand, run_sl
+from common import PLAN_RUN, ParsedCommand, SlPlan, execute_plan
 
 
-def handle(parsed: ParsedCommand) -> int:
+def plan(parsed: ParsedCommand) -> SlPlan:
     """
-    Handle 'git diff' command.
+    Translate 'git diff' into an sl plan.
 
     Translations:
     - git diff --stat -> sl diff --stat
@@ -39,6 +38,7 @@ def handle(parsed: ParsedCommand) -> int:
     All other arguments pass through unchanged.
     """
     sl_args = ["diff"]
+    messages = []
     remaining_args = []
     name_only = False
     name_status = False
@@ -83,45 +83,39 @@ def handle(parsed: ParsedCommand) -> int:
 
         # DIFF-07: --staged/--cached - warn about no staging area
         elif arg in ('--staged', '--cached'):
-            print("Warning: Sapling has no staging area. "
-                  "Use 'sl diff' to see all uncommitted changes.",
-                  file=sys.stderr)
+            messages.append("Warning: Sapling has no staging area. "
+                            "Use 'sl diff' to see all uncommitted changes.")
             # Skip this flag - don't add to sl_args
 
         # DIFF-08: --raw - warn about unsupported format
         elif arg == '--raw':
-            print("Warning: --raw format not supported. "
-                  "Use 'sl status' for file status information.",
-                  file=sys.stderr)
+            messages.append("Warning: --raw format not supported. "
+                            "Use 'sl status' for file status information.")
             # Skip this flag
 
         # DIFF-09: -M/--find-renames - warn about unsupported feature
         elif arg == '--find-renames' or arg == '-M' or (
                 arg.startswith('-M') and len(arg) > 2 and arg[2:].isdigit()):
-            print("Warning: Sapling doesn't support automatic rename detection (-M). "
-                  "Use 'sl mv' to track renames before committing.",
-                  file=sys.stderr)
+            messages.append("Warning: Sapling doesn't support automatic rename detection (-M). "
+                            "Use 'sl mv' to track renames before committing.")
             # Skip this flag
 
         # DIFF-10: -C/--find-copies - warn about unsupported feature
         elif arg == '--find-copies' or arg == '-C' or (
                 arg.startswith('-C') and len(arg) > 2 and arg[2:].isdigit()):
-            print("Warning: Sapling doesn't support automatic copy detection (-C). "
-                  "Use 'sl copy' to track copies before committing.",
-                  file=sys.stderr)
+            messages.append("Warning: Sapling doesn't support automatic copy detection (-C). "
+                            "Use 'sl copy' to track copies before committing.")
             # Skip this flag
 
         # DIFF-11: --word-diff - warn about unsupported feature
         elif arg.startswith('--word-diff'):
-            print("Warning: Sapling doesn't support word-level diff (--word-diff). "
-                  "Consider using external tools like 'diff-so-fancy' or 'delta'.",
-                  file=sys.stderr)
+            messages.append("Warning: Sapling doesn't support word-level diff (--word-diff). "
+                            "Consider using external tools like 'diff-so-fancy' or 'delta'.")
             # Skip this flag
 
         # DIFF-12: --color-moved - warn about unsupported feature
         elif arg.startswith('--color-moved'):
-            print("Warning: Sapling doesn't support --color-moved highlighting.",
-                  file=sys.stderr)
+            messages.append("Warning: Sapling doesn't support --color-moved highlighting.")
             # Skip this flag
 
         # Everything else passes through
@@ -141,10 +135,9 @@ def handle(parsed: ParsedCommand) -> int:
         if has_commits:
             # For commit diff, sl diff doesn't support --name-only directly
             # Pass through and accept different output format
-            print("Note: --name-only/--name-status for commit diff may differ from git.",
-                  file=sys.stderr)
+            messages.append("Note: --name-only/--name-status for commit diff may differ from git.")
             sl_args.extend(remaining_args)
-            return run_sl(sl_args)
+            return SlPlan([sl_args], PLAN_RUN, messages=messages)
         else:
             # For working directory diff, use sl status -mard
             # This shows modified, added, removed, deleted files
@@ -154,7 +147,12 @@ def handle(parsed: ParsedCommand) -> int:
                 status_args.append("--no-status")
             # For --name-status, sl status already shows status codes (M, A, R, !)
             # The output format is close enough to git's
-            return run_sl(status_args)
+            return SlPlan([status_args], PLAN_RUN, messages=messages)
 
     sl_args.extend(remaining_args)
-    return run_sl(sl_args)
+    return SlPlan([sl_args], PLAN_RUN, messages=messages)
+
+
+def handle(parsed: ParsedCommand) -> int:
+    """Handle 'git diff' command."""
+    return execute_plan(plan(parsed))
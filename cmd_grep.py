@@ -4,26 +4,196 @@ Supported flags:
 - GREP-01: -n/--line-number -> -n (show line numbers)
 - GREP-02: -i/--ignore-case -> -i (case insensitive)
 - GREP-03: -l/--files-with-matches -> -l (files only)
-- GREP-04: -c/--count -> warning (not supported)
+- GREP-04: -c/--count -> matching lines counted per file from sl grep's output
 - GREP-05: -w/--word-regexp -> -w (word match)
 - GREP-06: -v/--invert-match -> -V (CRITICAL: sl uses uppercase V)
 - GREP-07: -A <num> -> -A <num> (lines after)
 - GREP-08: -B <num> -> -B <num> (lines before)
 - GREP-09: -C <num> -> -C <num> (context lines)
-- GREP-10: -h -> warning (shows help in sl, not suppress filename)
+- GREP-10: -h -> file names stripped from sl grep's output (sl -h shows help)
 - GREP-11: -H -> no-op (already default behavior)
-- GREP-12: -o/--only-matching -> warning (not supported)
-- GREP-13: -q/--quiet -> warning (not supported, use grep | wc -l to check)
+- GREP-12: -o/--only-matching -> matched parts extracted from sl grep's output
+- GREP-13: -q/--quiet -> sl grep stopped at its first match
 - GREP-14: -F/--fixed-strings -> -F (literal strings)
 """
 
+import functools
+import itertools
+import os
+import re
 import sys
-from common import ParsedCommand, run_sl
+from typing import BinaryIO, Callable, List, Optional, Pattern, Tuple
 
+from common import PLAN_CALL, ParsedCommand, SlPlan, execute_plan, is_native_grep, scan_sl
+from gitsl_grep import (
+    FILE_LIST_QUERY, GrepOptions, compile_pattern, compile_source, grep_working_copy,
+    pattern_source,
+)
 
-def handle(parsed: ParsedCommand) -> int:
+
+# ============================================================
+# OUTPUT POST-PROCESSING (-c, -o, -q, -h)
+# ============================================================
+
+# Separators tried as the end of a line's file name: enough for any
+# real path, while a long line full of ':' costs a bounded number of lookups
+MAX_PATH_CANDIDATES = 16
+
+
+def split_path(line: bytes, is_file: Callable[[bytes], bool], context: bool,
+               previous: Optional[bytes] = None) -> Tuple[bytes, bytes]:
     """
-    Handle 'git grep' command.
+    Split one line of sl grep output into its file name and the rest.
+
+    Lines are '<path>:<text>' for matches and, with context lines,
+    '<path>-<text>' for context; a path may itself contain ':' or '-'.
+    sl prints a file's lines together, so a line starting with the
+    previous line's path and a separator belongs to that file (context
+    groups of different files are split by '--' lines). Otherwise
+    the first MAX_PATH_CANDIDATES separators are tried, and the longest
+    prefix naming an existing file wins, so 'a-b.txt:x' is never charged
+    to a file 'a'.
+
+    Args:
+        line: Output line, without its newline
+        is_file: Tells whether a path names an existing file
+        context: Output may hold context lines (only then is '-' a separator)
+        previous: The path split off the previous line, if any
+    """
+    separators = b":-" if context else b":"
+    if previous is not None:
+        separator = line[len(previous):len(previous) + 1]
+        if separator and separator in separators and line.startswith(previous):
+            return previous, line[len(previous) + 1:]
+    path = None
+    candidates = re.finditer(b"[" + separators + b"]", line)
+    for match in itertools.islice(candidates, MAX_PATH_CANDIDATES):
+        if is_file(line[:match.start()]):
+            path = line[:match.start()]
+    if path is not None:
+        return path, line[len(path) + 1:]
+    path, _, rest = line.partition(b":")
+    return path, rest
+
+
+def post_process(args: List[str], count: bool, only_matching: Optional[Pattern[bytes]],
+                 quiet: bool, no_filename: bool, line_numbers: bool,
+                 context: bool = False) -> int:
+    """
+    Run sl grep and rewrite its output into what git grep would print.
+
+    The output is processed line by line as it arrives; nothing is
+    buffered beyond the current file's count.
+
+    Args:
+        args: The sl grep command
+        count: -c: print '<path>:<matching lines>' per file
+        only_matching: -o: print each part of a line matching this pattern
+        quiet: -q: print nothing, stop sl at the first match
+        no_filename: -h: leave out file names
+        line_numbers: sl grep was asked for line numbers (-n)
+        context: sl grep was asked for context lines (-A/-B/-C)
+
+    Returns:
+        sl grep's exit code, or 0 if -q stopped it at a match
+    """
+    out = sys.stdout.buffer
+
+    def consume(stream: BinaryIO) -> bool:
+        if quiet:
+            # Any output line is a match; sl need not search any further
+            for _ in stream:
+                return True
+            return False
+
+        # Lines of one file come together: remember what was looked up
+        is_file = functools.lru_cache(maxsize=1024)(os.path.isfile)
+        path = None
+        counted_path, counted_prefix, counted = None, b"", 0
+        for line in stream:
+            line = line.rstrip(b"\n")
+            if line == b"--":
+                # Separator between context groups; the next group may
+                # start another file, as 'a-b.txt-' lines may follow 'a:'
+                if context:
+                    out.write(b"--\n")
+                path = None
+                continue
+            path, rest = split_path(line, is_file, context, path)
+            prefix = b"" if no_filename else path + b":"
+
+            if count:
+                if path != counted_path:
+                    if counted_path is not None:
+                        out.write(counted_prefix + b"%d\n" % counted)
+                    counted_path, counted_prefix, counted = path, prefix, 0
+                counted += 1
+            elif only_matching is not None:
+                if line_numbers:
+                    number, _, rest = rest.partition(b":")
+                    prefix += number + b":"
+                for match in only_matching.finditer(rest):
+                    out.write(prefix + match.group(0) + b"\n")
+            else:
+                # Context lines keep their '<n>-' prefix
+                out.write(prefix + rest + b"\n")
+        if counted_path is not None:
+            out.write(counted_prefix + b"%d\n" % counted)
+        return False
+
+    sys.stdout.flush()
+    exit_code = scan_sl(args, consume)
+    out.flush()
+    return exit_code
+
+
+def native_plan(sl_args: List[str], context_args: List[str],
+                remaining_args: List[str]) -> Optional[SlPlan]:
+    """
+    Plan a search by the native working-copy engine (GITSL_GREP_ENGINE=native).
+
+    Returns:
+        The plan, or None if the search needs sl grep: options the engine
+        does not handle, no pattern, or a pattern without a Python
+        translation (see gitsl_grep.translate_bre)
+    """
+    if '-V' in sl_args:
+        return None
+    positional = []
+    for arg in remaining_args:
+        if arg == '--':
+            continue
+        if arg.startswith('-'):
+            return None
+        positional.append(arg)
+    if not positional:
+        return None
+
+    before = after = 0
+    try:
+        for flag, value in zip(context_args[::2], context_args[1::2]):
+            if flag in ('-B', '-C'):
+                before = int(value)
+            if flag in ('-A', '-C'):
+                after = int(value)
+    except ValueError:
+        return None
+
+    pattern, pathspecs = positional[0], positional[1:]
+    ignore_case, word, fixed = '-i' in sl_args, '-w' in sl_args, '-F' in sl_args
+    source = pattern_source(pattern, ignore_case, word, fixed)
+    if compile_source(source) is None:
+        return None
+    source, flags = source
+    options = GrepOptions(source, flags, '-n' in sl_args, '-l' in sl_args,
+                          max(before, 0), max(after, 0))
+    runner = functools.partial(grep_working_copy, options=options, pathspecs=pathspecs)
+    return SlPlan([list(FILE_LIST_QUERY)], PLAN_CALL, runner)
+
+
+def plan(parsed: ParsedCommand) -> SlPlan:
+    """
+    Translate 'git grep' into an sl plan.
 
     Translations:
     - git grep <pattern>     -> sl grep <pattern>
@@ -37,17 +207,28 @@ def handle(parsed: ParsedCommand) -> int:
     - git grep -w <pattern>  -> sl grep -w <pattern>
     - git grep -F <pattern>  -> sl grep -F <pattern>
 
-    Unsupported (with warnings):
-    - git grep -c  -> warning: use sl grep | wc -l
-    - git grep -h  -> warning: cannot suppress filenames
-    - git grep -o  -> warning: use sl grep | grep -o
-    - git grep -q  -> warning: use sl grep | wc -l (no quiet mode)
+    Post-processed (see post_process):
+    - git grep -c  -> sl grep, matching lines counted per file
+    - git grep -h  -> sl grep, file names stripped
+    - git grep -o  -> sl grep, matching parts extracted
+    - git grep -q  -> sl grep -l, stopped at the first match
+
     - git grep -H  -> no-op (already default)
 
+    With GITSL_GREP_ENGINE=native, searches with none of -v/-c/-o/-q/-h
+    and no other options are done by gitsl's own engine (see gitsl_grep)
+    instead of sl grep.
+
     All other arguments pass through unchanged.
     """
     sl_args = ["grep"]
+    messages = []
     remaining_args = []
+    count = False
+    only_matching = False
+    quiet = False
+    no_filename = False
+    context_args = []
 
     i = 0
     while i < len(parsed.args):
@@ -65,11 +246,9 @@ def handle(parsed: ParsedCommand) -> int:
         elif arg in ('-l', '--files-with-matches'):
             sl_args.append('-l')
 
-        # GREP-04: -c/--count - not supported, warn
+        # GREP-04: -c/--count - counted from sl grep's output
         elif arg in ('-c', '--count'):
-            print("Warning: -c/--count not supported by Sapling grep. "
-                  "Consider: sl grep <pattern> | wc -l",
-                  file=sys.stderr)
+            count = True
 
         # GREP-05: -w/--word-regexp passes through
         elif arg in ('-w', '--word-regexp'):
@@ -83,52 +262,46 @@ def handle(parsed: ParsedCommand) -> int:
         elif arg == '-A':
             if i + 1 < len(parsed.args):
                 i += 1
-                sl_args.extend(['-A', parsed.args[i]])
+                context_args.extend(['-A', parsed.args[i]])
         elif arg.startswith('-A') and len(arg) > 2:
             # Attached format: -A5
-            sl_args.extend(['-A', arg[2:]])
+            context_args.extend(['-A', arg[2:]])
 
         # GREP-08: -B <num> - lines before match
         elif arg == '-B':
             if i + 1 < len(parsed.args):
                 i += 1
-                sl_args.extend(['-B', parsed.args[i]])
+                context_args.extend(['-B', parsed.args[i]])
         elif arg.startswith('-B') and len(arg) > 2:
             # Attached format: -B5
-            sl_args.extend(['-B', arg[2:]])
+            context_args.extend(['-B', arg[2:]])
 
         # GREP-09: -C <num> - context lines (before and after)
         elif arg == '-C':
             if i + 1 < len(parsed.args):
                 i += 1
-                sl_args.extend(['-C', parsed.args[i]])
+                context_args.extend(['-C', parsed.args[i]])
         elif arg.startswith('-C') and len(arg) > 2:
             # Attached format: -C5
-            sl_args.extend(['-C', arg[2:]])
+            context_args.extend(['-C', arg[2:]])
 
         # GREP-10: -h - suppress filename (sl -h shows help instead!)
         elif arg == '-h':
-            print("Warning: -h (suppress filename) not supported by Sapling grep. "
-                  "Filenames will be shown.",
-                  file=sys.stderr)
             # Do NOT pass through - would show help instead
+            no_filename = True
 
         # GREP-11: -H - force filename (already default behavior, no-op)
         elif arg == '-H':
             # Silently skip - sl grep already shows filenames by default
             pass
 
-        # GREP-12: -o/--only-matching - not supported, warn
+        # GREP-12: -o/--only-matching - extracted from sl grep's output
         elif arg in ('-o', '--only-matching'):
-            print("Warning: -o/--only-matching not supported by Sapling grep. "
-                  "Consider: sl grep <pattern> | grep -o <pattern>",
-                  file=sys.stderr)
+            only_matching = True
 
-        # GREP-13: -q/--quiet - not supported by sl grep, warn
+        # GREP-13: -q/--quiet - sl grep has no quiet mode; stop it at the first match
         elif arg in ('-q', '--quiet'):
-            print("Warning: -q/--quiet not supported by Sapling grep. "
-                  "Use exit code from: sl grep <pattern> | wc -l",
-                  file=sys.stderr)
+            quiet = True
 
         # GREP-14: -F/--fixed-strings passes through
         elif arg in ('-F', '--fixed-strings'):
@@ -140,5 +313,43 @@ def handle(parsed: ParsedCommand) -> int:
 
         i += 1
 
+    if '-l' in sl_args:
+        # File lists are file names only
+        no_filename = False
+    if not (count or only_matching or quiet or no_filename):
+        if is_native_grep():
+            native = native_plan(sl_args, context_args, remaining_args)
+            if native is not None:
+                return native
+        sl_args.extend(context_args)
+        sl_args.extend(remaining_args)
+        return SlPlan([sl_args], messages=messages)
+
+    # Counts, matched parts and existence checks take no context lines
+    context = bool(context_args) and not (count or only_matching or quiet)
+    if context:
+        sl_args.extend(context_args)
+    if quiet:
+        sl_args.append('-l')
     sl_args.extend(remaining_args)
-    return run_sl(sl_args)
+
+    pattern = None
+    if only_matching:
+        positional = [a for a in remaining_args if not a.startswith('-')]
+        if positional:
+            pattern = compile_pattern(positional[0], '-i' in sl_args, '-w' in sl_args,
+                                      '-F' in sl_args)
+        if pattern is None:
+            messages.append("Warning: -o/--only-matching cannot translate this "
+                            "pattern; showing whole lines.")
+
+    runner = functools.partial(
+        post_process, count=count, only_matching=pattern, quiet=quiet,
+        no_filename=no_filename, line_numbers='-n' in sl_args, context=context,
+    )
+    return SlPlan([sl_args], PLAN_CALL, runner, messages=messages)
+
+
+def handle(parsed: ParsedCommand) -> int:
+    """Handle 'git grep' command."""
+    return execute_plan(plan(parsed))
@@ -1,12 +1,17 @@
 """Handler for 'git init' command."""
 
-from common import ParsedCommand, run_sl
+from common import ParsedCommand, SlPlan, execute_plan
 
 
-def handle(parsed: ParsedCommand) -> int:
+def plan(parsed: ParsedCommand) -> SlPlan:
     """
-    Handle 'git init' command.
+    Translate 'git init' into an sl plan.
 
     Translates to 'sl init' and passes through all arguments.
     """
-    return run_sl(["init"] + parsed.args)
+    return SlPlan([["init"] + parsed.args])
+
+
+def handle(parsed: ParsedCommand) -> int:
+    """Handle 'git init' command."""
+    return execute_plan(plan(parsed))
@@ -15,17 +15,21 @@ Supported flags:
 - LOG-12: --name-status -> template with file status
 - LOG-13: --decorate -> template with bookmarks
 - LOG-14: --pretty/--format -> -T template
-- LOG-15: --first-parent -> revset approximation
-- LOG-16: --reverse -> revset with reverse()
-- LOG-17: -S<string> -> warning (pickaxe not supported)
-- LOG-18: -G<regex> -> warning (pickaxe not supported)
+- LOG-15: --first-parent -> revset following first parents (_firstancestors)
+- LOG-16: --reverse -> revset, with limits and filters pushed into it
+- LOG-17: -S<string> -> streaming search of 'sl log -p' (occurrence count changed)
+- LOG-18: -G<regex> -> streaming search of 'sl log -p' (changed line matches)
 - LOG-19: -n/--max-count -> -l (already implemented)
 - LOG-20: --oneline -> template (already implemented)
 """
 
+import functools
+import os
 import re
-import sys
-from common import ParsedCommand, run_sl
+from typing import BinaryIO, Iterator, List, Optional, Pattern, Tuple
+
+from common import PLAN_CALL, ParsedCommand, SlPlan, execute_plan, run_sl, scan_sl
+from gitsl_format import compile_format
 
 
 # Template for --oneline format
@@ -52,35 +56,208 @@ PRETTY_PRESETS = {
     'full': "commit {node}\\nAuthor: {author}\\nCommit: {author}\\n\\n    {desc}\\n\\n",
 }
 
-# Git format placeholders to sl template keywords
-GIT_TO_SL_PLACEHOLDERS = {
-    '%H': '{node}',
-    '%h': '{node|short}',
-    '%s': '{desc|firstline}',
-    '%b': '{desc}',
-    '%an': '{author|person}',
-    '%ae': '{author|email}',
-    '%ad': '{date|isodate}',
-    '%ar': '{date|age}',
-    '%d': '{bookmarks}',
-    '%n': '\\n',
-}
 
+# Template for the scanned 'sl log -p' output of -S/-G: a marker line per
+# commit, followed by its diff
+PICKAXE_MARKER = b"\x01"
+PICKAXE_TEMPLATE = "\\x01{node}\\n"
 
-def translate_format_placeholders(git_format: str) -> str:
-    """Translate git format placeholders to sl template keywords."""
-    result = git_format
-    for git_placeholder, sl_keyword in GIT_TO_SL_PLACEHOLDERS.items():
-        result = result.replace(git_placeholder, sl_keyword)
-    # Ensure newline at end
-    if not result.endswith('\\n'):
-        result += '\\n'
-    return result
+# Most matching commits shown by one 'sl log -r' call. Batches start at
+# one commit and double, so the first match appears as soon as it is found.
+PICKAXE_MAX_BATCH = 256
 
 
-def handle(parsed: ParsedCommand) -> int:
+def revset_string(value: str) -> str:
+    """Quote a value as a revset string literal."""
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+def any_of(predicates: List[str]) -> str:
+    """Combine revset predicates so that matching any one of them is enough."""
+    if len(predicates) == 1:
+        return predicates[0]
+    return "(" + " + ".join(predicates) + ")"
+
+
+def translate_revision(rev: str) -> str:
+    """Translate a git revision into an sl one (HEAD becomes '.')."""
+    if rev.startswith('HEAD'):
+        return '.' + rev[4:]
+    return rev
+
+
+def history(rev: str, first_parent: bool) -> str:
+    """
+    Translate a git revision argument into the revset of its history.
+
+    'B' is every ancestor of B, and 'A..B' the ancestors of B that are not
+    ancestors of A (an empty side means HEAD). With first_parent, only
+    first parents are followed from B, using sl's lazy _firstancestors().
+    """
+    walk = "_firstancestors" if first_parent else "ancestors"
+    if '..' not in rev or '...' in rev:
+        return f"{walk}({translate_revision(rev)})"
+    exclude, include = (translate_revision(side or 'HEAD') for side in rev.split('..', 1))
+    if first_parent:
+        return f"({walk}({include}) - ancestors({exclude}))"
+    return f"only({include}, {exclude})"
+
+
+def build_revset(revisions: List[str], all_commits: bool, filters: List[str],
+                 limit: Optional[str], reverse: bool, first_parent: bool) -> str:
+    """
+    Build one revset selecting exactly the commits 'git log' would show.
+
+    Filters and the limit are part of the revset, so sl evaluates them
+    lazily while walking history instead of materializing every ancestor
+    first. 'sl log -r' lists a revset oldest first, so the newest N
+    commits are last(<set>, N); git's default newest-first order wraps
+    that in reverse().
+
+    Args:
+        revisions: Git revision arguments (default: HEAD)
+        all_commits: --all was given
+        filters: Revset predicates every commit must match
+        limit: Maximum number of commits, if any
+        reverse: --reverse was given (oldest first)
+        first_parent: --first-parent was given
+
+    Returns:
+        The revset for 'sl log -r'
+    """
+    if all_commits:
+        base = "_firstancestors(heads(all()))" if first_parent else "all()"
+    else:
+        base = any_of([history(rev, first_parent) for rev in revisions or ['HEAD']])
+
+    revset = " & ".join([base] + filters)
+    if limit is not None:
+        revset = f"last({revset}, {limit})"
+    if not reverse:
+        revset = f"reverse({revset})"
+    return revset
+
+
+# ============================================================
+# PICKAXE (-S / -G)
+# ============================================================
+
+def iter_commits(stream: BinaryIO) -> Iterator[Tuple[str, List[bytes]]]:
+    """Split scanned 'sl log -p' output into (node, diff lines) per commit."""
+    node = None
+    diff: List[bytes] = []
+    for line in stream:
+        if line.startswith(PICKAXE_MARKER):
+            if node is not None:
+                yield node, diff
+            node = line[1:].strip().decode("ascii")
+            diff = []
+        else:
+            diff.append(line)
+    if node is not None:
+        yield node, diff
+
+
+def diff_matches(diff: List[bytes], pattern: Pattern[bytes], count_changes: bool) -> bool:
     """
-    Handle 'git log' command.
+    Check whether one commit's diff matches a pickaxe search.
+
+    With count_changes (-S), a file matches when its removed and added
+    lines hold a different number of occurrences of the pattern, i.e.
+    the commit added or removed one. Otherwise (-G), a file matches when
+    any removed or added line matches. Only lines inside hunks count, so
+    '---'/'+++' file headers are never mistaken for changes.
+    """
+    added = removed = 0
+    in_hunk = False
+    for line in diff:
+        if line.startswith(b"diff "):
+            if added != removed:
+                return True
+            added = removed = 0
+            in_hunk = False
+        elif line.startswith(b"@@"):
+            in_hunk = True
+        elif in_hunk and line[:1] in (b"+", b"-"):
+            text = line[1:]
+            if not count_changes:
+                if pattern.search(text):
+                    return True
+            elif line[:1] == b"+":
+                added += len(pattern.findall(text))
+            else:
+                removed += len(pattern.findall(text))
+    return added != removed
+
+
+def pickaxe_search(args: List[str], pattern: Pattern[bytes], count_changes: bool,
+                   display_args: List[str], limit: Optional[int], reverse: bool) -> int:
+    """
+    Show the commits whose diffs match a pickaxe search.
+
+    'sl log -p' is streamed newest first and each commit's diff checked
+    as it arrives. Matches are shown with the user's display flags
+    through 'sl log -r', in batches, while the scan continues. The scan
+    stops as soon as limit commits matched. With reverse, the matches
+    are collected first and shown oldest first.
+
+    Args:
+        args: The scanning 'sl log -p' command
+        pattern: What to look for
+        count_changes: -S (occurrence count changed) rather than -G
+        display_args: sl log flags for showing matches (template, --stat, ...)
+        limit: Maximum number of commits to show, if any
+        reverse: --reverse was given
+
+    Returns:
+        Exit code of the scan, or of the first failing 'sl log -r'
+    """
+    if limit == 0:
+        # -n 0 shows nothing, so there is nothing to scan for
+        return 0
+    pending: List[str] = []
+    batch = 1
+    show_exit = 0
+
+    def show(nodes: List[str]) -> int:
+        return run_sl(["log", "-r", " + ".join(nodes)] + display_args)
+
+    def consume(stream: BinaryIO) -> bool:
+        nonlocal pending, batch, show_exit
+        found = 0
+        for node, diff in iter_commits(stream):
+            if not diff_matches(diff, pattern, count_changes):
+                continue
+            pending.append(node)
+            found += 1
+            if limit is not None and found >= limit:
+                return True
+            if not reverse and len(pending) >= batch:
+                show_exit = show(pending)
+                pending = []
+                batch = min(batch * 2, PICKAXE_MAX_BATCH)
+                if show_exit != 0:
+                    return True
+        return False
+
+    scan_exit = scan_sl(args, consume)
+    if show_exit != 0:
+        return show_exit
+    if scan_exit != 0:
+        return scan_exit
+
+    if reverse:
+        pending.reverse()
+    for start in range(0, len(pending), PICKAXE_MAX_BATCH):
+        show_exit = show(pending[start:start + PICKAXE_MAX_BATCH])
+        if show_exit != 0:
+            return show_exit
+    return 0
+
+
+def plan(parsed: ParsedCommand) -> SlPlan:
+    """
+    Translate 'git log' into an sl plan.
 
     Translations:
     - git log --oneline -> sl log -T '<template>'
@@ -99,9 +276,16 @@ def handle(parsed: ParsedCommand) -> int:
     - git log --since/--after -> sl log -d ">date"
     - git log --until/--before -> sl log -d "<date"
 
+    With --reverse, --first-parent, -S or -G, the commits are selected by
+    a single revset instead (see build_revset); -S and -G then search the
+    selected commits' diffs (see pickaxe_search). Positional arguments that name
+    existing paths, and everything after '--', become file() filters;
+    other positional arguments are revisions.
+
     All other arguments pass through unchanged.
     """
     sl_args = ["log"]
+    messages = []
     remaining_args = []
     use_oneline = False
     limit = None
@@ -113,6 +297,12 @@ def handle(parsed: ParsedCommand) -> int:
     custom_template = None
     use_reverse = False
     use_first_parent = False
+    pickaxe = None
+    pickaxe_regex = False
+    all_commits = False
+    no_merges = False
+    authors = []
+    keywords = []
 
     i = 0
     while i < len(parsed.args):
@@ -154,29 +344,27 @@ def handle(parsed: ParsedCommand) -> int:
 
         # LOG-04: --author=<pattern> -> -u <pattern>
         elif arg.startswith('--author='):
-            pattern = arg.split('=', 1)[1]
-            sl_args.extend(['-u', pattern])
+            authors.append(arg.split('=', 1)[1])
         elif arg == '--author':
             if i + 1 < len(parsed.args):
                 i += 1
-                sl_args.extend(['-u', parsed.args[i]])
+                authors.append(parsed.args[i])
 
         # LOG-05: --grep=<pattern> -> -k <pattern>
         elif arg.startswith('--grep='):
-            pattern = arg.split('=', 1)[1]
-            sl_args.extend(['-k', pattern])
+            keywords.append(arg.split('=', 1)[1])
         elif arg == '--grep':
             if i + 1 < len(parsed.args):
                 i += 1
-                sl_args.extend(['-k', parsed.args[i]])
+                keywords.append(parsed.args[i])
 
         # LOG-06: --no-merges passes through
         elif arg == '--no-merges':
-            sl_args.append('--no-merges')
+            no_merges = True
 
         # LOG-07: --all passes through
         elif arg == '--all':
-            sl_args.append('--all')
+            all_commits = True
 
         # LOG-08: --follow -> -f
         elif arg == '--follow':
@@ -218,10 +406,10 @@ def handle(parsed: ParsedCommand) -> int:
                 custom_template = PRETTY_PRESETS[format_spec]
             # Handle format:... custom format
             elif format_spec.startswith('format:'):
-                custom_template = translate_format_placeholders(format_spec[7:])
+                custom_template = compile_format(format_spec[7:])
             # Handle raw format string (no format: prefix)
             else:
-                custom_template = translate_format_placeholders(format_spec)
+                custom_template = compile_format(format_spec)
         elif arg in ('--pretty', '--format'):
             if i + 1 < len(parsed.args):
                 i += 1
@@ -229,11 +417,11 @@ def handle(parsed: ParsedCommand) -> int:
                 if format_spec in PRETTY_PRESETS:
                     custom_template = PRETTY_PRESETS[format_spec]
                 elif format_spec.startswith('format:'):
-                    custom_template = translate_format_placeholders(format_spec[7:])
+                    custom_template = compile_format(format_spec[7:])
                 else:
-                    custom_template = translate_format_placeholders(format_spec)
+                    custom_template = compile_format(format_spec)
 
-        # LOG-15: --first-parent -> use revset approximation
+        # LOG-15: --first-parent -> walk first parents only
         elif arg == '--first-parent':
             use_first_parent = True
 
@@ -241,21 +429,25 @@ def handle(parsed: ParsedCommand) -> int:
         elif arg == '--reverse':
             use_reverse = True
 
-        # LOG-17: -S<string> (pickaxe) -> warning, not supported
+        # LOG-17: -S<string> (pickaxe) -> commits changing the string's count
         elif arg.startswith('-S'):
-            search_term = arg[2:] if len(arg) > 2 else ''
+            search_term = arg[2:]
             if len(arg) == 2 and i + 1 < len(parsed.args):
                 i += 1
                 search_term = parsed.args[i]
-            print("Warning: -S pickaxe search not supported in Sapling.", file=sys.stderr)
-            print(f"Consider: sl log -p | grep '{search_term}'", file=sys.stderr)
+            pickaxe = (search_term, True)
 
-        # LOG-18: -G<regex> (regex pickaxe) -> warning, not supported
-        # Note: Must check after -G for graph since --graph is already handled
+        # LOG-18: -G<regex> (regex pickaxe) -> commits with matching changed lines
+        # Note: --graph is already handled above
         elif arg.startswith('-G') and len(arg) > 2:
-            search_pattern = arg[2:]
-            print("Warning: -G regex pickaxe search not supported in Sapling.", file=sys.stderr)
-            print(f"Consider: sl log -p | grep -E '{search_pattern}'", file=sys.stderr)
+            pickaxe = (arg[2:], False)
+
+        elif arg == '--pickaxe-regex':
+            pickaxe_regex = True
+
+        # Matching commits show every file anyway
+        elif arg == '--pickaxe-all':
+            pass
 
         # Everything else passes through
         else:
@@ -280,33 +472,91 @@ def handle(parsed: ParsedCommand) -> int:
     if template:
         sl_args.extend(["-T", template])
 
-    if limit is not None:
-        sl_args.extend(["-l", limit])
-
-    # Build date filter for sl -d
+    # Build date filter
+    date_spec = None
     if since_date and until_date:
-        sl_args.extend(['-d', f'{since_date} to {until_date}'])
+        date_spec = f'{since_date} to {until_date}'
     elif since_date:
-        sl_args.extend(['-d', f'>{since_date}'])
+        date_spec = f'>{since_date}'
     elif until_date:
-        sl_args.extend(['-d', f'<{until_date}'])
-
-    # Build revset for --reverse and --first-parent
-    # These use sl's revset language to approximate git behavior
-    if use_reverse or use_first_parent:
-        revset_parts = []
-        if use_first_parent:
-            # Approximate --first-parent by following only first parent in ancestry
-            # This is a simplification; exact git behavior is more complex
-            revset_parts.append("first(ancestors(.))")
-        if use_reverse:
-            # Wrap in reverse() to show oldest first
-            if revset_parts:
-                revset_parts = [f"reverse({revset_parts[0]})"]
-            else:
-                revset_parts.append("reverse(ancestors(.))")
-        sl_args.extend(['-r', revset_parts[0]])
+        date_spec = f'<{until_date}'
+
+    if not use_reverse and not use_first_parent and pickaxe is None:
+        # sl's own flags already walk history lazily, newest first
+        for author in authors:
+            sl_args.extend(['-u', author])
+        for keyword in keywords:
+            sl_args.extend(['-k', keyword])
+        if no_merges:
+            sl_args.append('--no-merges')
+        if all_commits:
+            sl_args.append('--all')
+        if limit is not None:
+            sl_args.extend(["-l", limit])
+        if date_spec:
+            sl_args.extend(['-d', date_spec])
+        sl_args.extend(remaining_args)
+        return SlPlan([sl_args], messages=messages)
+
+    # LOG-15/LOG-16: select the commits with one revset (limits pushed down)
+    revisions = []
+    paths = []
+    passthrough = []
+    for j, arg in enumerate(remaining_args):
+        if arg == '--':
+            paths.extend(remaining_args[j + 1:])
+            break
+        if arg.startswith('-'):
+            passthrough.append(arg)
+        elif os.path.lexists(arg):
+            paths.append(arg)
+        else:
+            revisions.append(arg)
+
+    filters = []
+    if date_spec:
+        filters.append(f"date({revset_string(date_spec)})")
+    if authors:
+        filters.append(any_of([f"user({revset_string(a)})" for a in authors]))
+    if keywords:
+        filters.append(any_of([f"keyword({revset_string(k)})" for k in keywords]))
+    if no_merges:
+        filters.append("not merge()")
+    if paths and '-f' not in sl_args:
+        filters.append(any_of([f"file({revset_string('relpath:' + path)})" for path in paths]))
+    elif paths:
+        # --follow needs the file names themselves
+        passthrough.extend(paths)
+
+    if pickaxe is not None:
+        # Scan every selected commit newest first; -n and --reverse apply
+        # to the matches
+        search_term, count_changes = pickaxe
+        source = search_term if pickaxe_regex or not count_changes else re.escape(search_term)
+        try:
+            pattern = re.compile(source.encode())
+        except re.error as e:
+            messages.append(f"fatal: invalid regex '{search_term}': {e}")
+            return SlPlan([], messages=messages, exit_code=128)
+        selection = build_revset(revisions, all_commits, filters, None,
+                                 False, use_first_parent)
+        scan = ["log", "-p", "-T", PICKAXE_TEMPLATE, "-r", selection] + passthrough
+        runner = functools.partial(
+            pickaxe_search, pattern=pattern, count_changes=count_changes,
+            display_args=sl_args[1:] + passthrough,
+            limit=int(limit) if limit is not None and limit.isdigit() else None,
+            reverse=use_reverse,
+        )
+        return SlPlan([scan], PLAN_CALL, runner, messages=messages)
+
+    revset = build_revset(revisions, all_commits, filters, limit,
+                          use_reverse, use_first_parent)
+    sl_args.extend(['-r', revset])
+    sl_args.extend(passthrough)
+
+    return SlPlan([sl_args], messages=messages)
 
-    sl_args.extend(remaining_args)
 
-    return run_sl(sl_args)
+def handle(parsed: ParsedCommand) -> int:
+    """Handle 'git log' command."""
+    return execute_plan(plan(parsed))
@@ -7,13 +7,12 @@ Supported flags:
 - MV-04: -n/--dry-run -> -n (pass through)
 """
 
-import sys
-from common import ParsedCommand, run_sl
+from common import ParsedCommand, SlPlan, execute_plan
 
 
-def handle(parsed: ParsedCommand) -> int:
+def plan(parsed: ParsedCommand) -> SlPlan:
     """
-    Handle 'git mv' command.
+    Translate 'git mv' into an sl plan.
 
     Translations:
     - git mv <src> <dst> -> sl rename <src> <dst>
@@ -25,6 +24,7 @@ def handle(parsed: ParsedCommand) -> int:
     - -k (skip errors not supported)
     """
     sl_args = []
+    messages = []
     remaining_args = []
 
     i = 0
@@ -45,11 +45,16 @@ def handle(parsed: ParsedCommand) -> int:
 
         # MV-02: -k -> warning (skip errors not supported)
         elif arg == '-k':
-            print("Warning: -k (skip errors) not supported by Sapling rename", file=sys.stderr)
+            messages.append("Warning: -k (skip errors) not supported by Sapling rename")
 
         else:
             remaining_args.append(arg)
 
         i += 1
 
-    return run_sl(["rename"] + sl_args + remaining_args)
+    return SlPlan([["rename"] + sl_args + remaining_args], messages=messages)
+
+
+def handle(parsed: ParsedCommand) -> int:
+    """Handle 'git mv' command."""
+    return execute_plan(plan(parsed))
@@ -1,13 +1,11 @@
 """Handler for 'git restore' command."""
 
-import subprocess
-import sys
-from common import ParsedCommand, run_sl
+from common import PLAN_CAPTURED, PLAN_RUN, ParsedCommand, SlPlan, execute_plan
 
 
-def handle(parsed: ParsedCommand) -> int:
+def plan(parsed: ParsedCommand) -> SlPlan:
     """
-    Handle 'git restore' command with full flag support.
+    Translate 'git restore' into an sl plan, with full flag support.
 
     Translations:
     - git restore <file>           -> sl revert <file>
@@ -60,10 +58,10 @@ def handle(parsed: ParsedCommand) -> int:
         i += 1
 
     # Warn about staged
+    messages = []
     if staged:
-        print("Warning: --staged/-S has no effect. "
-              "Sapling has no staging area.",
-              file=sys.stderr)
+        messages.append("Warning: --staged/-S has no effect. "
+                        "Sapling has no staging area.")
 
     # Build revert command
     revert_args = ['revert']
@@ -73,12 +71,10 @@ def handle(parsed: ParsedCommand) -> int:
 
     revert_args.extend(remaining)
 
-    if quiet:
-        # Capture and discard output
-        result = subprocess.run(
-            ['sl'] + revert_args,
-            capture_output=True
-        )
-        return result.returncode
+    # Quiet: capture and discard output
+    return SlPlan([revert_args], PLAN_CAPTURED if quiet else PLAN_RUN, messages=messages)
+
 
-    return run_sl(revert_args)
+def handle(parsed: ParsedCommand) -> int:
+    """Handle 'git restore' command."""
+    return execute_plan(plan(parsed))
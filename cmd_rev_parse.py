@@ -1,58 +1,41 @@
 """Handler for 'git rev-parse' command."""
 
 import os.path
-import subprocess
 import sys
-from common import ParsedCommand
+from common import ParsedCommand, find_repo_root, find_repo_dotdir, get_head_info, query_sl
+
+
+NOT_A_REPO = "fatal: not a git repository (or any of the parent directories): .git\n"
+
+
+def _not_a_repo() -> int:
+    """Report a missing repository the way git does."""
+    sys.stderr.write(NOT_A_REPO)
+    return 128  # Match git's exit code
 
 
 def _handle_show_toplevel() -> int:
     """REVP-01: --show-toplevel returns repository root path."""
-    result = subprocess.run(
-        ["sl", "root"],
-        capture_output=True,
-        text=True
-    )
-    if result.returncode == 0:
-        print(result.stdout.strip())
-    else:
-        sys.stderr.write(result.stderr)
-    return result.returncode
+    root = find_repo_root()
+    if root is None:
+        return _not_a_repo()
+    print(root)
+    return 0
 
 
 def _handle_git_dir() -> int:
     """REVP-02: --git-dir returns .sl or .hg directory path."""
-    result = subprocess.run(
-        ["sl", "root"],
-        capture_output=True,
-        text=True
-    )
-    if result.returncode == 0:
-        root = result.stdout.strip()
-        # Check for .sl first (newer Sapling), then .hg
-        sl_dir = os.path.join(root, ".sl")
-        hg_dir = os.path.join(root, ".hg")
-        if os.path.isdir(sl_dir):
-            print(sl_dir)
-        elif os.path.isdir(hg_dir):
-            print(hg_dir)
-        else:
-            # Fallback to .sl (expected location)
-            print(sl_dir)
-        return 0
-    else:
-        sys.stderr.write(result.stderr)
-    return result.returncode
+    root = find_repo_root()
+    if root is None:
+        return _not_a_repo()
+    # .sl first (newer Sapling), then .hg, then .git for git-backed repos
+    print(find_repo_dotdir(root))
+    return 0
 
 
 def _handle_is_inside_work_tree() -> int:
     """REVP-03: --is-inside-work-tree returns true/false."""
-    result = subprocess.run(
-        ["sl", "root"],
-        capture_output=True,
-        text=True
-    )
-    if result.returncode == 0:
+    if find_repo_root() is not None:
         print("true")
     else:
         print("false")
@@ -60,25 +43,48 @@ def _handle_is_inside_work_tree() -> int:
     return 0
 
 
+def _get_prefix(root: str) -> str:
+    """Path of the current directory relative to root, '' at the root."""
+    prefix = os.path.relpath(os.path.abspath(os.getcwd()), root)
+    if prefix == os.curdir:
+        return ""
+    return prefix.replace(os.sep, "/") + "/"
+
+
+def _handle_show_prefix() -> int:
+    """REVP-07: --show-prefix returns current directory relative to root."""
+    root = find_repo_root()
+    if root is None:
+        return _not_a_repo()
+    # git prints an empty line at the top of the repository
+    print(_get_prefix(root))
+    return 0
+
+
+def _handle_show_cdup() -> int:
+    """REVP-08: --show-cdup returns the path from current directory up to root."""
+    root = find_repo_root()
+    if root is None:
+        return _not_a_repo()
+    depth = _get_prefix(root).count("/")
+    print("../" * depth)
+    return 0
+
+
 def _handle_abbrev_ref(ref: str) -> int:
     """REVP-04: --abbrev-ref HEAD returns current bookmark name."""
     if ref.upper() == "HEAD":
-        result = subprocess.run(
-            ["sl", "log", "-r", ".", "-T", "{activebookmark}"],
-            capture_output=True,
-            text=True
-        )
-        if result.returncode == 0:
-            bookmark = result.stdout.strip()
-            if bookmark:
-                print(bookmark)
+        result, head = get_head_info()
+        if head is not None:
+            if head.bookmark:
+                print(head.bookmark)
             else:
                 # No active bookmark - equivalent to detached HEAD
                 print("HEAD")
             return 0
         else:
             sys.stderr.write(result.stderr)
-            return result.returncode
+            return result.returncode or 1
     else:
         # For other refs, just echo back the ref name
         print(ref)
@@ -87,13 +93,16 @@ def _handle_abbrev_ref(ref: str) -> int:
 
 def _handle_verify(ref: str) -> int:
     """REVP-05: --verify validates object reference exists."""
-    # Translate HEAD to . for Sapling
-    sl_ref = "." if ref.upper() == "HEAD" else ref
-    result = subprocess.run(
-        ["sl", "log", "-r", sl_ref, "-T", "{node}", "-l", "1"],
-        capture_output=True,
-        text=True
-    )
+    # HEAD is Sapling's '.', shared with the other HEAD queries
+    if ref.upper() == "HEAD":
+        _, head = get_head_info()
+        if head is not None and head.node:
+            print(head.node)
+            return 0
+        sys.stderr.write("fatal: Needed a single revision\n")
+        return 128
+
+    result = query_sl(["log", "-r", ref, "-T", "{node}", "-l", "1"])
     if result.returncode == 0:
         node = result.stdout.strip()
         if node:
@@ -120,6 +129,8 @@ def handle(parsed: ParsedCommand) -> int:
     - --show-toplevel: returns repository root path
     - --git-dir: returns .sl directory path
     - --is-inside-work-tree: returns true/false
+    - --show-prefix: returns current directory relative to repository root
+    - --show-cdup: returns path from current directory up to repository root
     - --abbrev-ref HEAD: returns current bookmark name
     - --verify <ref>: validates object reference
     - --symbolic <ref>: outputs in symbolic form
@@ -138,6 +149,14 @@ def handle(parsed: ParsedCommand) -> int:
     if "--is-inside-work-tree" in args:
         return _handle_is_inside_work_tree()
 
+    # REVP-07: --show-prefix
+    if "--show-prefix" in args:
+        return _handle_show_prefix()
+
+    # REVP-08: --show-cdup
+    if "--show-cdup" in args:
+        return _handle_show_cdup()
+
     # REVP-04: --abbrev-ref
     if "--abbrev-ref" in args:
         idx = args.index("--abbrev-ref")
@@ -161,19 +180,14 @@ def handle(parsed: ParsedCommand) -> int:
 
     # Existing: --short HEAD pattern (either order)
     if "--short" in args and "HEAD" in args:
-        result = subprocess.run(
-            ["sl", "whereami"],
-            capture_output=True,
-            text=True
-        )
-        if result.returncode == 0:
-            # sl whereami returns 40 chars, git rev-parse --short returns 7
-            short_hash = result.stdout.strip()[:7]
-            print(short_hash)
-        else:
-            sys.stderr.write(result.stderr)
-        return result.returncode
+        result, head = get_head_info()
+        if head is not None:
+            # git rev-parse --short returns 7 chars (Sapling's short is 12)
+            print(head.node[:7])
+            return 0
+        sys.stderr.write(result.stderr)
+        return result.returncode or 1
 
     # Unsupported rev-parse variants
-    sys.stderr.write("gitsl: rev-parse flag not supported. Supported: --show-toplevel, --git-dir, --is-inside-work-tree, --abbrev-ref HEAD, --verify, --symbolic, --short HEAD\n")
+    sys.stderr.write("gitsl: rev-parse flag not supported. Supported: --show-toplevel, --git-dir, --is-inside-work-tree, --show-prefix, --show-cdup, --abbrev-ref HEAD, --verify, --symbolic, --short HEAD\n")
     return 1
@@ -8,13 +8,12 @@ Supported flags:
 - RM-05: -r/--recursive -> filtered (sl remove is recursive by default)
 """
 
-import sys
-from common import ParsedCommand, run_sl
+from common import ParsedCommand, SlPlan, execute_plan
 
 
-def handle(parsed: ParsedCommand) -> int:
+def plan(parsed: ParsedCommand) -> SlPlan:
     """
-    Handle 'git rm' command.
+    Translate 'git rm' into an sl plan.
 
     Translations:
     - git rm <files>   -> sl remove <files>
@@ -27,6 +26,7 @@ def handle(parsed: ParsedCommand) -> int:
     - -n/--dry-run (not supported)
     """
     sl_args = []
+    messages = []
     remaining_args = []
 
     i = 0
@@ -47,17 +47,22 @@ def handle(parsed: ParsedCommand) -> int:
 
         # RM-02: --cached -> warning (no staging area)
         elif arg == '--cached':
-            print("Warning: --cached not supported. Sapling has no staging area. "
-                  "Use 'sl forget' to untrack files.", file=sys.stderr)
+            messages.append("Warning: --cached not supported. Sapling has no staging area. "
+                            "Use 'sl forget' to untrack files.")
 
         # RM-03: -n/--dry-run -> warning (not supported)
         elif arg in ('-n', '--dry-run'):
-            print("Warning: -n/--dry-run not supported by Sapling remove. "
-                  "Use 'sl status' to see tracked files.", file=sys.stderr)
+            messages.append("Warning: -n/--dry-run not supported by Sapling remove. "
+                            "Use 'sl status' to see tracked files.")
 
         else:
             remaining_args.append(arg)
 
         i += 1
 
-    return run_sl(["remove"] + sl_args + remaining_args)
+    return SlPlan([["remove"] + sl_args + remaining_args], messages=messages)
+
+
+def handle(parsed: ParsedCommand) -> int:
+    """Handle 'git rm' command."""
+    return execute_plan(plan(parsed))
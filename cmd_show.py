@@ -11,8 +11,8 @@ Supported flags:
 - SHOW-08: --oneline -> template (short format)
 """
 
-import sys
-from common import ParsedCommand, run_sl
+from common import PLAN_RUN, ParsedCommand, SlPlan, execute_plan
+from gitsl_format import compile_format
 
 
 # Template for --oneline format
@@ -42,35 +42,10 @@ PRETTY_PRESETS = {
     'full': "commit {node}\\nAuthor: {author}\\nCommit: {author}\\n\\n    {desc}\\n\\n",
 }
 
-# Git format placeholders to sl template keywords
-GIT_TO_SL_PLACEHOLDERS = {
-    '%H': '{node}',
-    '%h': '{node|short}',
-    '%s': '{desc|firstline}',
-    '%b': '{desc}',
-    '%an': '{author|person}',
-    '%ae': '{author|email}',
-    '%ad': '{date|isodate}',
-    '%ar': '{date|age}',
-    '%d': '{bookmarks}',
-    '%n': '\\n',
-}
-
-
-def translate_format_placeholders(git_format: str) -> str:
-    """Translate git format placeholders to sl template keywords."""
-    result = git_format
-    for git_placeholder, sl_keyword in GIT_TO_SL_PLACEHOLDERS.items():
-        result = result.replace(git_placeholder, sl_keyword)
-    # Ensure newline at end
-    if not result.endswith('\\n'):
-        result += '\\n'
-    return result
-
 
-def handle(parsed: ParsedCommand) -> int:
+def plan(parsed: ParsedCommand) -> SlPlan:
     """
-    Handle 'git show' command.
+    Translate 'git show' into an sl plan.
 
     Translations:
     - git show          -> sl show (current commit)
@@ -134,10 +109,10 @@ def handle(parsed: ParsedCommand) -> int:
                 custom_template = PRETTY_PRESETS[format_spec]
             # Handle format:... custom format
             elif format_spec.startswith('format:'):
-                custom_template = translate_format_placeholders(format_spec[7:])
+                custom_template = compile_format(format_spec[7:])
             # Handle raw format string (no format: prefix)
             else:
-                custom_template = translate_format_placeholders(format_spec)
+                custom_template = compile_format(format_spec)
         elif arg in ('--pretty', '--format'):
             if i + 1 < len(parsed.args):
                 i += 1
@@ -145,9 +120,9 @@ def handle(parsed: ParsedCommand) -> int:
                 if format_spec in PRETTY_PRESETS:
                     custom_template = PRETTY_PRESETS[format_spec]
                 elif format_spec.startswith('format:'):
-                    custom_template = translate_format_placeholders(format_spec[7:])
+                    custom_template = compile_format(format_spec[7:])
                 else:
-                    custom_template = translate_format_placeholders(format_spec)
+                    custom_template = compile_format(format_spec)
 
         # SHOW-07: -s/--no-patch (suppress diff output)
         elif arg in ('-s', '--no-patch'):
@@ -181,4 +156,9 @@ def handle(parsed: ParsedCommand) -> int:
         sl_args.extend(["-T", template])
 
     sl_args.extend(remaining_args)
-    return run_sl(sl_args)
+    return SlPlan([sl_args], PLAN_RUN)
+
+
+def handle(parsed: ParsedCommand) -> int:
+    """Handle 'git show' command."""
+    return execute_plan(plan(parsed))
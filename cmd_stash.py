@@ -1,19 +1,16 @@
 """Handler for 'git stash' command."""
 
 import re
-import subprocess
 import sys
 from typing import Optional
-from common import ParsedCommand, run_sl
+from common import (
+    PLAN_CAPTURED, PLAN_RUN, ParsedCommand, SlPlan, execute_plan, query_sl_cached, run_sl,
+)
 
 
 def _get_most_recent_shelve() -> Optional[str]:
     """Get the name of the most recent shelve, or None if no shelves exist."""
-    result = subprocess.run(
-        ["sl", "shelve", "--list"],
-        capture_output=True,
-        text=True
-    )
+    result = query_sl_cached(["shelve", "--list"])
     if result.returncode != 0 or not result.stdout.strip():
         return None
 
@@ -26,10 +23,7 @@ def _get_most_recent_shelve() -> Optional[str]:
 
 def _get_all_shelve_names() -> list:
     """Get list of shelve names in order (most recent first)."""
-    result = subprocess.run(
-        ["sl", "shelve", "--list"],
-        capture_output=True, text=True
-    )
+    result = query_sl_cached(["shelve", "--list"])
     if result.returncode != 0 or not result.stdout.strip():
         return []
 
@@ -56,8 +50,8 @@ def _translate_stash_ref(ref: str) -> Optional[str]:
     return None
 
 
-def _handle_push(args: list) -> int:
-    """Handle git stash push with flags."""
+def _plan_push(args: list) -> SlPlan:
+    """Plan git stash push with flags."""
     sl_args = ['shelve']
     remaining = []
     quiet = False
@@ -105,26 +99,19 @@ def _handle_push(args: list) -> int:
         i += 1
 
     # Warnings
+    messages = []
     if keep_index:
-        print("Warning: -k/--keep-index has no effect. "
-              "Sapling has no staging area; all changes are shelved.",
-              file=sys.stderr)
+        messages.append("Warning: -k/--keep-index has no effect. "
+                        "Sapling has no staging area; all changes are shelved.")
 
     if all_files:
-        print("Note: -a/--all includes untracked files. "
-              "Ignored files may not be included.",
-              file=sys.stderr)
+        messages.append("Note: -a/--all includes untracked files. "
+                        "Ignored files may not be included.")
 
     sl_args.extend(remaining)
 
-    if quiet:
-        result = subprocess.run(
-            ['sl'] + sl_args,
-            capture_output=True
-        )
-        return result.returncode
-
-    return run_sl(sl_args)
+    # Quiet: capture and discard output
+    return SlPlan([sl_args], PLAN_CAPTURED if quiet else PLAN_RUN, messages=messages)
 
 
 def _handle_pop(args: list) -> int:
@@ -157,15 +144,35 @@ def _handle_apply(args: list) -> int:
     return run_sl(["unshelve", "--keep"] + translated_args)
 
 
-def _handle_list(args: list) -> int:
-    """Handle git stash list -> sl shelve --list."""
-    return run_sl(["shelve", "--list"] + args)
+def _plan_list(args: list) -> SlPlan:
+    """Plan git stash list -> sl shelve --list."""
+    return SlPlan([["shelve", "--list"] + args], PLAN_RUN)
+
+
+def _plan_show_shelve(args: list, shelve_name: str) -> SlPlan:
+    """Plan git stash show [--stat] [-p] for a known shelve name."""
+    if '-p' in args or '--patch' in args:
+        return SlPlan([['shelve', '-p', shelve_name]], PLAN_RUN)
+    # --stat, and git's default
+    return SlPlan([['shelve', '--stat', shelve_name]], PLAN_RUN)
+
+
+def _plan_show(args: list) -> Optional[SlPlan]:
+    """
+    Plan git stash show for a shelve named outright.
+
+    Returns:
+        The plan, or None if stash@{n} or the most recent shelve has to
+        be looked up first (see _handle_show)
+    """
+    names = [arg for arg in args if not arg.startswith('-')]
+    if not names or names[-1].startswith('stash@{'):
+        return None
+    return _plan_show_shelve(args, names[-1])
 
 
 def _handle_show(args: list) -> int:
     """Handle git stash show [--stat] [-p] [stash@{n}]."""
-    show_stat = '--stat' in args
-    show_patch = '-p' in args or '--patch' in args
     stash_ref = None
 
     for arg in args:
@@ -181,13 +188,7 @@ def _handle_show(args: list) -> int:
         print("No stash entries found.", file=sys.stderr)
         return 1
 
-    if show_patch:
-        return run_sl(['shelve', '-p', stash_ref])
-    elif show_stat:
-        return run_sl(['shelve', '--stat', stash_ref])
-    else:
-        # Default: show stat (git's default)
-        return run_sl(['shelve', '--stat', stash_ref])
+    return execute_plan(_plan_show_shelve(args, stash_ref))
 
 
 def _handle_branch(args: list) -> int:
@@ -249,32 +250,71 @@ def _handle_drop(args: list) -> int:
     return run_sl(["shelve", "--delete", shelve_name])
 
 
-def handle(parsed: ParsedCommand) -> int:
+def plan(parsed: ParsedCommand) -> Optional[SlPlan]:
     """
-    Handle 'git stash' command.
+    Translate the 'git stash' subcommands that need no sl query into a plan.
 
     Translations:
     - git stash           -> sl shelve
     - git stash push      -> sl shelve
     - git stash -m "msg"  -> sl shelve -m "msg"
-    - git stash pop       -> sl unshelve
-    - git stash apply     -> sl unshelve --keep
     - git stash list      -> sl shelve --list
-    - git stash drop      -> sl shelve --delete <most-recent>
-    - git stash show      -> sl shelve --stat <most-recent>
-    - git stash branch    -> sl bookmark + sl unshelve
+    - git stash show NAME -> sl shelve --stat NAME
+
+    Returns:
+        The plan, or None for subcommands that must look up shelves first
+        (pop, apply, drop, branch, and show of stash@{n} or the latest)
     """
     args = list(parsed.args)
 
     # No subcommand = stash (same as push)
     if not args:
-        return run_sl(["shelve"])
+        return SlPlan([["shelve"]], PLAN_RUN)
 
     subcommand = args[0]
     subargs = args[1:]
 
     if subcommand == "push":
-        return _handle_push(subargs)
+        return _plan_push(subargs)
+
+    if subcommand == "list":
+        return _plan_list(subargs)
+
+    if subcommand == "show":
+        return _plan_show(subargs)
+
+    if subcommand in ("pop", "apply", "drop", "branch"):
+        return None
+
+    # Check if first arg is a flag (e.g., -m) - treat as push
+    if subcommand.startswith("-"):
+        return _plan_push(args)
+
+    # Unknown subcommand - pass through to shelve
+    return SlPlan([["shelve"] + args], PLAN_RUN)
+
+
+def handle(parsed: ParsedCommand) -> int:
+    """
+    Handle 'git stash' command.
+
+    Translations:
+    - git stash           -> sl shelve
+    - git stash push      -> sl shelve
+    - git stash -m "msg"  -> sl shelve -m "msg"
+    - git stash pop       -> sl unshelve
+    - git stash apply     -> sl unshelve --keep
+    - git stash list      -> sl shelve --list
+    - git stash drop      -> sl shelve --delete <most-recent>
+    - git stash show      -> sl shelve --stat <most-recent>
+    - git stash branch    -> sl bookmark + sl unshelve
+    """
+    stash_plan = plan(parsed)
+    if stash_plan is not None:
+        return execute_plan(stash_plan)
+
+    subcommand = parsed.args[0]
+    subargs = parsed.args[1:]
 
     if subcommand == "pop":
         return _handle_pop(subargs)
@@ -282,21 +322,10 @@ def handle(parsed: ParsedCommand) -> int:
     if subcommand == "apply":
         return _handle_apply(subargs)
 
-    if subcommand == "list":
-        return _handle_list(subargs)
-
     if subcommand == "drop":
         return _handle_drop(subargs)
 
     if subcommand == "show":
         return _handle_show(subargs)
 
-    if subcommand == "branch":
-        return _handle_branch(subargs)
-
-    # Check if first arg is a flag (e.g., -m) - treat as push
-    if subcommand.startswith("-"):
-        return _handle_push(args)
-
-    # Unknown subcommand - pass through to shelve
-    return run_sl(["shelve"] + args)
+    return _handle_branch(subargs)
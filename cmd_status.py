@@ -6,11 +6,16 @@ Supported flags:
 - STAT-03: -v/--verbose -> warning (different meaning in Sapling)
 - STAT-04: --porcelain/--short/-s -> transform output (existing)
 - STAT-05: -u/--untracked-files[=<mode>] -> filter untracked files
+- STAT-06: -z -> NUL-terminated porcelain, bytes end to end (sl status --print0)
+- STAT-07: --porcelain=v2 -> v2 records (root-relative paths), with -b the # branch.* headers
 """
 
-import subprocess
-import sys
-from common import ParsedCommand, run_sl
+import os
+import stat
+from common import (
+    PLAN_RECORDS, PLAN_RUN, PLAN_STREAM, ParsedCommand, SlPlan, execute_plan,
+    find_repo_root, get_head_info, query_sl_cached,
+)
 
 # Status code translation: sl -> git porcelain XY format
 # Key insight: sl has no staging area, so:
@@ -51,62 +56,200 @@ def parse_sl_status_line(line: str) -> tuple:
     return status_code, filename
 
 
-def transform_to_porcelain(sl_output: str) -> str:
+def translate_status_line(line: str):
     """
-    Transform sl status output to git porcelain v1 format.
+    Translate one sl status line to git porcelain v1 format.
 
     sl format:  "X filename" (1 char + space + filename)
     git format: "XY filename" (2 chars + space + filename)
 
     Args:
-        sl_output: Complete output from 'sl status' command
+        line: Single line from sl status output, without newline
 
     Returns:
-        Git-compatible porcelain format output
+        Git-compatible porcelain line, or None if the line is not a status line
     """
-    lines = []
+    status_code, filename = parse_sl_status_line(line)
 
-    for line in sl_output.splitlines():
-        status_code, filename = parse_sl_status_line(line)
+    if status_code is None:
+        return None
 
-        if status_code is None:
-            continue
+    # Map sl status to git XY code
+    git_code = SL_TO_GIT_STATUS.get(status_code, '??')
 
-        # Map sl status to git XY code
-        git_code = SL_TO_GIT_STATUS.get(status_code, '??')
+    # Format: XY<space>filename
+    return f"{git_code} {filename}"
 
-        # Format: XY<space>filename
-        lines.append(f"{git_code} {filename}")
 
-    # Return with trailing newline if there's content
-    if lines:
-        return '\n'.join(lines) + '\n'
-    return ''
+# Bytes version of SL_TO_GIT_STATUS, indexed by the status byte, for -z
+SL_TO_GIT_STATUS_BYTES = {
+    ord(sl_code): git_code.encode('ascii')
+    for sl_code, git_code in SL_TO_GIT_STATUS.items()
+}
+
+
+def translate_status_record(record: bytes):
+    """
+    Translate one NUL-separated sl status record to git porcelain v1.
+
+    Same mapping as translate_status_line, but on raw bytes so file names
+    are passed through without decoding.
+
+    Args:
+        record: Single record from 'sl status --print0', without the NUL
+
+    Returns:
+        Git-compatible porcelain record, or None if the record is invalid
+    """
+    if len(record) < 3 or record[1:2] != b' ':
+        return None
+    git_code = SL_TO_GIT_STATUS_BYTES.get(record[0], b'??')
+    return git_code + record[1:]
 
 
 def get_branch_header() -> str:
     """Get git-style branch header for status output."""
-    result = subprocess.run(
-        ['sl', 'log', '-r', '.', '--template', '{activebookmark}'],
-        capture_output=True,
-        text=True
-    )
-    branch = result.stdout.strip() or '(detached)'
+    _, head = get_head_info()
+    branch = (head.bookmark if head else '') or '(detached)'
     return f"## {branch}\n"
 
 
-def handle(parsed: ParsedCommand) -> int:
+def get_branch_header_record() -> bytes:
+    """Get the branch header as a NUL-terminated record for -z output."""
+    return get_branch_header()[:-1].encode('utf-8', 'surrogateescape') + b'\0'
+
+
+# ============================================================
+# PORCELAIN V2
+# ============================================================
+
+# Upstream of the active bookmark: Sapling's remote bookmark of that name
+UPSTREAM = "'remote/{activebookmark}'"
+HAS_UPSTREAM = f"revset('present(%s)', {UPSTREAM})"
+
+# Everything the v2 branch headers need, from a single query of '.':
+# node, active bookmark, upstream name, ahead and behind counts. The
+# upstream lines stay empty when there is no bookmark or no such remote.
+BRANCH_V2_TEMPLATE = (
+    "{node}\n"
+    "{activebookmark}\n"
+    f"{{if(activebookmark, if({HAS_UPSTREAM}, {UPSTREAM}))}}\n"
+    f"{{if(activebookmark, if({HAS_UPSTREAM}, "
+    f"revset('only(., %s)', {UPSTREAM})|count))}}\n"
+    f"{{if(activebookmark, if({HAS_UPSTREAM}, "
+    f"revset('only(%s, .)', {UPSTREAM})|count))}}\n"
+)
+
+NULL_NODE = '0' * 40
+NULL_MODE = b'000000'
+
+# sl status code -> (XY, mode in HEAD, mode in index, mode in worktree).
+# None means "read the worktree mode from disk". Git's index is Sapling's
+# pending state: added files exist in it, removed files do not.
+SL_TO_V2_ENTRY = {
+    ord('M'): (b'.M', None, None, None),
+    ord('A'): (b'A.', NULL_MODE, None, None),
+    ord('R'): (b'D.', None, NULL_MODE, NULL_MODE),
+    ord('!'): (b'.D', None, None, NULL_MODE),
+}
+
+# sl status code -> v2 record type for files git does not track
+SL_TO_V2_UNTRACKED = {
+    ord('?'): b'?',
+    ord('I'): b'!',
+}
+
+# Sapling file nodes are not git object ids: report the null id
+V2_OBJECT_IDS = (NULL_NODE + ' ' + NULL_NODE).encode('ascii')
+
+
+def get_v2_branch_headers(separator: bytes) -> bytes:
+    """
+    Build the '# branch.*' header lines of porcelain v2.
+
+    Args:
+        separator: Line terminator (newline, or NUL for -z)
+
+    Returns:
+        Header records, empty if the repository could not be queried
     """
-    Handle 'git status' command.
+    result = query_sl_cached(['log', '-r', '.', '--template', BRANCH_V2_TEMPLATE])
+    if result.returncode != 0:
+        return b''
+    node, bookmark, upstream, ahead, behind = (result.stdout.split('\n') + [''] * 5)[:5]
+
+    lines = [
+        f"# branch.oid {node if node.strip('0') else '(initial)'}",
+        f"# branch.head {bookmark or '(detached)'}",
+    ]
+    if upstream:
+        lines.append(f"# branch.upstream {upstream}")
+        lines.append(f"# branch.ab +{ahead or 0} -{behind or 0}")
+    return b''.join(
+        line.encode('utf-8', 'surrogateescape') + separator for line in lines
+    )
+
+
+def _worktree_mode(path: bytes) -> bytes:
+    """Git file mode of a working copy file, given relative to the root (regular file if unreadable)."""
+    root = find_repo_root()
+    try:
+        st = os.lstat(os.path.join(os.fsencode(root), path) if root else path)
+    except OSError:
+        return b'100644'
+    if stat.S_ISLNK(st.st_mode):
+        return b'120000'
+    if st.st_mode & stat.S_IXUSR:
+        return b'100755'
+    return b'100644'
+
+
+def translate_status_record_v2(record: bytes):
+    """
+    Translate one sl status record to a git porcelain v2 record.
+
+    Tracked changes become '1' (ordinary changed entry) records, unknown
+    files '?' and ignored files '!' records.
+
+    Args:
+        record: Single sl status record ("X path"), without terminator
+
+    Returns:
+        Porcelain v2 record, or None if the record is invalid
+    """
+    if len(record) < 3 or record[1:2] != b' ':
+        return None
+    code = record[0]
+    path = record[2:]
+
+    untracked = SL_TO_V2_UNTRACKED.get(code)
+    if untracked is not None:
+        return untracked + b' ' + path
+
+    entry = SL_TO_V2_ENTRY.get(code)
+    if entry is None:
+        return None
+    xy, head_mode, index_mode, worktree_mode = entry
+    disk_mode = _worktree_mode(path) if None in entry else None
+    modes = b' '.join(mode or disk_mode for mode in (head_mode, index_mode, worktree_mode))
+    return b'1 ' + xy + b' N... ' + modes + b' ' + V2_OBJECT_IDS + b' ' + path
+
+
+def plan(parsed: ParsedCommand) -> SlPlan:
+    """
+    Translate 'git status' into an sl plan.
 
     Special handling for --porcelain and --short flags to transform
     sl status output into git-compatible format.
     """
     sl_args = []
+    messages = []
     needs_transform = False
     show_ignored = False
     show_branch = False
     verbose = False
+    nul_terminated = False
+    porcelain_v2 = False
     untracked_mode = 'normal'  # Default
 
     i = 0
@@ -117,6 +260,16 @@ def handle(parsed: ParsedCommand) -> int:
         if arg in ('--porcelain', '--short', '-s'):
             needs_transform = True
 
+        # STAT-07: --porcelain=<version>
+        elif arg.startswith('--porcelain='):
+            needs_transform = True
+            porcelain_v2 = arg.split('=', 1)[1] == 'v2'
+
+        # STAT-06: -z implies porcelain unless another format is given
+        elif arg == '-z':
+            nul_terminated = True
+            needs_transform = True
+
         # STAT-01: --ignored -> sl status -i
         elif arg == '--ignored':
             show_ignored = True
@@ -162,33 +315,37 @@ def handle(parsed: ParsedCommand) -> int:
 
     # Handle verbose flag (different meaning between git and sl)
     if verbose:
-        print("Note: Sapling -v shows repo state info, not staged diffs. "
-              "Use 'sl diff' to see all uncommitted changes.",
-              file=sys.stderr)
+        messages.append("Note: Sapling -v shows repo state info, not staged diffs. "
+                        "Use 'sl diff' to see all uncommitted changes.")
+
+    if porcelain_v2:
+        # One query for all branch headers, overlapping the status listing.
+        # Paths are root-relative, as in git's v2 records.
+        separator = b'\0' if nul_terminated else b'\n'
+        status_args = ['status', '--root-relative']
+        if nul_terminated:
+            status_args.append('--print0')
+        header = (lambda: get_v2_branch_headers(separator)) if show_branch else None
+        return SlPlan([status_args + sl_args], PLAN_RECORDS, translate_status_record_v2,
+                      header, separator, messages)
+
+    if nul_terminated:
+        header = get_branch_header_record if show_branch else None
+        return SlPlan([['status', '--print0'] + sl_args], PLAN_RECORDS,
+                      translate_status_record, header, messages=messages)
 
     if needs_transform:
-        result = subprocess.run(
-            ['sl', 'status'] + sl_args,
-            capture_output=True,
-            text=True
-        )
-
-        if result.returncode == 0:
-            output = ''
-            # Add branch header if requested
-            if show_branch:
-                output += get_branch_header()
-            output += transform_to_porcelain(result.stdout)
-            sys.stdout.write(output)
-        else:
-            sys.stderr.write(result.stderr)
+        # Stream: translate each line as sl produces it. The branch header
+        # is looked up while sl status is already running.
+        header = get_branch_header if show_branch else None
+        return SlPlan([['status'] + sl_args], PLAN_STREAM, translate_status_line,
+                      header, messages=messages)
 
-        return result.returncode
+    # Non-porcelain mode: with -b, branch info is written before sl's output
+    header = get_branch_header if show_branch else None
+    return SlPlan([['status'] + sl_args], PLAN_RUN, header=header, messages=messages)
 
-    # Non-porcelain mode
-    if show_branch:
-        # For normal status output with -b, prepend branch info
-        branch_header = get_branch_header()
-        sys.stdout.write(branch_header)
 
-    return run_sl(['status'] + sl_args)
+def handle(parsed: ParsedCommand) -> int:
+    """Handle 'git status' command."""
+    return execute_plan(plan(parsed))
@@ -1,12 +1,11 @@
 """Handler for 'git switch' command."""
 
-import subprocess
-from common import ParsedCommand, run_sl
+from common import PLAN_RUN, ParsedCommand, SlPlan, execute_plan
 
 
-def handle(parsed: ParsedCommand) -> int:
+def plan(parsed: ParsedCommand) -> SlPlan:
     """
-    Handle 'git switch' command with full flag support.
+    Translate 'git switch' into an sl plan, with full flag support.
 
     Translations:
     - git switch <branch>              -> sl goto <bookmark>
@@ -72,19 +71,13 @@ def handle(parsed: ParsedCommand) -> int:
         remaining.append(arg)
         i += 1
 
-    # Handle create modes
+    # Handle create modes: goto runs only if the bookmark was created
     if create and branch_name:
-        result = run_sl(['bookmark', branch_name])
-        if result != 0:
-            return result
-        return run_sl(['goto', branch_name])
+        return SlPlan([['bookmark', branch_name], ['goto', branch_name]], PLAN_RUN)
 
     if force_create and branch_name:
         # Use -f to force update if bookmark exists
-        result = run_sl(['bookmark', '-f', branch_name])
-        if result != 0:
-            return result
-        return run_sl(['goto', branch_name])
+        return SlPlan([['bookmark', '-f', branch_name], ['goto', branch_name]], PLAN_RUN)
 
     # Build goto command for regular switch
     goto_args = ['goto']
@@ -97,4 +90,9 @@ def handle(parsed: ParsedCommand) -> int:
         goto_args.append('--inactive')
 
     goto_args.extend(remaining)
-    return run_sl(goto_args)
+    return SlPlan([goto_args], PLAN_RUN)
+
+
+def handle(parsed: ParsedCommand) -> int:
+    """Handle 'git switch' command."""
+    return execute_plan(plan(parsed))
@@ -6,23 +6,17 @@ the gitsl codebase, including argument parsing, debug utilities,
 and subprocess execution.
 """
 
+import atexit
+import contextlib
 import os
 import shlex
+import struct
 import subprocess
 import sys
-from dataclasses import dataclass
-from importlib.metadata import version, PackageNotFoundError
-from typing import List, Optional
-
-
-# ============================================================
-# CONSTANTS
-# ============================================================
-
-try:
-    VERSION = version("gitsl")
-except PackageNotFoundError:
-    VERSION = "0.0.0"  # Fallback for uninstalled development
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Tuple
 
 
 # ============================================================
@@ -37,6 +31,41 @@ class ParsedCommand:
     raw_argv: List[str]       # original argv for debugging
 
 
+@dataclass
+class HeadInfo:
+    """State of the working copy parent ('.', git's HEAD)."""
+    bookmark: str             # active bookmark, "" when detached
+    node: str                 # full 40-char hash
+    short_node: str           # Sapling's 12-char short hash
+    phase: str                # "public", "draft" or "secret"
+
+
+# How execute_plan handles the output of a plan's last command
+PLAN_EXEC = "exec"        # replace gitsl with sl (exec_sl)
+PLAN_RUN = "run"          # run sl as a child with inherited stdio (run_sl)
+PLAN_STREAM = "stream"    # translate text lines as they arrive (stream_sl)
+PLAN_RECORDS = "records"  # translate byte records as they arrive (stream_sl_records)
+PLAN_CALL = "call"        # hand the argv to the plan's transform, which runs it
+PLAN_CAPTURED = "captured"  # run sl with its output captured and dropped (run_sl_captured)
+
+
+@dataclass
+class SlPlan:
+    """
+    What a handler will run, worked out without running anything.
+
+    Commands run in order and stop at the first failure; mode decides
+    what happens to the last command's output (see execute_plan).
+    """
+    commands: List[List[str]]                # sl argv lists, without "sl"
+    mode: str = PLAN_EXEC
+    transform: Optional[Callable] = None     # per-line/record translation, or runner (PLAN_CALL)
+    header: Optional[Callable] = None        # output written before sl's, made lazily
+    separator: bytes = b"\0"                 # record terminator (PLAN_RECORDS)
+    messages: List[str] = field(default_factory=list)  # warnings written to stderr first
+    exit_code: Optional[int] = None          # set: stop with this code, run nothing
+
+
 # ============================================================
 # PARSING
 # ============================================================
@@ -59,6 +88,25 @@ def parse_argv(argv: List[str]) -> ParsedCommand:
     return ParsedCommand(command=command, args=args, raw_argv=argv)
 
 
+# ============================================================
+# VERSION
+# ============================================================
+
+def get_version() -> str:
+    """
+    Get the installed gitsl version.
+
+    importlib.metadata scans site-packages, so it is imported here rather
+    than at module level: only --version pays for it.
+    """
+    from importlib.metadata import version, PackageNotFoundError
+
+    try:
+        return version("gitsl")
+    except PackageNotFoundError:
+        return "0.0.0"  # Fallback for uninstalled development
+
+
 # ============================================================
 # DEBUG MODE
 # ============================================================
@@ -69,17 +117,268 @@ def is_debug_mode() -> bool:
     return debug_val in ("1", "true", "yes", "on")
 
 
-def print_debug_info(parsed: ParsedCommand) -> None:
-    """Print debug information about the parsed command."""
+def is_daemon_mode() -> bool:
+    """Check if daemon mode is enabled via GITSL_DAEMON environment variable."""
+    daemon_val = os.environ.get("GITSL_DAEMON", "").lower()
+    return daemon_val in ("1", "true", "yes", "on")
+
+
+def is_cmdserver_forced() -> bool:
+    """Check if GITSL_CMDSERVER forces the Sapling command server on."""
+    cmdserver_val = os.environ.get("GITSL_CMDSERVER", "").lower()
+    return cmdserver_val in ("1", "true", "yes", "on")
+
+
+def is_cmdserver_disabled() -> bool:
+    """Check if GITSL_CMDSERVER disables the Sapling command server."""
+    cmdserver_val = os.environ.get("GITSL_CMDSERVER", "").lower()
+    return cmdserver_val in ("0", "false", "no", "off")
+
+
+def is_state_cache_disabled() -> bool:
+    """Check if GITSL_CACHE disables the on-disk repository state cache."""
+    cache_val = os.environ.get("GITSL_CACHE", "").lower()
+    return cache_val in ("0", "false", "no", "off")
+
+
+def is_exec_disabled() -> bool:
+    """Check if GITSL_EXEC disables replacing gitsl with sl (see exec_sl)."""
+    exec_val = os.environ.get("GITSL_EXEC", "").lower()
+    return exec_val in ("0", "false", "no", "off")
+
+
+def is_native_grep() -> bool:
+    """Check if GITSL_GREP_ENGINE selects gitsl's own working-copy grep."""
+    engine_val = os.environ.get("GITSL_GREP_ENGINE", "").lower()
+    return engine_val == "native"
+
+
+def print_debug_info(parsed: ParsedCommand, plan: Optional[SlPlan] = None) -> None:
+    """
+    Print debug information about the parsed command.
+
+    Args:
+        parsed: The parsed command
+        plan: The handler's translation plan, if it has one. Without a
+            plan the command is shown as a naive 'sl <command> <args>'.
+    """
     print(f"[DEBUG] Command: {parsed.command}", file=sys.stderr)
     print(f"[DEBUG] Args: {parsed.args}", file=sys.stderr)
 
+    if plan is not None:
+        for message in plan.messages:
+            print(f"[DEBUG] Message: {message}", file=sys.stderr)
+        if plan.exit_code is not None:
+            print(f"[DEBUG] Would exit {plan.exit_code} without running sl", file=sys.stderr)
+            return
+        for args in plan.commands:
+            print(f"[DEBUG] Would execute: {shlex.join(['sl'] + args)}", file=sys.stderr)
+        if plan.transform is not None:
+            # Runners are often functools.partial objects; show the function
+            function = getattr(plan.transform, "func", plan.transform)
+            name = getattr(function, "__name__", "transform")
+            print(f"[DEBUG] Output: {plan.mode} through {name}", file=sys.stderr)
+        elif plan.mode == PLAN_CAPTURED:
+            print("[DEBUG] Output: captured and discarded", file=sys.stderr)
+        return
+
     # Show what would be executed
     if parsed.command:
         would_execute = ["sl", parsed.command] + parsed.args
         print(f"[DEBUG] Would execute: {shlex.join(would_execute)}", file=sys.stderr)
 
 
+# ============================================================
+# TRACING
+# ============================================================
+
+# Events recorded by this process, written out by flush_trace()
+_trace_events: List[dict] = []
+_trace_lock = threading.Lock()
+
+
+def get_trace_path() -> Optional[str]:
+    """Get the trace file named by GITSL_TRACE, or None if tracing is off."""
+    return os.environ.get("GITSL_TRACE") or None
+
+
+def trace_span(name: str, cat: str, **args):
+    """
+    Time a block as one trace event when GITSL_TRACE is set.
+
+    Usage:
+        with trace_span("sl status", "spawn", argv=argv) as info:
+            ...
+            info["exit"] = returncode
+
+    Args:
+        name: Event name shown in the trace viewer
+        cat: Category ("phase", "spawn", "cmdserver", "transform", ...)
+        args: Initial event arguments
+
+    Returns:
+        Context manager yielding the (mutable) argument dict
+    """
+    if get_trace_path() is None:
+        return contextlib.nullcontext(args)
+    return _trace_span(name, cat, args)
+
+
+@contextlib.contextmanager
+def _trace_span(name: str, cat: str, args: dict):
+    ts = time.time_ns() // 1000
+    start = time.perf_counter_ns()
+    try:
+        yield args
+    finally:
+        trace_event(name, cat, ts, (time.perf_counter_ns() - start) // 1000, args)
+
+
+def trace_event(name: str, cat: str, ts: int, dur: Optional[int], args: dict) -> None:
+    """
+    Record one event in Chrome trace format (no-op unless tracing).
+
+    Args:
+        name: Event name
+        cat: Category
+        ts: Start, in microseconds since the epoch (comparable across processes)
+        dur: Duration in microseconds, or None for an instant event
+        args: Event arguments
+    """
+    if get_trace_path() is None:
+        return
+    event = {
+        "name": name, "cat": cat, "ph": "X" if dur is not None else "i",
+        "ts": ts, "pid": os.getpid(), "tid": threading.get_ident(), "args": args,
+    }
+    if dur is not None:
+        event["dur"] = dur
+    else:
+        event["s"] = "t"
+    with _trace_lock:
+        _trace_events.append(event)
+
+
+def trace_startup() -> None:
+    """
+    Record interpreter start-up up to now.
+
+    Python has no portable process start time, so CPU time consumed so
+    far stands in for the duration. Start-up is almost entirely CPU-bound
+    (interpreter init and imports), so this is a close lower bound.
+    """
+    if get_trace_path() is None:
+        return
+    dur = int(time.process_time() * 1e6)
+    trace_event("startup", "phase", time.time_ns() // 1000 - dur, dur, {"approximate": True})
+
+
+def flush_trace() -> None:
+    """
+    Append recorded events to the GITSL_TRACE file.
+
+    Files ending in .json get Chrome's JSON Array Format, whose closing
+    bracket is optional, so any number of runs can append to one file and
+    load it in chrome://tracing or Perfetto. Other files get one JSON event
+    per line. Each flush is a single O_APPEND write.
+    """
+    path = get_trace_path()
+    with _trace_lock:
+        events = list(_trace_events)
+        _trace_events.clear()
+    if path is None or not events:
+        return
+
+    import json
+
+    lines = [json.dumps(event) for event in events]
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    except OSError:
+        return
+    try:
+        if path.endswith(".json"):
+            start = "[\n" if os.fstat(fd).st_size == 0 else ""
+            data = start + "".join(line + ",\n" for line in lines)
+        else:
+            data = "".join(line + "\n" for line in lines)
+        os.write(fd, data.encode("utf-8"))
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+atexit.register(flush_trace)
+
+
+# ============================================================
+# REPOSITORY DISCOVERY
+# ============================================================
+
+# Directories that mark a Sapling working copy root (.git for git-backed
+# repos, and only when Sapling keeps its files in .git/sl: a plain git
+# checkout is not a Sapling working copy)
+REPO_MARKERS = (".sl", ".hg", ".git")
+GIT_MARKER = ".git"
+GIT_SL_DIR = "sl"
+
+# Discovered roots by absolute start directory, for this process only
+_repo_root_cache: Dict[str, Optional[str]] = {}
+
+
+def find_repo_root(start: Optional[str] = None) -> Optional[str]:
+    """
+    Find the enclosing repository root by walking up from a directory.
+
+    Pure filesystem walk, so no sl process is started. Results are cached
+    per start directory for the lifetime of the process.
+
+    Args:
+        start: Directory to start from. Defaults to the current directory.
+
+    Returns:
+        Absolute path of the repository root, or None outside a repository
+    """
+    start_path = os.path.abspath(start if start is not None else os.getcwd())
+    if start_path in _repo_root_cache:
+        return _repo_root_cache[start_path]
+
+    root = None
+    path = start_path
+    while True:
+        if find_repo_dotdir(path) is not None:
+            root = path
+            break
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+
+    _repo_root_cache[start_path] = root
+    return root
+
+
+def find_repo_dotdir(root: str) -> Optional[str]:
+    """
+    Get the metadata directory (.sl, .hg or .git) of a repository root.
+
+    Args:
+        root: Repository root directory
+
+    Returns:
+        Absolute path of the first marker directory present, or None
+    """
+    for marker in REPO_MARKERS:
+        dotdir = os.path.join(root, marker)
+        if marker == GIT_MARKER:
+            if os.path.isdir(os.path.join(dotdir, GIT_SL_DIR)):
+                return dotdir
+        elif os.path.isdir(dotdir):
+            return dotdir
+    return None
+
+
 # ============================================================
 # SUBPROCESS EXECUTION
 # ============================================================
@@ -100,6 +399,863 @@ def run_sl(args: List[str]) -> int:
         - stdout appears on caller's stdout in real-time
         - stderr appears on caller's stderr in real-time
         - Child receives SIGINT directly (same process group)
+        - May change repository state, so memoized queries are dropped
     """
-    result = subprocess.run(["sl"] + args)
+    invalidate_queries()
+    with trace_span(_trace_name(args), "spawn", argv=args) as info:
+        result = subprocess.run(["sl"] + args)
+        info["exit"] = result.returncode
+    invalidate_queries()
     return result.returncode
+
+
+# Cleared by modes that run several commands in one process (batch mode)
+_exec_allowed = True
+
+
+def disable_exec() -> None:
+    """Make exec_sl run sl as a child: this process has more work to do."""
+    global _exec_allowed
+    _exec_allowed = False
+
+
+def exec_sl(args: List[str]) -> int:
+    """
+    Hand the terminal over to sl for a handler's final passthrough call.
+
+    Replaces this process with sl (os.execvp), so no Python parent stays
+    alive holding memory while sl runs, and signals and the exit status
+    reach the caller directly. Falls back to run_sl when cleanup must
+    still run after sl exits: outside POSIX, with GITSL_TRACE (the trace
+    is written at exit), with GITSL_EXEC=0, or after disable_exec().
+
+    Args:
+        args: Arguments to pass to sl (command and flags)
+
+    Returns:
+        Exit code from sl, only when sl ran as a child
+    """
+    if (_exec_allowed and os.name == "posix" and get_trace_path() is None
+            and not is_exec_disabled()):
+        for stream in (sys.stdout, sys.stderr):
+            stream.flush()
+        try:
+            os.execvp("sl", ["sl"] + args)
+        except OSError:
+            pass  # Let run_sl report it the usual way
+    return run_sl(args)
+
+
+def run_sl_captured(args: List[str]) -> subprocess.CompletedProcess:
+    """
+    Execute a state-changing sl command and capture its text output.
+
+    Use this instead of query_sl when the command modifies the repository
+    (e.g. quiet or verbose variants of add, remove, shelve, revert): the
+    result is never memoized and memoized queries are dropped.
+
+    Args:
+        args: Arguments to pass to sl (command and flags)
+
+    Returns:
+        CompletedProcess with returncode, stdout and stderr as text
+    """
+    invalidate_queries()
+    with trace_span(_trace_name(args), "spawn", argv=args) as info:
+        result = subprocess.run(["sl"] + args, capture_output=True, text=True)
+        _trace_result(info, result)
+    invalidate_queries()
+    return result
+
+
+def stream_sl(
+    args: List[str],
+    transform: Callable[[str], Optional[str]],
+    header: Optional[Callable[[], str]] = None,
+) -> int:
+    """
+    Run sl and translate its output line by line as it arrives.
+
+    Memory stays bounded and the first translated line is written as soon
+    as sl produces it. stderr is inherited, so sl's errors and warnings
+    reach the caller directly.
+
+    Args:
+        args: Arguments to pass to sl (command and flags)
+        transform: Maps one output line (without newline) to its
+            translation, or None to drop the line
+        header: Optional callable producing text to write before the
+            first line. It runs while sl is already working; its text is
+            written before the first line, or at the end if sl succeeds
+            without output, and never when sl fails without output.
+
+    Returns:
+        Exit code from sl process
+    """
+    return _traced_stream(args, transform, lambda t: _stream_lines(args, t, header))
+
+
+def _stream_lines(args, transform, header) -> int:
+    proc = subprocess.Popen(["sl"] + args, stdout=subprocess.PIPE, text=True)
+    pending = header() if header is not None else ""
+    out = sys.stdout
+    try:
+        with proc.stdout:
+            for line in proc.stdout:
+                if pending:
+                    out.write(pending)
+                    pending = ""
+                translated = transform(line.rstrip("\n"))
+                if translated is not None:
+                    out.write(translated + "\n")
+        returncode = proc.wait()
+        if pending and returncode == 0:
+            out.write(pending)
+        out.flush()
+    except BrokenPipeError:
+        return _reader_gone(proc)
+    return returncode
+
+
+# Bytes read from sl per system call when streaming records
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def stream_sl_records(
+    args: List[str],
+    transform: Callable[[bytes], Optional[bytes]],
+    header: Optional[Callable[[], bytes]] = None,
+    separator: bytes = b"\0",
+) -> int:
+    """
+    Bytes-native stream_sl for separator-terminated records.
+
+    Output is never decoded, so file names that are not valid UTF-8 or
+    contain newlines pass through untouched. Translated records are
+    written to sys.stdout.buffer, each followed by the separator.
+
+    Args:
+        args: Arguments to pass to sl (command and flags)
+        transform: Maps one record (without separator) to its translation,
+            or None to drop the record
+        header: As for stream_sl, but producing bytes
+        separator: Record terminator in sl's output and in ours
+
+    Returns:
+        Exit code from sl process
+    """
+    return _traced_stream(
+        args, transform, lambda t: _stream_records(args, t, header, separator)
+    )
+
+
+def _stream_records(args, transform, header, separator) -> int:
+    proc = subprocess.Popen(["sl"] + args, stdout=subprocess.PIPE)
+    pending = header() if header is not None else b""
+    sys.stdout.flush()
+    out = sys.stdout.buffer
+    try:
+        with proc.stdout:
+            remainder = b""
+            while True:
+                chunk = proc.stdout.read1(STREAM_CHUNK_SIZE)
+                if not chunk:
+                    break
+                records = (remainder + chunk).split(separator)
+                remainder = records.pop()
+                if records and pending:
+                    out.write(pending)
+                    pending = b""
+                for record in records:
+                    translated = transform(record)
+                    if translated is not None:
+                        out.write(translated + separator)
+            if remainder:
+                # Unterminated last record
+                if pending:
+                    out.write(pending)
+                    pending = b""
+                translated = transform(remainder)
+                if translated is not None:
+                    out.write(translated + separator)
+        returncode = proc.wait()
+        if pending and returncode == 0:
+            out.write(pending)
+        out.flush()
+    except BrokenPipeError:
+        return _reader_gone(proc)
+    return returncode
+
+
+def scan_sl(args: List[str], consume: Callable[[BinaryIO], bool]) -> int:
+    """
+    Run sl and let consume read its raw output, possibly stopping early.
+
+    For searches that can end before sl does (e.g. once enough matches
+    are found): when consume stops early, sl is killed instead of being
+    left to produce output nobody reads.
+
+    Args:
+        args: Arguments to pass to sl (command and flags)
+        consume: Reads sl's stdout (binary); returns True if it stopped
+            before the end of the output
+
+    Returns:
+        Exit code from sl process, or 0 if consume stopped early
+    """
+    with trace_span(_trace_name(args), "spawn", argv=args) as info:
+        proc = subprocess.Popen(["sl"] + args, stdout=subprocess.PIPE)
+        with proc.stdout:
+            stopped = consume(proc.stdout)
+            if stopped:
+                proc.kill()
+        returncode = proc.wait()
+        info["exit"] = 0 if stopped else returncode
+    return info["exit"]
+
+
+def _traced_stream(args: List[str], transform: Callable, run: Callable[[Callable], int]) -> int:
+    """Run a stream with its transform, tracing both when GITSL_TRACE is set."""
+    if get_trace_path() is None:
+        return run(transform)
+    traced = _TracedTransform(transform)
+    with trace_span(_trace_name(args), "spawn", argv=args) as info:
+        info["exit"] = run(traced)
+        traced.record(info)
+    return info["exit"]
+
+
+def _reader_gone(proc: subprocess.Popen) -> int:
+    """Our reader closed the pipe (e.g. piped into head): stop sl quietly."""
+    proc.kill()
+    proc.wait()
+    # Point stdout at devnull so the interpreter's final flush cannot fail
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, sys.stdout.fileno())
+    return 1
+
+
+# Memoized read-only query results, keyed by (args, absolute cwd)
+_query_cache: Dict[Tuple[Tuple[str, ...], str], subprocess.CompletedProcess] = {}
+_query_cache_lock = threading.Lock()
+
+
+def query_sl(args: List[str], cwd: Optional[str] = None,
+             fresh: bool = False) -> subprocess.CompletedProcess:
+    """
+    Run a read-only sl query and capture its text output.
+
+    Results are memoized for the rest of the invocation, so handlers may
+    repeat a query freely; run_sl and run_sl_captured drop the memo.
+    Uses a warm Sapling command server when one is available (see
+    enable_cmdserver), otherwise spawns sl.
+
+    Args:
+        args: Arguments to pass to sl (command and flags)
+        cwd: Working directory for the query. Defaults to the current one.
+        fresh: Ask sl even if the answer is memoized (and memoize the new one)
+
+    Returns:
+        CompletedProcess with returncode, stdout and stderr as text.
+        Shared between callers: treat it as read-only.
+    """
+    key = (tuple(args), os.path.abspath(cwd if cwd is not None else os.getcwd()))
+    with _query_cache_lock:
+        cached = None if fresh else _query_cache.get(key)
+    if cached is not None:
+        trace_event(_trace_name(args), "memo", time.time_ns() // 1000, None, {"argv": args})
+        return cached
+
+    result = _run_query(args, cwd)
+    with _query_cache_lock:
+        _query_cache[key] = result
+    return result
+
+
+def invalidate_queries() -> None:
+    """Forget all memoized query results (repository state may have changed)."""
+    with _query_cache_lock:
+        _query_cache.clear()
+
+
+def query_sl_bytes(args: List[str], cwd: Optional[str] = None) -> subprocess.CompletedProcess:
+    """
+    Run a read-only sl query and capture its raw output.
+
+    Like query_sl, but for output that must stay byte-exact (file
+    contents). Not memoized, since such output can be large.
+
+    Args:
+        args: Arguments to pass to sl (command and flags)
+        cwd: Working directory for the query. Defaults to the current one.
+
+    Returns:
+        CompletedProcess with returncode, stdout and stderr as bytes
+    """
+    return _run_query(args, cwd, text=False)
+
+
+def _run_query(args: List[str], cwd: Optional[str],
+               text: bool = True) -> subprocess.CompletedProcess:
+    """Run one query on a command server if possible, else spawn sl."""
+    server = _acquire_cmdserver(cwd)
+    if server is not None:
+        try:
+            with trace_span(_trace_name(args), "cmdserver", argv=args) as info:
+                result = server.runcommand(args, cwd, text=text)
+                _trace_result(info, result)
+        except CommandServerError:
+            # Likely no command-server support in this sl: stop trying
+            server.close()
+            _mark_cmdserver_broken()
+        else:
+            _release_cmdserver(server)
+            return result
+
+    with trace_span(_trace_name(args), "spawn", argv=args) as info:
+        result = subprocess.run(
+            ["sl"] + args,
+            capture_output=True,
+            text=text,
+            cwd=cwd
+        )
+        _trace_result(info, result)
+    return result
+
+
+def _trace_name(args: List[str]) -> str:
+    """Short event name for an sl call, e.g. 'sl status'."""
+    return "sl " + args[0] if args else "sl"
+
+
+def _trace_result(info: dict, result: subprocess.CompletedProcess) -> None:
+    """Add exit code and output sizes of a captured call to a trace event."""
+    if get_trace_path() is None:
+        return
+    info["exit"] = result.returncode
+    for name in ("stdout", "stderr"):
+        data = getattr(result, name) or b""
+        if isinstance(data, str):
+            data = data.encode("utf-8", "surrogateescape")
+        info[f"{name}_bytes"] = len(data)
+
+
+class _TracedTransform:
+    """Wraps a per-line transform to total its time and output for tracing."""
+
+    def __init__(self, transform: Callable):
+        self.transform = transform
+        self.calls = 0
+        self.ns = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.ts = time.time_ns() // 1000
+
+    def __call__(self, line):
+        start = time.perf_counter_ns()
+        translated = self.transform(line)
+        self.ns += time.perf_counter_ns() - start
+        self.calls += 1
+        self.bytes_in += len(line)
+        if translated is not None:
+            self.bytes_out += len(translated)
+        return translated
+
+    def record(self, info: dict) -> None:
+        """Attach totals to the spawn event and emit a transform event."""
+        info["lines"] = self.calls
+        info["stdout_bytes"] = self.bytes_in
+        name = getattr(self.transform, "__name__", "transform")
+        trace_event(name, "transform", self.ts, self.ns // 1000, {
+            "lines": self.calls, "bytes_in": self.bytes_in, "bytes_out": self.bytes_out,
+        })
+
+
+# ============================================================
+# TRANSLATION PLANS
+# ============================================================
+
+def execute_plan(plan: SlPlan) -> int:
+    """
+    Run a handler's translation plan.
+
+    Messages go to stderr first. Every command but the last runs as a
+    child with inherited stdio, stopping at the first failure. The last
+    one is exec'd, run, run with its output dropped, or streamed through
+    the plan's transform, depending on plan.mode; a header is written
+    ahead of its output.
+
+    Args:
+        plan: What to run
+
+    Returns:
+        Exit code of the plan (of the failing or last command)
+    """
+    for message in plan.messages:
+        print(message, file=sys.stderr)
+    if plan.exit_code is not None:
+        return plan.exit_code
+
+    *setup, last = plan.commands
+    for args in setup:
+        exit_code = run_sl(args)
+        if exit_code != 0:
+            return exit_code
+
+    if plan.mode == PLAN_STREAM:
+        return stream_sl(last, plan.transform, plan.header)
+    if plan.mode == PLAN_RECORDS:
+        return stream_sl_records(last, plan.transform, plan.header, plan.separator)
+    if plan.mode == PLAN_CALL:
+        return plan.transform(last)
+    if plan.mode == PLAN_CAPTURED:
+        return run_sl_captured(last).returncode
+    if plan.header is not None:
+        # sl writes straight to the inherited descriptor: flush the header first
+        sys.stdout.write(plan.header())
+        sys.stdout.flush()
+    if plan.mode == PLAN_EXEC:
+        return exec_sl(last)
+    return run_sl(last)
+
+
+# ============================================================
+# CONCURRENT QUERIES
+# ============================================================
+
+# Shared worker threads for run_concurrently, created on first use
+_executor = None
+_executor_lock = threading.Lock()
+MAX_CONCURRENT_QUERIES = 8
+
+
+def run_concurrently(*calls: Callable[[], Any]) -> List[Any]:
+    """
+    Run independent captured sl calls at the same time.
+
+    Each call is a zero-argument callable (e.g. a lambda around query_sl);
+    sl does the work in child processes, so threads overlap their waits
+    and wall-clock time becomes that of the slowest call.
+
+    Args:
+        calls: Callables that do not depend on each other's results
+
+    Returns:
+        Their results, in the order the calls were given
+    """
+    if len(calls) <= 1:
+        return [call() for call in calls]
+    executor = _get_executor()
+    # Run the first call here rather than leave this thread idle
+    futures = [executor.submit(call) for call in calls[1:]]
+    first = calls[0]()
+    return [first] + [future.result() for future in futures]
+
+
+def _get_executor():
+    """Create the thread pool lazily; most invocations never need it."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            _executor = ThreadPoolExecutor(
+                max_workers=MAX_CONCURRENT_QUERIES, thread_name_prefix="gitsl-query"
+            )
+        return _executor
+
+
+# ============================================================
+# REPOSITORY STATE CACHE
+# ============================================================
+
+# Cache file, kept in the repository's Sapling metadata directory
+STATE_CACHE_FILE = "gitsl-cache.json"
+STATE_CACHE_VERSION = 1
+STATE_CACHE_MAX_BYTES = 64 * 1024
+
+# Files whose (mtime, size, inode) identify the state cached queries read:
+# working copy parent, active and stored bookmarks, shelves
+STATE_FILES = (
+    "dirstate",
+    "bookmarks",
+    "bookmarks.current",
+    os.path.join("store", "bookmarks"),
+    os.path.join("store", "metalog", "roots"),
+    os.path.join("store", "phaseroots"),
+    "shelved",
+)
+
+# Files modified this recently may change again within the filesystem's
+# timestamp granularity without their signature changing, so results
+# read from them are not stored.
+RACY_WINDOW_SECONDS = 2.0
+
+
+def query_sl_cached(args: List[str]) -> subprocess.CompletedProcess:
+    """
+    Run a read-only sl query whose answer only depends on repository state.
+
+    Successful results are kept on disk across invocations, keyed by the
+    signature of STATE_FILES, so repeated calls while nothing changes
+    (e.g. shell prompts asking for the active bookmark) skip sl entirely.
+    Falls back to query_sl outside a repository or when GITSL_CACHE=0.
+
+    Only use this for queries fully determined by the working copy parent,
+    bookmarks and shelves: never for anything reading file contents.
+
+    Args:
+        args: Arguments to pass to sl (command and flags)
+
+    Returns:
+        CompletedProcess with returncode, stdout and stderr as text
+    """
+    root = find_repo_root()
+    state_dir = _find_state_dir(root) if root is not None else None
+    if state_dir is None or is_state_cache_disabled():
+        return query_sl(args)
+
+    signature, racy = _state_signature(state_dir)
+    key = "\0".join([os.path.relpath(os.getcwd(), root)] + args)
+    path = os.path.join(state_dir, STATE_CACHE_FILE)
+    entries = _load_state_cache(path)
+
+    entry = entries.get(key)
+    if entry is not None and entry["signature"] == signature:
+        # Move to the most recently used end; rewrite only if that moved it
+        if next(reversed(entries)) != key:
+            entries[key] = entries.pop(key)
+            _save_state_cache(path, entries)
+        trace_event(_trace_name(args), "state-cache", time.time_ns() // 1000, None,
+                    {"argv": args})
+        return subprocess.CompletedProcess(["sl"] + args, 0, entry["stdout"], "")
+
+    # The state changed (or was never seen): a memoized answer may predate
+    # the change, so ask sl again rather than store a stale one
+    result = query_sl(args, fresh=True)
+    if result.returncode == 0 and not racy:
+        entries.pop(key, None)
+        entries[key] = {"signature": signature, "stdout": result.stdout}
+        _save_state_cache(path, entries)
+    return result
+
+
+def query_sl_cached_bytes(args: List[str], name: str) -> subprocess.CompletedProcess:
+    """
+    query_sl_cached for large binary answers, such as file lists.
+
+    The query runs at the repository root, and its answer is kept in a
+    file of its own (name, in the metadata directory) instead of the
+    size-bounded shared cache. It is tied to the same state signature,
+    so adding, removing or checking out files invalidates it.
+
+    Args:
+        args: Arguments to pass to sl (command and flags)
+        name: Cache file name, one per kind of query
+
+    Returns:
+        CompletedProcess with returncode, stdout and stderr as bytes
+    """
+    import json
+
+    root = find_repo_root()
+    state_dir = _find_state_dir(root) if root is not None else None
+    if state_dir is None or is_state_cache_disabled():
+        return query_sl_bytes(args, cwd=root)
+
+    signature, racy = _state_signature(state_dir)
+    header = json.dumps({"version": STATE_CACHE_VERSION, "argv": args,
+                         "signature": signature}).encode() + b"\n"
+    path = os.path.join(state_dir, name)
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        data = b""
+    if data.startswith(header):
+        trace_event(_trace_name(args), "state-cache", time.time_ns() // 1000, None,
+                    {"argv": args})
+        return subprocess.CompletedProcess(["sl"] + args, 0, data[len(header):], b"")
+
+    result = query_sl_bytes(args, cwd=root)
+    if result.returncode == 0 and not racy:
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(header + result.stdout)
+            os.replace(tmp_path, path)
+        except OSError:
+            # Best effort, as for the shared cache
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+    return result
+
+
+def _find_state_dir(root: str) -> Optional[str]:
+    """Directory holding Sapling's state files for a repository root."""
+    dotdir = find_repo_dotdir(root)
+    if dotdir is None:
+        return None
+    # Git-backed checkouts keep Sapling's own files in .git/sl
+    if os.path.basename(dotdir) == GIT_MARKER:
+        return os.path.join(dotdir, GIT_SL_DIR)
+    return dotdir
+
+
+def _state_signature(state_dir: str) -> Tuple[list, bool]:
+    """
+    Stat the state files of a repository.
+
+    Returns:
+        Tuple of (signature, racy) where signature is JSON-serializable and
+        racy tells whether any file was modified within RACY_WINDOW_SECONDS
+    """
+    now_ns = time.time_ns()
+    window_ns = int(RACY_WINDOW_SECONDS * 1e9)
+    signature = []
+    racy = False
+    for name in STATE_FILES:
+        try:
+            st = os.stat(os.path.join(state_dir, name))
+        except OSError:
+            signature.append(None)
+            continue
+        signature.append([st.st_mtime_ns, st.st_size, st.st_ino])
+        if now_ns - st.st_mtime_ns < window_ns:
+            racy = True
+    return signature, racy
+
+
+def _load_state_cache(path: str) -> Dict[str, dict]:
+    """Read cache entries, least recently used first; empty if unusable."""
+    import json
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != STATE_CACHE_VERSION:
+        return {}
+    return data.get("entries", {})
+
+
+def _save_state_cache(path: str, entries: Dict[str, dict]) -> None:
+    """Atomically write entries, evicting least recently used past the size bound."""
+    import json
+
+    while True:
+        payload = json.dumps({"version": STATE_CACHE_VERSION, "entries": entries})
+        if len(payload) <= STATE_CACHE_MAX_BYTES or not entries:
+            break
+        del entries[next(iter(entries))]
+
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except OSError:
+        # Best effort: a read-only or full repository just goes uncached
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+
+
+# ============================================================
+# HEAD INFORMATION
+# ============================================================
+
+# One template answering every HEAD question handlers ask
+HEAD_INFO_TEMPLATE = "{activebookmark}\n{node}\n{node|short}\n{phase}\n"
+
+
+def get_head_info() -> Tuple[subprocess.CompletedProcess, Optional[HeadInfo]]:
+    """
+    Fetch bookmark, node, short node and phase of '.' in one sl query.
+
+    Every HEAD lookup shares this query, so it is spawned at most once per
+    invocation and answered from the state cache while nothing changes.
+
+    Returns:
+        Tuple of (query result, HeadInfo or None if the query failed)
+    """
+    result = query_sl_cached(["log", "-r", ".", "--template", HEAD_INFO_TEMPLATE])
+    if result.returncode != 0:
+        return result, None
+    fields = result.stdout.split("\n")
+    if len(fields) < 4:
+        return result, None
+    return result, HeadInfo(*fields[:4])
+
+
+# ============================================================
+# SAPLING COMMAND SERVER
+# ============================================================
+
+class CommandServerError(Exception):
+    """The command server failed or spoke an unexpected protocol."""
+
+
+class CommandServer:
+    """
+    Client for one 'sl serve --cmdserver pipe' child process.
+
+    Speaks the command-server protocol: the server answers on channels,
+    each frame being a 1-byte channel name and a 4-byte big-endian length.
+    'o'/'e' carry output/error data, 'r' the 4-byte exit code, and 'I'/'L'
+    request input (we are never interactive, so we answer with EOF).
+    """
+
+    def __init__(self, repo_root: str):
+        self.repo_root = repo_root
+        self.encoding = "utf-8"
+        self._hello_read = False
+        self.proc = subprocess.Popen(
+            ["sl", "serve", "--cmdserver", "pipe", "--config", "ui.interactive=false"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=repo_root,
+        )
+
+    def _read_exact(self, size: int) -> bytes:
+        data = self.proc.stdout.read(size)
+        if len(data) != size:
+            raise CommandServerError("command server closed its output")
+        return data
+
+    def _read_frame(self):
+        header = self._read_exact(5)
+        channel = header[:1]
+        length = struct.unpack(">I", header[1:])[0]
+        if channel in (b"I", b"L"):
+            return channel, length
+        return channel, self._read_exact(length)
+
+    def _read_hello(self) -> None:
+        """Validate the capabilities banner sent on start-up."""
+        channel, data = self._read_frame()
+        if channel != b"o":
+            raise CommandServerError("command server sent no hello")
+        fields = {}
+        for line in data.decode("ascii", "replace").splitlines():
+            key, _, value = line.partition(": ")
+            fields[key] = value
+        if "runcommand" not in fields.get("capabilities", "").split():
+            raise CommandServerError("command server lacks runcommand")
+        self.encoding = fields.get("encoding", self.encoding)
+        self._hello_read = True
+
+    def runcommand(self, args: List[str], cwd: Optional[str] = None,
+                   text: bool = True) -> subprocess.CompletedProcess:
+        """Run one sl command and collect its output (text or bytes) and exit code."""
+        try:
+            if not self._hello_read:
+                self._read_hello()
+            command = ["--cwd", os.path.abspath(cwd or os.getcwd())] + args
+            payload = "\0".join(command).encode(self.encoding, "surrogateescape")
+            self.proc.stdin.write(b"runcommand\n" + struct.pack(">I", len(payload)) + payload)
+            self.proc.stdin.flush()
+
+            out, err = [], []
+            while True:
+                channel, data = self._read_frame()
+                if channel == b"o":
+                    out.append(data)
+                elif channel == b"e":
+                    err.append(data)
+                elif channel == b"r":
+                    returncode = struct.unpack(">i", data)[0]
+                    break
+                elif channel in (b"I", b"L"):
+                    self.proc.stdin.write(struct.pack(">I", 0))
+                    self.proc.stdin.flush()
+                elif channel.isupper():
+                    raise CommandServerError(f"unexpected required channel {channel!r}")
+        except (OSError, struct.error) as e:
+            raise CommandServerError(str(e)) from e
+
+        stdout, stderr = b"".join(out), b"".join(err)
+        if text:
+            stdout = stdout.decode(self.encoding, "replace")
+            stderr = stderr.decode(self.encoding, "replace")
+        return subprocess.CompletedProcess(["sl"] + args, returncode, stdout, stderr)
+
+    def close(self) -> None:
+        """Shut the server down; it exits when its input closes."""
+        for stream in (self.proc.stdin, self.proc.stdout):
+            try:
+                stream.close()
+            except OSError:
+                pass
+
+
+# Idle servers per repository root, shared by all queries in this process
+_cmdserver_pool: Dict[str, List[CommandServer]] = {}
+_cmdserver_lock = threading.Lock()
+_cmdserver_enabled = False
+_cmdserver_broken = False
+
+
+def enable_cmdserver(prestart: bool = True) -> None:
+    """
+    Route query_sl through pooled command servers for this process.
+
+    Long-lived modes call this: a cold server costs one sl start-up, which
+    only pays off when several queries follow. GITSL_CMDSERVER=1 enables
+    it for every process, GITSL_CMDSERVER=0 disables it everywhere.
+
+    Args:
+        prestart: Start a server for the current repository right away so
+            its start-up overlaps with our own work.
+    """
+    global _cmdserver_enabled
+    _cmdserver_enabled = True
+    if prestart:
+        server = _acquire_cmdserver(None)
+        if server is not None:
+            _release_cmdserver(server)
+
+
+def _acquire_cmdserver(cwd: Optional[str]) -> Optional[CommandServer]:
+    """Take an idle server for cwd's repository, starting one if needed."""
+    if _cmdserver_broken or is_cmdserver_disabled():
+        return None
+    if not (_cmdserver_enabled or is_cmdserver_forced()):
+        return None
+    repo_root = find_repo_root(cwd)
+    if repo_root is None:
+        return None
+
+    with _cmdserver_lock:
+        idle = _cmdserver_pool.setdefault(repo_root, [])
+        if idle:
+            return idle.pop()
+    try:
+        return CommandServer(repo_root)
+    except OSError:
+        return None
+
+
+def _release_cmdserver(server: CommandServer) -> None:
+    """Return a healthy server to the pool."""
+    with _cmdserver_lock:
+        _cmdserver_pool.setdefault(server.repo_root, []).append(server)
+
+
+def _mark_cmdserver_broken() -> None:
+    """Stop using command servers after a protocol failure."""
+    global _cmdserver_broken
+    _cmdserver_broken = True
+
+
+@atexit.register
+def _close_cmdservers() -> None:
+    with _cmdserver_lock:
+        for servers in _cmdserver_pool.values():
+            for server in servers:
+                server.close()
+        _cmdserver_pool.clear()
@@ -4,33 +4,46 @@ gitsl - Git to Sapling CLI shim.
 
 Translates git commands to their Sapling (sl) equivalents.
 Set GITSL_DEBUG=1 to see what would be executed without running.
+Set GITSL_TRACE=<file> to record per-phase timings and sl calls.
+Use 'gitsl --batch' to run many commands read from stdin in one process.
 """
 
+import importlib
 import shlex
 import sys
 from typing import List
 
-from common import parse_argv, is_debug_mode, print_debug_info, VERSION
-import cmd_status
-import cmd_log
-import cmd_diff
-import cmd_init
-import cmd_rev_parse
-import cmd_add
-import cmd_commit
-import cmd_show
-import cmd_blame
-import cmd_rm
-import cmd_mv
-import cmd_clone
-import cmd_grep
-import cmd_clean
-import cmd_config
-import cmd_switch
-import cmd_branch
-import cmd_restore
-import cmd_stash
-import cmd_checkout
+from common import (
+    parse_argv, is_debug_mode, is_daemon_mode, print_debug_info, get_version,
+    trace_span, trace_startup,
+)
+
+
+# Command name -> handler module. Handlers are imported on demand so a run
+# only pays the import cost of the one command it executes.
+COMMANDS = {
+    "status": "cmd_status",
+    "log": "cmd_log",
+    "diff": "cmd_diff",
+    "init": "cmd_init",
+    "rev-parse": "cmd_rev_parse",
+    "add": "cmd_add",
+    "commit": "cmd_commit",
+    "show": "cmd_show",
+    "blame": "cmd_blame",
+    "rm": "cmd_rm",
+    "mv": "cmd_mv",
+    "clone": "cmd_clone",
+    "grep": "cmd_grep",
+    "clean": "cmd_clean",
+    "config": "cmd_config",
+    "switch": "cmd_switch",
+    "branch": "cmd_branch",
+    "restore": "cmd_restore",
+    "stash": "cmd_stash",
+    "checkout": "cmd_checkout",
+    "cat-file": "cmd_cat_file",
+}
 
 
 def main(argv: List[str] = None) -> int:
@@ -46,7 +59,35 @@ def main(argv: List[str] = None) -> int:
     if argv is None:
         argv = sys.argv[1:]
 
-    parsed = parse_argv(argv)
+    trace_startup()
+
+    # Batch mode: many commands from stdin in this one process
+    if argv and argv[0] == "--batch":
+        import gitsl_batch
+        return gitsl_batch.run_batch(argv[1:])
+
+    # Daemon mode: forward registered commands to a warm per-repo server
+    if argv and argv[0] in COMMANDS and is_daemon_mode() and not is_debug_mode():
+        import gitsl_daemon
+        exit_code = gitsl_daemon.run_client(argv)
+        if exit_code is not None:
+            return exit_code
+
+    return run(argv)
+
+
+def run(argv: List[str]) -> int:
+    """
+    Run a git command in this process.
+
+    Args:
+        argv: Command line arguments (without script name)
+
+    Returns:
+        Exit code (0 for success, non-zero for errors)
+    """
+    with trace_span("parse_argv", "phase"):
+        parsed = parse_argv(argv)
 
     # Handle empty command
     if parsed.command is None:
@@ -55,80 +96,38 @@ def main(argv: List[str] = None) -> int:
 
     # Handle special flags
     if parsed.command in ("--version", "-v"):
-        print(f"gitsl version {VERSION}")
+        print(f"gitsl version {get_version()}")
         return 0
 
     if parsed.command in ("--help", "-h", "help"):
         print("usage: git <command> [<args>]")
         print("\nThis is gitsl, a git-to-Sapling translation shim.")
         print("Set GITSL_DEBUG=1 to see commands without executing.")
+        print("Set GITSL_DAEMON=1 to serve commands from a resident process.")
+        print("Set GITSL_TRACE=<file> to record timings (.json for Chrome trace format).")
+        print("Run 'gitsl --batch [-z]' to read commands from stdin and frame each result.")
         return 0
 
-    # Debug mode: show what would run, don't execute
+    module_name = COMMANDS.get(parsed.command)
+    module = None
+    if module_name is not None:
+        with trace_span("import", "phase", module=module_name):
+            module = importlib.import_module(module_name)
+
+    # Debug mode: show what would run, don't execute. Handlers with a
+    # translation plan show their real sl argv.
     if is_debug_mode():
-        print_debug_info(parsed)
+        plan = None
+        if module is not None and hasattr(module, "plan"):
+            plan = module.plan(parsed)
+        print_debug_info(parsed, plan)
         return 0
 
     # Dispatch to command handlers
-    if parsed.command == "status":
-        return cmd_status.handle(parsed)
-
-    if parsed.command == "log":
-        return cmd_log.handle(parsed)
-
-    if parsed.command == "diff":
-        return cmd_diff.handle(parsed)
-
-    if parsed.command == "init":
-        return cmd_init.handle(parsed)
-
-    if parsed.command == "rev-parse":
-        return cmd_rev_parse.handle(parsed)
-
-    if parsed.command == "add":
-        return cmd_add.handle(parsed)
-
-    if parsed.command == "commit":
-        return cmd_commit.handle(parsed)
-
-    if parsed.command == "show":
-        return cmd_show.handle(parsed)
-
-    if parsed.command == "blame":
-        return cmd_blame.handle(parsed)
-
-    if parsed.command == "rm":
-        return cmd_rm.handle(parsed)
-
-    if parsed.command == "mv":
-        return cmd_mv.handle(parsed)
-
-    if parsed.command == "clone":
-        return cmd_clone.handle(parsed)
-
-    if parsed.command == "grep":
-        return cmd_grep.handle(parsed)
-
-    if parsed.command == "clean":
-        return cmd_clean.handle(parsed)
-
-    if parsed.command == "config":
-        return cmd_config.handle(parsed)
-
-    if parsed.command == "switch":
-        return cmd_switch.handle(parsed)
-
-    if parsed.command == "branch":
-        return cmd_branch.handle(parsed)
-
-    if parsed.command == "restore":
-        return cmd_restore.handle(parsed)
-
-    if parsed.command == "stash":
-        return cmd_stash.handle(parsed)
-
-    if parsed.command == "checkout":
-        return cmd_checkout.handle(parsed)
+    if module is not None:
+        with trace_span(f"git {parsed.command}", "phase", argv=argv) as info:
+            info["exit"] = module.handle(parsed)
+        return info["exit"]
 
     # Unsupported command handling (UNSUP-01, UNSUP-02)
     if parsed.args:
@@ -0,0 +1,191 @@
+"""
+Batch mode for gitsl (gitsl --batch).
+
+Runs many git commands in one process, in the spirit of
+'git cat-file --batch'. Command lines are read from stdin, one per line
+(or NUL-terminated with -z), split with shell quoting rules and run
+through the normal handlers. For each command a framed result is written
+to stdout:
+
+    <exit code> <stdout length> <stderr length> LF
+    <stdout bytes><stderr bytes> LF
+
+Lengths are in bytes. A leading 'git' word is optional. Empty lines are
+skipped. Results are flushed after every command, so a caller can send a
+command and wait for its answer.
+
+Read-only sl queries go through a command server. Their answers are
+memoized only within one command: the repository may change between
+commands (another process may run 'sl goto'), so the memo is dropped
+before each one.
+"""
+
+import os
+import shlex
+import sys
+import tempfile
+import traceback
+from typing import BinaryIO, Iterator, List, Tuple
+
+from common import disable_exec, enable_cmdserver, invalidate_queries
+
+
+READ_CHUNK_SIZE = 64 * 1024
+
+USAGE = "usage: gitsl --batch [-z]\n"
+
+
+# ============================================================
+# INPUT
+# ============================================================
+
+def read_records(stream: BinaryIO, separator: bytes) -> Iterator[bytes]:
+    """
+    Yield separator-terminated records as soon as each one is complete.
+
+    A trailing record without a separator is yielded at end of input.
+    """
+    pending = b""
+    while True:
+        chunk = stream.read1(READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        pending += chunk
+        *records, pending = pending.split(separator)
+        yield from records
+    if pending:
+        yield pending
+
+
+def parse_command_line(record: bytes) -> List[str]:
+    """
+    Split one command line into gitsl arguments.
+
+    Raises:
+        ValueError: If the line has unbalanced quotes
+    """
+    argv = shlex.split(os.fsdecode(record.rstrip(b"\r")))
+    if argv and argv[0] == "git":
+        argv = argv[1:]
+    return argv
+
+
+# ============================================================
+# EXECUTION
+# ============================================================
+
+class _Capture:
+    """
+    Redirects file descriptors 1 and 2 into temporary files.
+
+    Both Python's sys.stdout/sys.stderr and the sl processes handlers
+    spawn write to the same descriptors, so capturing at descriptor level
+    keeps their output in order without changing any handler.
+    """
+
+    def __init__(self):
+        self.out = tempfile.TemporaryFile()
+        self.err = tempfile.TemporaryFile()
+
+    def start(self) -> None:
+        """Empty both files and point descriptors 1 and 2 at them."""
+        for target, capture in ((1, self.out), (2, self.err)):
+            capture.seek(0)
+            capture.truncate()
+            os.dup2(capture.fileno(), target)
+
+    def finish(self) -> Tuple[bytes, bytes]:
+        """Flush Python's streams and return what was captured."""
+        for stream in (sys.stdout, sys.stderr):
+            try:
+                stream.flush()
+            except (OSError, ValueError):
+                pass
+        captured = []
+        for capture in (self.out, self.err):
+            capture.seek(0)
+            captured.append(capture.read())
+        return captured[0], captured[1]
+
+
+def _run_one(argv: List[str]) -> int:
+    """Run one command the way a separate gitsl process would."""
+    import gitsl
+    try:
+        return gitsl.run(argv)
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else 1
+    except KeyboardInterrupt:
+        raise
+    except BaseException:
+        traceback.print_exc()
+        return 1
+
+
+def _write_frame(out: BinaryIO, exit_code: int, stdout: bytes, stderr: bytes) -> None:
+    out.write(b"%d %d %d\n" % (exit_code, len(stdout), len(stderr)))
+    out.write(stdout)
+    out.write(stderr)
+    out.write(b"\n")
+    out.flush()
+
+
+def run_batch(args: List[str]) -> int:
+    """
+    Entry point for 'gitsl --batch'.
+
+    Args:
+        args: Options after --batch ('-z' for NUL-terminated input)
+
+    Returns:
+        Exit code (0 after end of input, 1 for bad options)
+    """
+    separator = b"\n"
+    for arg in args:
+        if arg == "-z":
+            separator = b"\0"
+        else:
+            sys.stderr.write(f"gitsl: unknown --batch option: {arg}\n")
+            sys.stderr.write(USAGE)
+            return 1
+
+    # Keep private copies of the real stdio for the batch protocol; while
+    # a command runs, stdin is empty and stdout/stderr are captured
+    sys.stdout.flush()
+    sys.stderr.flush()
+    batch_in = os.fdopen(os.dup(0), "rb")
+    batch_out = os.fdopen(os.dup(1), "wb")
+    batch_err = os.dup(2)
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, 0)
+    os.close(devnull)
+
+    # Handlers must return here rather than become sl
+    disable_exec()
+    enable_cmdserver()
+    capture = _Capture()
+    try:
+        for record in read_records(batch_in, separator):
+            try:
+                argv = parse_command_line(record)
+            except ValueError as e:
+                message = f"gitsl: cannot parse batch command: {e}\n".encode()
+                _write_frame(batch_out, 128, b"", message)
+                continue
+            if not argv:
+                continue
+
+            invalidate_queries()
+            capture.start()
+            exit_code = _run_one(argv)
+            stdout, stderr = capture.finish()
+            _write_frame(batch_out, exit_code, stdout, stderr)
+    except BrokenPipeError:
+        # Reader went away; nobody is left to report to
+        return 0
+    finally:
+        # Restore the real stdio so late errors and atexit output are visible
+        os.dup2(batch_out.fileno(), 1)
+        os.dup2(batch_err, 2)
+        os.close(batch_err)
+    return 0
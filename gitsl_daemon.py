@@ -0,0 +1,489 @@
+"""
+Resident server mode for gitsl (GITSL_DAEMON=1).
+
+Every gitsl call normally pays for a fresh interpreter and its imports
+before it spawns sl. In daemon mode a thin client forwards argv, cwd,
+environment and its stdio file descriptors over a Unix socket to a
+long-lived server that already has every handler imported. The server
+forks a worker per request; the worker adopts the client's descriptors,
+runs the normal handler and its exit status is relayed back.
+
+- One server per repository root (socket name derived from the root)
+- Auto-started by the first client; that call runs in-process meanwhile
+- Exits after GITSL_DAEMON_IDLE seconds without requests (default 300)
+- POSIX only: requires AF_UNIX, fork and SCM_RIGHTS descriptor passing
+"""
+
+import array
+import hashlib
+import json
+import os
+import selectors
+import signal
+import socket
+import struct
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from common import find_repo_root
+
+
+# ============================================================
+# CONSTANTS
+# ============================================================
+
+DEFAULT_IDLE_TIMEOUT = 300  # seconds
+REQUEST_TIMEOUT = 5  # seconds to receive a request after connect
+
+_INT = struct.Struct("!i")
+_STDIO_FDS = (0, 1, 2)
+
+# Signals the client relays to the worker's process group
+FORWARDED_SIGNALS = ("SIGINT", "SIGTERM", "SIGHUP", "SIGQUIT")
+
+
+# ============================================================
+# LOCATION
+# ============================================================
+
+def is_supported() -> bool:
+    """Check whether this platform can pass file descriptors over sockets."""
+    return (hasattr(socket, "AF_UNIX")
+            and hasattr(socket, "SCM_RIGHTS")
+            and hasattr(os, "fork"))
+
+
+def get_socket_dir() -> Optional[str]:
+    """
+    Get the private directory holding daemon sockets.
+
+    Uses GITSL_DAEMON_DIR, then $XDG_RUNTIME_DIR/gitsl, then
+    $TMPDIR/gitsl-<uid>. Returns None if the directory is not owned by
+    us or is accessible to others, since a socket there could be hijacked.
+    """
+    path = os.environ.get("GITSL_DAEMON_DIR")
+    if not path:
+        runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+        if runtime_dir:
+            path = os.path.join(runtime_dir, "gitsl")
+        else:
+            tmp_dir = os.environ.get("TMPDIR", "/tmp")
+            path = os.path.join(tmp_dir, f"gitsl-{os.getuid()}")
+
+    try:
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        st = os.stat(path)
+    except OSError:
+        return None
+    if st.st_uid != os.getuid() or st.st_mode & 0o077:
+        return None
+    return path
+
+
+def _is_gitsl_module(filename: str) -> bool:
+    """Tell whether a file in gitsl's directory is one of its modules."""
+    name, ext = os.path.splitext(filename)
+    return ext == ".py" and (name in ("gitsl", "common") or name.startswith(("cmd_", "gitsl_")))
+
+
+def _code_signature() -> List[str]:
+    """Name, mtime and size of every gitsl module the server may have imported."""
+    code_dir = os.path.dirname(os.path.abspath(__file__))
+    signature = []
+    for filename in sorted(filter(_is_gitsl_module, os.listdir(code_dir))):
+        try:
+            st = os.stat(os.path.join(code_dir, filename))
+        except OSError:
+            continue
+        signature.append(f"{filename}:{st.st_mtime_ns}:{st.st_size}")
+    return signature
+
+
+def get_socket_path(repo_root: str) -> Optional[str]:
+    """
+    Get the socket path for a repository's server.
+
+    The name covers the repo root, the interpreter and the mtime and
+    size of every gitsl module, so an edited or upgraded gitsl never
+    talks to a server still running the old code.
+    """
+    socket_dir = get_socket_dir()
+    if socket_dir is None:
+        return None
+    key = "\0".join([repo_root, sys.executable] + _code_signature())
+    digest = hashlib.sha1(key.encode("utf-8", "surrogateescape")).hexdigest()[:16]
+    return os.path.join(socket_dir, f"{digest}.sock")
+
+
+def get_idle_timeout() -> float:
+    """Get idle shutdown timeout from GITSL_DAEMON_IDLE (seconds)."""
+    try:
+        return float(os.environ.get("GITSL_DAEMON_IDLE", DEFAULT_IDLE_TIMEOUT))
+    except ValueError:
+        return DEFAULT_IDLE_TIMEOUT
+
+
+# ============================================================
+# WIRE FORMAT
+# ============================================================
+
+def _recv_exact(sock: socket.socket, size: int) -> Optional[bytes]:
+    """Read exactly size bytes, or None if the peer closed early."""
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def _recv_int(sock: socket.socket) -> Optional[int]:
+    """Read one framed integer, or None if the peer closed early."""
+    data = _recv_exact(sock, _INT.size)
+    if data is None:
+        return None
+    return _INT.unpack(data)[0]
+
+
+def _send_request(sock: socket.socket, argv: List[str]) -> None:
+    """Send argv, cwd, environment and our stdio descriptors."""
+    payload = json.dumps({
+        "argv": argv,
+        "cwd": os.getcwd(),
+        "env": dict(os.environ),
+    }).encode("utf-8")
+    fds = array.array("i", _STDIO_FDS)
+    sock.sendmsg(
+        [_INT.pack(len(payload)) + payload],
+        [(socket.SOL_SOCKET, socket.SCM_RIGHTS, fds.tobytes())],
+    )
+
+
+def _recv_request(sock: socket.socket) -> Tuple[Optional[dict], List[int]]:
+    """Receive a request and the descriptors attached to it."""
+    fds = array.array("i")
+    header, ancdata, _flags, _addr = sock.recvmsg(
+        _INT.size, socket.CMSG_SPACE(len(_STDIO_FDS) * fds.itemsize))
+    for level, kind, data in ancdata:
+        if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+            fds.frombytes(data[:len(data) - (len(data) % fds.itemsize)])
+
+    if len(header) < _INT.size:
+        rest = _recv_exact(sock, _INT.size - len(header))
+        if rest is None:
+            return None, list(fds)
+        header += rest
+    payload = _recv_exact(sock, _INT.unpack(header)[0])
+    if payload is None or len(fds) != len(_STDIO_FDS):
+        return None, list(fds)
+    return json.loads(payload.decode("utf-8")), list(fds)
+
+
+# ============================================================
+# CLIENT
+# ============================================================
+
+def start_server(repo_root: str, socket_path: str) -> None:
+    """Start a detached server for repo_root listening on socket_path."""
+    import subprocess
+
+    subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "serve", repo_root, socket_path],
+        cwd=repo_root,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def run_client(argv: List[str]) -> Optional[int]:
+    """
+    Run a command through the repository's server.
+
+    Args:
+        argv: Command line arguments (without script name)
+
+    Returns:
+        Exit code from the worker, or None if the command should run
+        in-process instead (unsupported platform, outside a repository,
+        or no server running yet - in which case one is started).
+    """
+    if not is_supported():
+        return None
+
+    repo_root = find_repo_root()
+    if repo_root is None:
+        return None
+
+    socket_path = get_socket_path(repo_root)
+    if socket_path is None:
+        return None
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    with sock:
+        try:
+            sock.connect(socket_path)
+        except OSError:
+            start_server(repo_root, socket_path)
+            return None
+
+        try:
+            _send_request(sock, argv)
+            worker_pid = _recv_int(sock)
+        except OSError:
+            return None
+        # No worker was forked, so nothing ran: safe to run in-process
+        if worker_pid is None or worker_pid <= 0:
+            return None
+
+        def forward(signum, _frame):
+            try:
+                os.killpg(worker_pid, signum)
+            except OSError:
+                pass
+
+        for name in FORWARDED_SIGNALS:
+            signal.signal(getattr(signal, name), forward)
+
+        try:
+            exit_code = _recv_int(sock)
+        except OSError:
+            exit_code = None
+
+    if exit_code is None:
+        print("gitsl: lost connection to daemon", file=sys.stderr)
+        return 1
+    return exit_code
+
+
+# ============================================================
+# SERVER
+# ============================================================
+
+def _exit_code_from_status(status: int) -> int:
+    """Convert a waitpid status to a shell-style exit code."""
+    if os.WIFSIGNALED(status):
+        return 128 + os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+def _reopen_stdio() -> None:
+    """Rebind sys.std* to the descriptors inherited from the client."""
+    sys.stdin = open(0, "r", closefd=False)
+    sys.stdout = open(1, "w", closefd=False, buffering=1 if os.isatty(1) else -1)
+    sys.stderr = open(2, "w", closefd=False, buffering=1)
+
+
+def _run_worker(request: dict, fds: List[int]) -> None:
+    """Run one request in a forked worker. Never returns to the server loop."""
+    exit_code = 1
+    try:
+        # Own process group so the client can signal us and our sl children
+        os.setpgid(0, 0)
+        signal.set_wakeup_fd(-1)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+
+        for target, fd in zip(_STDIO_FDS, fds):
+            os.dup2(fd, target)
+            os.close(fd)
+        _reopen_stdio()
+
+        os.chdir(request["cwd"])
+        os.environ.clear()
+        os.environ.update(request["env"])
+
+        import gitsl
+        exit_code = gitsl.run(request["argv"])
+    except KeyboardInterrupt:
+        exit_code = 130
+    except SystemExit as e:
+        exit_code = e.code if isinstance(e.code, int) else 1
+    except BaseException:
+        import traceback
+        traceback.print_exc()
+    finally:
+        for stream in (sys.stdout, sys.stderr):
+            try:
+                stream.flush()
+            except Exception:
+                pass
+        # os._exit skips atexit hooks, so write the trace ourselves
+        from common import flush_trace
+        flush_trace()
+        os._exit(exit_code)
+
+
+def _acquire_lock(socket_path: str):
+    """Take the per-socket lock; returns the open lock file or None if held."""
+    import fcntl
+
+    lock_file = open(socket_path + ".lock", "a+")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    lock_file.seek(0)
+    lock_file.truncate()
+    lock_file.write(f"{os.getpid()}\n")
+    lock_file.flush()
+    return lock_file
+
+
+def _prewarm() -> None:
+    """Import every handler so forked workers start warm."""
+    import importlib
+    import gitsl
+
+    for module_name in gitsl.COMMANDS.values():
+        importlib.import_module(module_name)
+
+
+def serve(repo_root: str, socket_path: str, idle_timeout: float) -> int:
+    """
+    Serve requests on socket_path until idle for idle_timeout seconds.
+
+    Returns:
+        Exit code for the server process
+    """
+    lock_file = _acquire_lock(socket_path)
+    if lock_file is None:
+        return 0  # Another server owns this socket
+
+    _prewarm()
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen(32)
+    listener.setblocking(False)
+    socket_inode = os.stat(socket_path).st_ino
+
+    # Wake the selector when a worker exits
+    wake_r, wake_w = os.pipe()
+    os.set_blocking(wake_r, False)
+    os.set_blocking(wake_w, False)
+    signal.set_wakeup_fd(wake_w)
+    signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+
+    selector = selectors.DefaultSelector()
+    selector.register(listener, selectors.EVENT_READ, "accept")
+    selector.register(wake_r, selectors.EVENT_READ, "wake")
+    workers: Dict[int, socket.socket] = {}
+
+    def finish(pid: int, exit_code: Optional[int]) -> None:
+        conn = workers.pop(pid)
+        try:
+            selector.unregister(conn)
+        except KeyError:
+            pass
+        if exit_code is not None:
+            try:
+                conn.sendall(_INT.pack(exit_code))
+            except OSError:
+                pass
+        conn.close()
+
+    try:
+        while True:
+            events = selector.select(None if workers else idle_timeout)
+            if not events and not workers:
+                break  # Idle
+
+            for key, _mask in events:
+                if key.data == "accept":
+                    try:
+                        conn, _addr = listener.accept()
+                    except (BlockingIOError, InterruptedError):
+                        continue
+                    conn.setblocking(True)
+                    conn.settimeout(REQUEST_TIMEOUT)
+                    try:
+                        request, fds = _recv_request(conn)
+                    except (OSError, ValueError):
+                        request, fds = None, []
+                    if request is None:
+                        for fd in fds:
+                            os.close(fd)
+                        conn.close()
+                        continue
+
+                    pid = os.fork()
+                    if pid == 0:
+                        selector.close()
+                        listener.close()
+                        os.close(wake_r)
+                        os.close(wake_w)
+                        for other in workers.values():
+                            other.close()
+                        conn.close()
+                        _run_worker(request, fds)
+
+                    for fd in fds:
+                        os.close(fd)
+                    conn.settimeout(None)
+                    workers[pid] = conn
+                    selector.register(conn, selectors.EVENT_READ, pid)
+                    try:
+                        conn.sendall(_INT.pack(pid))
+                    except OSError:
+                        pass
+
+                elif key.data == "wake":
+                    try:
+                        while os.read(wake_r, 512):
+                            pass
+                    except BlockingIOError:
+                        pass
+
+                elif key.data in workers:
+                    # Client readable before we replied: it went away
+                    try:
+                        gone = not key.fileobj.recv(1)
+                    except OSError:
+                        gone = True
+                    if gone:
+                        try:
+                            os.killpg(key.data, signal.SIGTERM)
+                        except OSError:
+                            pass
+                        # Stop watching; the reaper still closes it
+                        selector.unregister(key.fileobj)
+
+            # Reap finished workers and report their exit codes
+            while workers:
+                try:
+                    pid, status = os.waitpid(-1, os.WNOHANG)
+                except ChildProcessError:
+                    break
+                if pid == 0:
+                    break
+                if pid in workers:
+                    finish(pid, _exit_code_from_status(status))
+    finally:
+        try:
+            if os.stat(socket_path).st_ino == socket_inode:
+                os.unlink(socket_path)
+        except OSError:
+            pass
+        listener.close()
+        lock_file.close()
+
+    return 0
+
+
+def main(argv: List[str]) -> int:
+    """Entry point for the server process: serve <repo_root> <socket_path>."""
+    if len(argv) != 3 or argv[0] != "serve":
+        print("usage: gitsl_daemon.py serve <repo-root> <socket-path>", file=sys.stderr)
+        return 1
+    return serve(argv[1], argv[2], get_idle_timeout())
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
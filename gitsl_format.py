@@ -0,0 +1,139 @@
+"""
+Git pretty-format strings compiled to Sapling templates.
+
+Used by 'git log' and 'git show' for --pretty=format:<fmt> and
+--format=<fmt>. A format is tokenized in one regex pass and every piece
+becomes part of a single sl template, so sl renders the whole output
+itself. Compiled templates are cached, since tools tend to pass the same
+format on every call.
+
+Sapling keeps one identity and one date per commit, so the committer
+placeholders (%c*) show the author's. Sapling has no tree objects; %T and
+%t show the manifest hash, which plays the same role. Colour placeholders
+are dropped. Unknown placeholders are printed as-is, like git does.
+"""
+
+import functools
+import re
+from typing import List, Optional
+
+
+# Placeholder (without '%') -> sl template expression (without braces)
+PLACEHOLDERS = {
+    # Commit, tree and parent hashes
+    'H': 'node',
+    'h': 'node|short',
+    'T': 'manifest',
+    't': 'manifest|short',
+    'P': "join(parents % '{node}', ' ')",
+    'p': "join(parents % '{node|short}', ' ')",
+    # Author
+    'an': 'author|person',
+    'aN': 'author|person',
+    'ae': 'author|email',
+    'aE': 'author|email',
+    'al': 'author|emailuser',
+    'aL': 'author|emailuser',
+    'ad': 'date|isodate',
+    'aD': 'date|rfc822date',
+    'ai': 'date|isodatesec',
+    'aI': 'date|rfc3339date',
+    'as': 'date|shortdate',
+    'ar': 'date|age',
+    'at': 'word(0, date|hgdate)',
+    # Committer (Sapling records the author only)
+    'cn': 'author|person',
+    'cN': 'author|person',
+    'ce': 'author|email',
+    'cE': 'author|email',
+    'cl': 'author|emailuser',
+    'cL': 'author|emailuser',
+    'cd': 'date|isodate',
+    'cD': 'date|rfc822date',
+    'ci': 'date|isodatesec',
+    'cI': 'date|rfc3339date',
+    'cs': 'date|shortdate',
+    'cr': 'date|age',
+    'ct': 'word(0, date|hgdate)',
+    # Message and refs
+    's': 'desc|firstline',
+    'b': 'desc',
+    'B': 'desc',
+    'd': 'bookmarks',
+    'D': 'bookmarks',
+}
+
+# Placeholders that expand to fixed template text
+LITERAL_PLACEHOLDERS = {
+    'n': '\\n',
+    '%': '%',
+}
+
+# One alternative per token kind; longest placeholder names first so that
+# e.g. '%an' is never read as '%a' followed by 'n'
+_TOKEN = re.compile(
+    r"%(?:"
+    r"(?P<align>[<>])\((?P<width>\d+)(?:,(?:trunc|ltrunc|mtrunc))?\)"
+    r"|x(?P<hex>[0-9a-fA-F]{2})"
+    r"|C(?:\([^)]*\)|red|green|blue|reset)"
+    r"|(?P<name>"
+    + "|".join(re.escape(name) for name in sorted(
+        list(PLACEHOLDERS) + list(LITERAL_PLACEHOLDERS), key=len, reverse=True))
+    + r")"
+    r")"
+    # Characters that are special in sl templates, escaped as literals
+    r"|(?P<special>[{\\])"
+)
+
+
+@functools.lru_cache(maxsize=256)
+def compile_format(git_format: str) -> str:
+    """
+    Compile a git pretty-format string into an sl template.
+
+    %<(N) and %>(N) pad the next placeholder to N columns (on the right
+    and on the left, respectively); truncation variants pad only. Like
+    git's tformat, every entry ends with a newline, unless the format
+    already ends with %n.
+
+    Args:
+        git_format: The format, without a 'format:' prefix
+
+    Returns:
+        The sl template, ready for 'sl log -T'
+    """
+    pieces: List[str] = []
+    pad: Optional[str] = None
+    ends_with_newline = False
+    pos = 0
+    for match in _TOKEN.finditer(git_format):
+        if match.start() > pos:
+            pieces.append(git_format[pos:match.start()])
+            ends_with_newline = False
+        pos = match.end()
+
+        name = match.group('name')
+        if match.group('special') is not None:
+            pieces.append('\\' + match.group('special'))
+        elif match.group('align') is not None:
+            width = match.group('width')
+            pad = f", {width}, ' ', True" if match.group('align') == '>' else f", {width}"
+            continue
+        elif match.group('hex') is not None:
+            pieces.append('\\x' + match.group('hex').lower())
+        elif name in LITERAL_PLACEHOLDERS:
+            pieces.append(LITERAL_PLACEHOLDERS[name])
+        elif name is not None:
+            expression = PLACEHOLDERS[name]
+            if pad is not None:
+                expression = f"pad({expression}{pad})"
+                pad = None
+            pieces.append('{' + expression + '}')
+        ends_with_newline = name == 'n'
+
+    if pos < len(git_format):
+        pieces.append(git_format[pos:])
+        ends_with_newline = False
+    if not ends_with_newline:
+        pieces.append('\\n')
+    return ''.join(pieces)
@@ -0,0 +1,418 @@
+"""
+Native working-copy grep for 'git grep' (GITSL_GREP_ENGINE=native).
+
+sl grep searches on a single core. This engine takes the tracked file
+list from 'sl files' (cached on disk until the working copy's file set
+changes), searches the files in parallel worker processes through
+mmap'ed reads, and prints git grep's output with paths in sorted order,
+so the result is the same however the work was split.
+
+It handles the options cmd_grep maps for sl grep: -i, -w, -F, -n, -l
+and -A/-B/-C. Patterns are POSIX basic regular expressions, like sl
+grep's, translated to Python's syntax (see translate_bre). Binary
+files (a NUL byte near the start) are reported as 'Binary file <path>
+matches', like git does.
+"""
+
+import functools
+import mmap
+import os
+import posixpath
+import re
+import sys
+from typing import BinaryIO, Iterable, Iterator, List, NamedTuple, Optional, Pattern, Tuple
+
+from common import find_repo_root, query_sl_cached_bytes
+
+
+# Tracked file list, cached in the repository's metadata directory
+FILE_LIST_QUERY = ["files", "-0"]
+FILE_LIST_CACHE = "gitsl-files.cache"
+
+# Fewer files than this are searched in this process: starting workers
+# would cost more than it saves
+PARALLEL_MIN_FILES = 512
+
+# Files per worker task: small enough to balance uneven files across
+# workers, large enough to keep task overhead low
+MAX_CHUNK_FILES = 256
+
+# Bytes checked for NUL to tell binary files apart (as git does)
+BINARY_CHECK_BYTES = 8000
+
+# Bytes read out of a map at a time to count the lines before a match (-n)
+COUNT_CHUNK_BYTES = 1 << 20
+
+
+class GrepOptions(NamedTuple):
+    """Search options, passed to worker processes."""
+    pattern: bytes            # regular expression source
+    flags: int                # re flags (re.IGNORECASE)
+    line_numbers: bool        # -n
+    files_only: bool          # -l
+    before: int               # -B (and -C)
+    after: int                # -A (and -C)
+
+
+# ============================================================
+# PATTERNS
+# ============================================================
+
+# POSIX bracket classes -> Python set contents (bytes patterns are ASCII)
+_BRACKET_CLASSES = {
+    "alpha": "a-zA-Z",
+    "digit": "0-9",
+    "alnum": "a-zA-Z0-9",
+    "upper": "A-Z",
+    "lower": "a-z",
+    "xdigit": "0-9A-Fa-f",
+    "space": " \\t\\n\\r\\f\\v",
+    "blank": " \\t",
+    "punct": re.escape("!\"#$%&'()*+,-./:;<=>?@[\\]^_`{|}~"),
+    "cntrl": "\\x00-\\x1f\\x7f",
+    "print": "\\x20-\\x7e",
+    "graph": "\\x21-\\x7e",
+}
+
+# After '\\' in a BRE: operators (GNU extensions) and escapes Python shares
+_BRE_OPERATORS = set("(){}|+?")
+_BRE_SHARED_ESCAPES = set("123456789wWsSbB")
+
+
+def translate_bre(pattern: str) -> Optional[str]:
+    """
+    Translate a POSIX basic regular expression (grep's default) to Python syntax.
+
+    In a BRE, '(', ')', '{', '}', '|', '+' and '?' are literals and their
+    backslashed forms are operators; '*' is literal where nothing precedes
+    it; '^' and '$' anchor only at the ends of the pattern or of a group
+    or alternative; bracket expressions take POSIX classes and treat '\\'
+    literally.
+
+    Returns:
+        The Python pattern, or None for constructs without a translation
+    """
+    out: List[str] = []
+    i, n = 0, len(pattern)
+    at_start = True         # where '*' is literal and '^' anchors
+    while i < n:
+        c = pattern[i]
+        i += 1
+        start, at_start = at_start, False
+        if c == "\\":
+            if i == n:
+                return None
+            c = pattern[i]
+            i += 1
+            if c in _BRE_OPERATORS:
+                out.append(c)
+                at_start = c in "(|"
+            elif c in _BRE_SHARED_ESCAPES:
+                out.append("\\" + c)
+            elif c.isalnum() or c in "<>`'":
+                # Unknown or GNU-specific escape
+                return None
+            else:
+                out.append(re.escape(c))
+        elif c == "[":
+            end = i
+            if end < n and pattern[end] == "^":
+                end += 1
+            if end < n and pattern[end] == "]":
+                end += 1
+            members = []
+            while end < n and pattern[end] != "]":
+                if pattern.startswith("[:", end):
+                    close = pattern.find(":]", end + 2)
+                    name = pattern[end + 2:close] if close != -1 else None
+                    if name not in _BRACKET_CLASSES:
+                        return None
+                    members.append(_BRACKET_CLASSES[name])
+                    end = close + 2
+                    continue
+                if pattern.startswith(("[=", "[."), end):
+                    return None
+                member = pattern[end]
+                members.append("\\" + member if member in "\\[]&~|^" else member)
+                end += 1
+            if end == n:
+                return None
+            negate = pattern[i] == "^"
+            first = i + 1 if negate else i
+            if pattern[first] == "]":
+                members.insert(0, "\\]")
+            out.append("[" + ("^" if negate else "") + "".join(members) + "]")
+            i = end + 1
+        elif c == "*" and start:
+            out.append("\\*")
+        elif c == "^" and start:
+            out.append("^")
+            at_start = True
+        elif c == "$" and (i == n or pattern.startswith(("\\)", "\\|"), i)):
+            out.append("$")
+        elif c in ".*":
+            out.append(c)
+        else:
+            out.append(re.escape(c))
+    return "".join(out)
+
+
+def pattern_source(pattern: str, ignore_case: bool, word: bool,
+                   fixed: bool) -> Optional[Tuple[bytes, int]]:
+    """
+    Return the Python regex source and flags for a grep pattern and its -i/-w/-F options.
+
+    Patterns are basic regular expressions, as for sl grep, unless -F
+    makes them literal. None if the pattern cannot be translated.
+    """
+    source = re.escape(pattern) if fixed else translate_bre(pattern)
+    if source is None:
+        return None
+    if word:
+        source = rf"\b(?:{source})\b"
+    return source.encode(), re.IGNORECASE if ignore_case else 0
+
+
+def compile_pattern(pattern: str, ignore_case: bool, word: bool, fixed: bool) -> Optional[Pattern[bytes]]:
+    """Compile a grep pattern the way -i/-w/-F ask for, or None if it is invalid or untranslatable."""
+    return compile_source(pattern_source(pattern, ignore_case, word, fixed))
+
+
+def compile_source(source: Optional[Tuple[bytes, int]]) -> Optional[Pattern[bytes]]:
+    """Compile a pattern_source result, or None if there is none or it is invalid."""
+    if source is None:
+        return None
+    try:
+        return re.compile(*source)
+    except re.error:
+        return None
+
+
+@functools.lru_cache(maxsize=8)
+def _regex(source: bytes, flags: int) -> Pattern[bytes]:
+    # MULTILINE so that '^' and '$' also anchor at lines when a whole file
+    # is searched at once
+    return re.compile(source, flags | re.MULTILINE)
+
+
+# ============================================================
+# FILE SELECTION
+# ============================================================
+
+def select_files(listing: bytes, root: str, cwd: str, pathspecs: List[str]) -> List[Tuple[bytes, bytes]]:
+    """
+    Pick the tracked files to search, as git grep would.
+
+    Without pathspecs that is every file below the current directory;
+    otherwise every file named by, or below a directory named by, a
+    pathspec (relative to the current directory).
+
+    Args:
+        listing: NUL-separated tracked files, relative to the root
+        root: Repository root
+        cwd: Current directory
+        pathspecs: Path arguments given after the pattern
+
+    Returns:
+        (display path, file system path) pairs, sorted by display path
+    """
+    base = os.fsencode(os.path.relpath(cwd, root)).replace(os.sep.encode(), b"/")
+    if base == b".":
+        base = b""
+    prefixes = []
+    for spec in pathspecs or ["."]:
+        spec = posixpath.normpath(posixpath.join(base, os.fsencode(spec).replace(os.sep.encode(), b"/")))
+        prefixes.append(b"" if spec == b"." else spec)
+
+    root_bytes = os.fsencode(root)
+    selected = []
+    for path in listing.split(b"\0"):
+        if not path:
+            continue
+        if not any(not prefix or path == prefix or path.startswith(prefix + b"/")
+                   for prefix in prefixes):
+            continue
+        if not base:
+            display = path
+        elif path.startswith(base + b"/"):
+            display = path[len(base) + 1:]
+        else:
+            display = posixpath.relpath(path, base)
+        selected.append((display, os.path.join(root_bytes, path)))
+    selected.sort()
+    return selected
+
+
+# ============================================================
+# SEARCH
+# ============================================================
+
+def _line_end(data: mmap.mmap, start: int) -> int:
+    """Offset of the newline ending the line at start (or the end of data)."""
+    end = data.find(b"\n", start)
+    return len(data) if end == -1 else end
+
+
+def _count_newlines(data: mmap.mmap, start: int, end: int) -> int:
+    """Newlines in data[start:end], read a chunk at a time."""
+    count = 0
+    for chunk_start in range(start, end, COUNT_CHUNK_BYTES):
+        count += data[chunk_start:min(end, chunk_start + COUNT_CHUNK_BYTES)].count(b"\n")
+    return count
+
+
+def _matching_lines(data: mmap.mmap, regex: Pattern[bytes]) -> Iterator[Tuple[int, int]]:
+    """
+    Yield the (start, end) offsets of the lines a pattern matches.
+
+    The mmap is searched in place; a match spanning lines (e.g.
+    'foo\\sbar') does not count, so each candidate line is searched again
+    on its own.
+    """
+    size = len(data)
+    pos = 0
+    while pos < size:
+        m = regex.search(data, pos)
+        if m is None or (m.start() == size and data[size - 1:] == b"\n"):
+            return
+        start = data.rfind(b"\n", 0, m.start()) + 1
+        end = _line_end(data, start)
+        if regex.search(data, start, end) is not None:
+            yield start, end
+        pos = end + 1
+
+
+def search_file(display: bytes, path: bytes, options: GrepOptions) -> List[bytes]:
+    """
+    Search one file.
+
+    The file is searched through mmap without copying it; only matching
+    and context lines are read out of the map. A file matches only if a
+    single line does.
+
+    Returns:
+        Output groups (runs of adjacent lines, each ready to print); empty
+        if nothing matched
+    """
+    regex = _regex(options.pattern, options.flags)
+    if os.path.islink(path):
+        return []
+    try:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return _search_map(display, data, regex, options)
+    except (OSError, ValueError):
+        # Missing from the working copy, unreadable, or not a regular file
+        return []
+
+
+def _search_map(display: bytes, data: mmap.mmap, regex: Pattern[bytes],
+                options: GrepOptions) -> List[bytes]:
+    """search_file on a mapped, non-empty file."""
+    matches = _matching_lines(data, regex)
+    if options.files_only or b"\0" in data[:BINARY_CHECK_BYTES]:
+        if next(matches, None) is None:
+            return []
+        if options.files_only:
+            return [display + b"\n"]
+        return [b"Binary file " + display + b" matches\n"]
+
+    # Runs of lines to print, as (start, end) offsets, with their matches
+    size = len(data)
+    ranges: List[List[int]] = []
+    matched = set()
+    for start, end in matches:
+        matched.add(start)
+        for _ in range(options.before):
+            if start == 0:
+                break
+            start = data.rfind(b"\n", 0, start - 1) + 1
+        for _ in range(options.after):
+            if end + 1 >= size:
+                break
+            end = _line_end(data, end + 1)
+        if ranges and start <= ranges[-1][1] + 1:
+            ranges[-1][1] = max(ranges[-1][1], end)
+        else:
+            ranges.append([start, end])
+
+    groups = []
+    number, counted_to = 1, 0
+    for start, end in ranges:
+        if options.line_numbers:
+            number += _count_newlines(data, counted_to, start)
+            counted_to = start
+        out = []
+        offset = start
+        for line in data[start:end].split(b"\n"):
+            separator = b":" if offset in matched else b"-"
+            prefix = b"%d%s" % (number, separator) if options.line_numbers else b""
+            out.append(display + separator + prefix + line + b"\n")
+            offset += len(line) + 1
+            if options.line_numbers:
+                number += 1
+        if options.line_numbers:
+            counted_to = offset
+        groups.append(b"".join(out))
+    return groups
+
+
+def search_files(files: List[Tuple[bytes, bytes]], options: GrepOptions) -> List[bytes]:
+    """Search a chunk of files (one worker task); return their output groups in order."""
+    groups = []
+    for display, path in files:
+        groups.extend(search_file(display, path, options))
+    return groups
+
+
+def grep_working_copy(args: List[str], options: GrepOptions, pathspecs: List[str]) -> int:
+    """
+    Search the tracked files of the working copy and print git grep's output.
+
+    Args:
+        args: The sl query listing tracked files (FILE_LIST_QUERY)
+        options: What to search for and how to print it
+        pathspecs: Path arguments limiting the search
+
+    Returns:
+        0 if anything matched, 1 if not, or sl's exit code if the file
+        list could not be read
+    """
+    result = query_sl_cached_bytes(args, FILE_LIST_CACHE)
+    if result.returncode != 0:
+        sys.stderr.buffer.write(result.stderr)
+        sys.stderr.flush()
+        return result.returncode
+    files = select_files(result.stdout, find_repo_root(), os.getcwd(), pathspecs)
+
+    workers = os.cpu_count() or 1
+    chunk_size = max(1, min(MAX_CHUNK_FILES, -(-len(files) // (workers * 4))))
+    chunks = [files[i:i + chunk_size] for i in range(0, len(files), chunk_size)]
+    search = functools.partial(search_files, options=options)
+
+    sys.stdout.flush()
+    out = sys.stdout.buffer
+    context = bool(options.before or options.after) and not options.files_only
+    if workers == 1 or len(files) < PARALLEL_MIN_FILES:
+        return _write_groups(out, map(search, chunks), context)
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # map() yields in submission order, so output stays sorted
+        return _write_groups(out, executor.map(search, chunks), context)
+
+
+def _write_groups(out: BinaryIO, results: Iterable[List[bytes]], context: bool) -> int:
+    """Write output groups, '--' between them with context; return the exit code."""
+    first = True
+    for groups in results:
+        for group in groups:
+            if context and not first:
+                out.write(b"--\n")
+            out.write(group)
+            first = False
+    out.flush()
+    return 1 if first else 0
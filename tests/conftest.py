@@ -2,15 +2,23 @@
 Shared test fixtures for gitsl E2E testing.
 """
 
+import json
+import os
 import sys
+import time
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterable, List, Optional
 
 import pytest
 
 from helpers.commands import CommandResult, run_command
 
 
+PROJECT_ROOT = Path(__file__).parent.parent
+GITSL = PROJECT_ROOT / "gitsl.py"
+MOCK_DIR = Path(__file__).parent / "mocks"
+
+
 # ============================================================
 # GIT COMMAND HELPERS
 # ============================================================
@@ -45,10 +53,75 @@ def run_gitsl(args: List[str], cwd: Path, env: Optional[dict] = None) -> Command
     Returns:
         CommandResult with captured output
     """
-    # Get path to gitsl.py relative to tests directory
-    gitsl_path = Path(__file__).parent.parent / "gitsl.py"
     # Use sys.executable to run with same Python interpreter as tests
-    return run_command([sys.executable, str(gitsl_path)] + args, cwd=cwd, env=env)
+    return run_command([sys.executable, str(GITSL)] + args, cwd=cwd, env=env)
+
+
+# ============================================================
+# MOCK SL HELPERS
+# ============================================================
+
+# What 'sl log -r .' answers for gitsl's head query: bookmark, node,
+# short node and phase
+HEAD_OUTPUT = "main\n" + "a" * 40 + "\n" + "a" * 12 + "\ndraft"
+HEAD_RULE = {"argv": ["log", "-r", "."], "stdout": HEAD_OUTPUT}
+
+
+def mock_sl_env(log: Optional[Path] = None, responses: Optional[Path] = None,
+                **extra: str) -> dict:
+    """
+    Environment that puts the mock sl (tests/mocks/sl) first on PATH.
+
+    Args:
+        log: File the mock logs each invocation to (MOCK_SL_LOG)
+        responses: Rules file with per-argv answers (MOCK_SL_RESPONSES)
+        **extra: Further variables, e.g. MOCK_SL_STDOUT or GITSL_CACHE
+
+    Returns:
+        Variables to merge into the environment of a gitsl run
+    """
+    env = {"PATH": str(MOCK_DIR) + os.pathsep + os.environ.get("PATH", "")}
+    if log is not None:
+        env["MOCK_SL_LOG"] = str(log)
+    if responses is not None:
+        env["MOCK_SL_RESPONSES"] = str(responses)
+    env.update(extra)
+    return env
+
+
+def write_responses(path: Path, rules: Iterable[dict]) -> Path:
+    """Write mock sl rules ({"argv": [...], "stdout": ...}) to path; return it."""
+    path.write_text(json.dumps(list(rules)))
+    return path
+
+
+def rules_env(directory: Path, rules: Iterable[dict] = (), **extra: str) -> dict:
+    """
+    mock_sl_env answering by rules, with gitsl's state cache off.
+
+    The rules are written to directory/responses.json and the mock logs
+    its invocations to directory/sl.log.
+    """
+    responses = write_responses(directory / "responses.json", rules)
+    return mock_sl_env(directory / "sl.log", responses, **{"GITSL_CACHE": "0", **extra})
+
+
+def read_sl_log(log: Path) -> List[dict]:
+    """Invocations the mock sl logged (argv, via, time, ...); empty if it never ran."""
+    if not log.exists():
+        return []
+    return [json.loads(line) for line in log.read_text().splitlines()]
+
+
+def sl_argvs(log: Path) -> List[List[str]]:
+    """argv of every logged mock sl invocation, in order."""
+    return [entry["argv"] for entry in read_sl_log(log)]
+
+
+def age(path: Path, seconds: float = 60) -> None:
+    """Backdate a file so it is outside the racy-timestamp window."""
+    past = time.time() - seconds
+    os.utime(path, (past, past))
 
 
 # ============================================================
@@ -190,3 +263,49 @@ def sl_repo_with_commits(sl_repo: Path) -> Path:
         run_command(["sl", "commit", "-m", f"Commit {i}"], cwd=sl_repo)
 
     return sl_repo
+
+
+# ============================================================
+# FAKE CHECKOUT FIXTURES
+# ============================================================
+
+
+@pytest.fixture
+def sl_log(tmp_path: Path) -> Path:
+    """Where the mock sl logs its invocations (see mock_env)."""
+    return tmp_path / "sl.log"
+
+
+@pytest.fixture
+def mock_env(sl_log: Path) -> dict:
+    """Environment running the mock sl and logging its calls to sl_log."""
+    return mock_sl_env(sl_log)
+
+
+@pytest.fixture
+def fake_repo(tmp_path: Path) -> Path:
+    """
+    A directory that looks like a Sapling checkout to repo discovery.
+
+    Only the .sl marker exists; pair it with the mock sl.
+
+    Returns:
+        Path to the checkout (tmp_path/repo)
+    """
+    repo = tmp_path / "repo"
+    (repo / ".sl").mkdir(parents=True)
+    return repo
+
+
+@pytest.fixture
+def settled_repo(fake_repo: Path) -> Path:
+    """
+    A fake checkout whose state files settled a minute ago.
+
+    Answers tied to its state signature are cached by the state cache.
+    """
+    for name in ("dirstate", "bookmarks.current"):
+        state_file = fake_repo / ".sl" / name
+        state_file.write_text("state")
+        age(state_file)
+    return fake_repo
@@ -0,0 +1,199 @@
+"""
+Tests for batch mode (gitsl --batch).
+
+Uses the mock sl (tests/mocks/sl) and a fake .sl checkout, so no real
+Sapling installation is needed.
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import List, Tuple
+
+import pytest
+
+from conftest import GITSL, HEAD_OUTPUT, age, mock_sl_env, read_sl_log, run_gitsl, write_responses
+
+
+pytestmark = pytest.mark.batch
+
+def run_batch(repo: Path, data: bytes, args: List[str] = None, **env_vars):
+    """Feed data to 'gitsl --batch' with mock sl on PATH."""
+    env = os.environ.copy()
+    env.update(mock_sl_env(**{"GITSL_CACHE": "0", **env_vars}))
+    return subprocess.run(
+        [sys.executable, str(GITSL), "--batch"] + (args or []),
+        cwd=repo, env=env, input=data, capture_output=True,
+    )
+
+
+def read_frame(stream) -> Tuple[int, bytes, bytes]:
+    """Read one (exit code, stdout, stderr) frame from a running batch."""
+    exit_code, out_len, err_len = (int(field) for field in stream.readline().split())
+    body = stream.read(out_len + err_len + 1)
+    assert body[-1:] == b"\n"
+    return exit_code, body[:out_len], body[out_len:out_len + err_len]
+
+
+def parse_frames(output: bytes) -> List[Tuple[int, bytes, bytes]]:
+    """Split batch output into (exit code, stdout, stderr) frames."""
+    frames = []
+    while output:
+        header, output = output.split(b"\n", 1)
+        exit_code, out_len, err_len = (int(field) for field in header.split())
+        stdout = output[:out_len]
+        stderr = output[out_len:out_len + err_len]
+        assert output[out_len + err_len:out_len + err_len + 1] == b"\n"
+        output = output[out_len + err_len + 1:]
+        frames.append((exit_code, stdout, stderr))
+    return frames
+
+
+class TestBatchFraming:
+    """Each command line produces one framed result."""
+
+    def test_runs_each_line(self, fake_repo: Path):
+        """Commands run in order; a leading 'git' is optional."""
+        (fake_repo / "sub").mkdir()
+        result = run_batch(
+            fake_repo / "sub",
+            b"rev-parse --show-toplevel\ngit rev-parse --show-prefix\n",
+        )
+        assert result.returncode == 0, result.stderr
+        assert parse_frames(result.stdout) == [
+            (0, str(fake_repo).encode() + b"\n", b""),
+            (0, b"sub/\n", b""),
+        ]
+
+    def test_skips_empty_lines_and_accepts_missing_newline(self, fake_repo: Path):
+        """Blank lines are ignored and a final unterminated line still runs."""
+        result = run_batch(fake_repo, b"\n\nrev-parse --is-inside-work-tree")
+        assert parse_frames(result.stdout) == [(0, b"true\n", b"")]
+
+    def test_nul_terminated_input(self, fake_repo: Path):
+        """-z reads NUL-terminated command lines, newlines included."""
+        result = run_batch(
+            fake_repo,
+            b"rev-parse --symbolic 'two\nlines'\0rev-parse --symbolic x\0",
+            args=["-z"],
+        )
+        assert parse_frames(result.stdout) == [
+            (0, b"two\nlines\n", b""),
+            (0, b"x\n", b""),
+        ]
+
+    def test_unparseable_line_reports_and_continues(self, fake_repo: Path):
+        """Unbalanced quotes give an error frame; later commands still run."""
+        result = run_batch(fake_repo, b"rev-parse --symbolic 'oops\nrev-parse --symbolic ok\n")
+        frames = parse_frames(result.stdout)
+        assert frames[0][0] == 128
+        assert b"cannot parse" in frames[0][2]
+        assert frames[1] == (0, b"ok\n", b"")
+
+    def test_unknown_option(self, fake_repo: Path):
+        """Options other than -z are rejected."""
+        result = run_batch(fake_repo, b"", args=["--bogus"])
+        assert result.returncode == 1
+        assert b"usage: gitsl --batch" in result.stderr
+
+
+class TestBatchCapture:
+    """Output of handlers and of the sl processes they run is framed."""
+
+    def test_captures_sl_output_and_exit_code(self, fake_repo: Path):
+        """A failing sl passthrough reports its stdout, stderr and exit code."""
+        result = run_batch(
+            fake_repo, b"diff\n",
+            MOCK_SL_STDOUT="partial", MOCK_SL_STDERR="abort: broken", MOCK_SL_EXIT="3",
+        )
+        assert parse_frames(result.stdout) == [(3, b"partial\n", b"abort: broken\n")]
+
+    def test_transformed_output(self, fake_repo: Path):
+        """Streamed status transforms are captured like any other output."""
+        result = run_batch(
+            fake_repo, b"status --porcelain\nstatus --short\n",
+            MOCK_SL_STDOUT="M a.txt\n? new.txt",
+        )
+        expected = b" M a.txt\n?? new.txt\n"
+        assert parse_frames(result.stdout) == [(0, expected, b""), (0, expected, b"")]
+
+
+class TestBatchQueries:
+    """Read-only queries are never reused across the commands of one batch."""
+
+    def test_each_command_asks_again(self, fake_repo: Path, tmp_path: Path):
+        """Without the state cache, every command's HEAD lookup reaches sl."""
+        log = tmp_path / "sl.log"
+        result = run_batch(
+            fake_repo,
+            b"rev-parse --abbrev-ref HEAD\nrev-parse --short HEAD\nbranch --show-current\n",
+            MOCK_SL_STDOUT=HEAD_OUTPUT, MOCK_SL_LOG=str(log),
+        )
+        assert [frame[1] for frame in parse_frames(result.stdout)] == [
+            b"main\n", b"aaaaaaa\n", b"main\n",
+        ]
+        queries = [entry for entry in read_sl_log(log) if entry["argv"][:1] == ["log"]]
+        assert len(queries) == 3
+
+    def test_state_cache_shares_answers(self, settled_repo: Path, tmp_path: Path):
+        """With settled repository state, the on-disk cache answers later commands."""
+        log = tmp_path / "sl.log"
+        result = run_batch(
+            settled_repo,
+            b"rev-parse --abbrev-ref HEAD\nrev-parse --short HEAD\nbranch --show-current\n",
+            MOCK_SL_STDOUT=HEAD_OUTPUT, MOCK_SL_LOG=str(log), GITSL_CACHE="1",
+        )
+        assert [frame[1] for frame in parse_frames(result.stdout)] == [
+            b"main\n", b"aaaaaaa\n", b"main\n",
+        ]
+        queries = [entry for entry in read_sl_log(log) if entry["argv"][:1] == ["log"]]
+        assert len(queries) == 1
+
+    def test_external_change_is_seen(self, settled_repo: Path, tmp_path: Path):
+        """A bookmark switch made outside the batch shows up in the next command."""
+        dirstate = settled_repo / ".sl" / "dirstate"
+        age(dirstate, 120)
+        answer = tmp_path / "head.out"
+        answer.write_text(HEAD_OUTPUT)
+        responses = write_responses(tmp_path / "responses.json",
+                                    [{"argv": ["log"], "stdout_file": str(answer)}])
+
+        env = os.environ.copy()
+        env.update(mock_sl_env(responses=responses))
+        proc = subprocess.Popen(
+            [sys.executable, str(GITSL), "--batch"], cwd=settled_repo, env=env,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+        )
+        try:
+            proc.stdin.write(b"rev-parse --abbrev-ref HEAD\n")
+            proc.stdin.flush()
+            assert read_frame(proc.stdout) == (0, b"main\n", b"")
+
+            # 'sl goto feature' in another process
+            answer.write_text(HEAD_OUTPUT.replace("main", "feature", 1))
+            dirstate.write_text("moved")
+            age(dirstate, 60)
+
+            proc.stdin.write(b"rev-parse --abbrev-ref HEAD\n")
+            proc.stdin.flush()
+            assert read_frame(proc.stdout) == (0, b"feature\n", b"")
+        finally:
+            proc.stdin.close()
+            proc.wait()
+
+        # The refreshed answer is what the state cache now holds
+        result = run_gitsl(["rev-parse", "--abbrev-ref", "HEAD"], cwd=settled_repo, env=env)
+        assert result.stdout == "feature\n"
+
+    def test_queries_use_command_server(self, fake_repo: Path, tmp_path: Path):
+        """Batch mode routes queries through a command server."""
+        log = tmp_path / "sl.log"
+        result = run_batch(
+            fake_repo, b"rev-parse --abbrev-ref HEAD\n",
+            MOCK_SL_STDOUT=HEAD_OUTPUT, MOCK_SL_LOG=str(log), MOCK_SL_CMDSERVER="1",
+        )
+        assert parse_frames(result.stdout) == [(0, b"main\n", b"")]
+        entries = read_sl_log(log)
+        # Served queries carry --cwd ahead of the command
+        assert [e["via"] for e in entries if "log" in e["argv"]] == ["cmdserver"]
@@ -0,0 +1,184 @@
+"""
+Tests for git cat-file.
+
+Uses the mock sl with per-command responses and a fake .sl checkout, so
+no real Sapling installation is needed. Blob ids are checked against real
+git's 'git hash-object'.
+"""
+
+import hashlib
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from conftest import GITSL, mock_sl_env, read_sl_log, write_responses
+
+
+pytestmark = pytest.mark.cat_file
+
+NODE = "c" * 40
+PARENT = "b" * 40
+COMMIT_OUTPUT = f"{NODE}\n{PARENT}\n{'0' * 40}\nAlice <alice@example.com>\n1600000000 -7200\nAdd things"
+
+README = b"hello\nworld"  # The mock adds the final newline
+
+
+def git_blob_id(content: bytes) -> str:
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+
+@pytest.fixture
+def fake_repo(fake_repo: Path, tmp_path: Path) -> Path:
+    """The shared fake checkout plus mock sl rules for README at '.' and one commit."""
+    (tmp_path / "readme.out").write_bytes(README + b"\n")
+    (tmp_path / "binary.out").write_bytes(b"\x00\xff\x01")
+    rules = [
+        {"argv": ["cat", "-r", ".", "path:README"], "stdout_file": str(tmp_path / "readme.out")},
+        {"argv": ["cat", "-r", ".~1", "path:bin.dat"], "stdout_file": str(tmp_path / "binary.out")},
+        {"argv": ["cat"], "stderr": "abort: no such file", "exit": 1},
+        {"argv": ["log", "-r", "."], "stdout": COMMIT_OUTPUT},
+        {"argv": ["log"], "stderr": "abort: unknown revision", "exit": 255},
+    ]
+    write_responses(tmp_path / "rules.json", rules)
+    return fake_repo
+
+
+def run_cat_file(repo: Path, args, data: bytes = b"", cwd: Path = None, **env_vars):
+    env = os.environ.copy()
+    env.update(mock_sl_env(repo.parent / "sl.log", repo.parent / "rules.json", **env_vars))
+    return subprocess.run(
+        [sys.executable, str(GITSL), "cat-file"] + args,
+        cwd=cwd or repo, env=env, input=data, capture_output=True,
+    )
+
+
+class TestCatFileSingle:
+    """-p, -t, -s, -e and '<type> <object>'."""
+
+    def test_pretty_print_blob(self, fake_repo: Path):
+        result = run_cat_file(fake_repo, ["-p", "HEAD:README"])
+        assert result.returncode == 0
+        assert result.stdout == README + b"\n"
+
+    def test_binary_blob_is_byte_exact(self, fake_repo: Path):
+        result = run_cat_file(fake_repo, ["blob", "HEAD~1:bin.dat"])
+        assert result.stdout == b"\x00\xff\x01"
+
+    def test_type_and_size(self, fake_repo: Path):
+        assert run_cat_file(fake_repo, ["-t", "HEAD:README"]).stdout == b"blob\n"
+        assert run_cat_file(fake_repo, ["-s", "HEAD:README"]).stdout == b"12\n"
+        assert run_cat_file(fake_repo, ["-t", "HEAD"]).stdout == b"commit\n"
+
+    def test_exists(self, fake_repo: Path):
+        assert run_cat_file(fake_repo, ["-e", "HEAD:README"]).returncode == 0
+        result = run_cat_file(fake_repo, ["-e", "HEAD:nope"])
+        assert result.returncode == 1
+        assert result.stderr == b""
+
+    def test_missing_object(self, fake_repo: Path):
+        result = run_cat_file(fake_repo, ["-p", "HEAD:nope"])
+        assert result.returncode == 128
+        assert b"Not a valid object name HEAD:nope" in result.stderr
+
+    def test_wrong_type(self, fake_repo: Path):
+        result = run_cat_file(fake_repo, ["commit", "HEAD:README"])
+        assert result.returncode == 128
+        assert b"bad file" in result.stderr
+
+    def test_commit_text(self, fake_repo: Path):
+        """Commits print git-style headers; null parents are omitted."""
+        result = run_cat_file(fake_repo, ["-p", "HEAD"])
+        assert result.stdout.decode() == (
+            f"parent {PARENT}\n"
+            "author Alice <alice@example.com> 1600000000 +0200\n"
+            "committer Alice <alice@example.com> 1600000000 +0200\n"
+            "\n"
+            "Add things\n"
+        )
+
+    def test_relative_path(self, fake_repo: Path):
+        """'<rev>:./<path>' is relative to the current directory."""
+        (fake_repo / "docs").mkdir()
+        result = run_cat_file(fake_repo, ["-p", "HEAD:./../README"], cwd=fake_repo / "docs")
+        assert result.stdout == README + b"\n"
+
+
+class TestCatFileBatch:
+    """--batch and --batch-check stream answers for names on stdin."""
+
+    def test_batch_framing(self, fake_repo: Path):
+        """<oid> <type> <size> LF <contents> LF, and '<name> missing'."""
+        result = run_cat_file(fake_repo, ["--batch"], b"HEAD:README\nHEAD:nope\n")
+        oid = git_blob_id(README + b"\n")
+        assert result.stdout == (
+            f"{oid} blob 12\n".encode() + README + b"\n\n"
+            + b"HEAD:nope missing\n"
+        )
+
+    def test_blob_id_matches_git(self, fake_repo: Path, tmp_path: Path):
+        """Blob ids are the ids git itself would assign."""
+        expected = subprocess.run(
+            ["git", "hash-object", str(tmp_path / "readme.out")],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        result = run_cat_file(fake_repo, ["--batch-check"], b"HEAD:README\n")
+        assert result.stdout == f"{expected} blob 12\n".encode()
+
+    def test_oid_lookup_after_check(self, fake_repo: Path):
+        """A blob id printed earlier in the batch can be used as a name."""
+        oid = git_blob_id(README + b"\n")
+        result = run_cat_file(fake_repo, ["--batch"], f"HEAD:README\n{oid}\n".encode())
+        frame = f"{oid} blob 12\n".encode() + README + b"\n\n"
+        assert result.stdout == frame + frame
+
+    def test_custom_format_with_rest(self, fake_repo: Path):
+        result = run_cat_file(
+            fake_repo, ["--batch-check=%(objecttype) %(objectsize) [%(rest)]"],
+            b"HEAD:README some/path\nHEAD\n",
+        )
+        assert result.stdout.decode().splitlines() == [
+            "blob 12 [some/path]",
+            f"commit {len(run_cat_file(fake_repo, ['-p', 'HEAD']).stdout)} []",
+        ]
+
+    def test_unknown_format_atom(self, fake_repo: Path):
+        result = run_cat_file(fake_repo, ["--batch-check=%(deltabase)"])
+        assert result.returncode == 128
+        assert b"unknown format element" in result.stderr
+
+    def test_batch_uses_one_command_server(self, fake_repo: Path):
+        """All lookups go to a single sl process, not one per object."""
+        names = b"HEAD:README\nHEAD~1:bin.dat\nHEAD:nope\nHEAD\n"
+        result = run_cat_file(fake_repo, ["--batch"], names, MOCK_SL_CMDSERVER="1")
+        assert result.stdout.count(b"missing") == 1
+        calls = read_sl_log(fake_repo.parent / "sl.log")
+        assert [c["argv"][:3] for c in calls if c["via"] == "spawn"] == [
+            ["serve", "--cmdserver", "pipe"]
+        ]
+        assert len([c for c in calls if c["via"] == "cmdserver"]) == 4
+
+    def test_moved_commit_between_lines(self, fake_repo: Path, tmp_path: Path):
+        """A '.' that moves during the batch is looked up again."""
+        env = os.environ.copy()
+        env.update(mock_sl_env(tmp_path / "sl.log", tmp_path / "rules.json",
+                               MOCK_SL_CMDSERVER="1"))
+        proc = subprocess.Popen(
+            [sys.executable, str(GITSL), "cat-file", "--batch-check"],
+            cwd=fake_repo, env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+        )
+        proc.stdin.write(b"HEAD\n")
+        proc.stdin.flush()
+        first = proc.stdout.readline()
+        moved = "d" * 40
+        write_responses(tmp_path / "rules.json", [
+            {"argv": ["log", "-r", "."], "stdout": COMMIT_OUTPUT.replace(NODE, moved)},
+        ])
+        proc.stdin.write(b"HEAD\n")
+        proc.stdin.close()
+        second = proc.stdout.readline()
+        assert proc.wait() == 0
+        assert first.split()[:2] == [NODE.encode(), b"commit"]
+        assert second.split()[:2] == [moved.encode(), b"commit"]
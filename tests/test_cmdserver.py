@@ -0,0 +1,98 @@
+"""
+Tests for routing read-only sl queries through a Sapling command server.
+
+Uses the mock sl, which speaks the command-server protocol when
+MOCK_SL_CMDSERVER is set and logs every call to MOCK_SL_LOG.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+from conftest import PROJECT_ROOT, mock_sl_env, read_sl_log
+from helpers.commands import run_command
+
+
+pytestmark = pytest.mark.cmdserver
+
+
+def run_queries(repo: Path, log: Path, code: str, **env_vars) -> str:
+    """Run a snippet against common with mock sl on PATH, return stdout."""
+    env = mock_sl_env(log, PYTHONPATH=str(PROJECT_ROOT), **env_vars)
+    result = run_command([sys.executable, "-c", code], cwd=repo, env=env)
+    assert result.exit_code == 0, result.stderr
+    return result.stdout
+
+
+QUERY_TWICE = (
+    "import common\n"
+    "for rev in ('.', '.^'):\n"
+    "    r = common.query_sl(['log', '-r', rev, '--template', '{node}'])\n"
+    "    print(r.returncode, r.stdout.strip())\n"
+)
+
+
+class TestCommandServer:
+    """query_sl reuses one warm server when enabled."""
+
+    def test_queries_share_one_server(self, fake_repo: Path, tmp_path: Path):
+        """Both queries run inside a single server process."""
+        log = tmp_path / "sl.log"
+        out = run_queries(fake_repo, log, QUERY_TWICE, GITSL_CMDSERVER="1",
+                          MOCK_SL_CMDSERVER="1", MOCK_SL_STDOUT="abc123")
+        assert out.splitlines() == ["0 abc123", "0 abc123"]
+
+        calls = read_sl_log(log)
+        spawns = [c for c in calls if c["via"] == "spawn"]
+        served = [c for c in calls if c["via"] == "cmdserver"]
+        assert [c["argv"][:3] for c in spawns] == [["serve", "--cmdserver", "pipe"]]
+        assert len(served) == 2
+        assert served[0]["argv"] == [
+            "--cwd", str(fake_repo.resolve()), "log", "-r", ".", "--template", "{node}",
+        ]
+
+    def test_exit_code_and_stderr_forwarded(self, fake_repo: Path, tmp_path: Path):
+        """The 'r' and 'e' channels become returncode and stderr."""
+        log = tmp_path / "sl.log"
+        out = run_queries(
+            fake_repo, log,
+            "import common\n"
+            "r = common.query_sl(['status'])\n"
+            "print(r.returncode, repr(r.stderr))\n",
+            GITSL_CMDSERVER="1", MOCK_SL_CMDSERVER="1",
+            MOCK_SL_EXIT="255", MOCK_SL_STDERR="abort: boom",
+        )
+        assert out.strip() == "255 'abort: boom\\n'"
+
+    def test_falls_back_without_server_support(self, fake_repo: Path, tmp_path: Path):
+        """An sl that cannot serve is tried once, then spawned per query."""
+        log = tmp_path / "sl.log"
+        out = run_queries(fake_repo, log, QUERY_TWICE, GITSL_CMDSERVER="1",
+                          MOCK_SL_STDOUT="abc123")
+        assert out.splitlines() == ["0 abc123", "0 abc123"]
+
+        argvs = [c["argv"] for c in read_sl_log(log)]
+        assert sum(a[:1] == ["serve"] for a in argvs) == 1
+        assert sum(a[:1] == ["log"] for a in argvs) == 2
+
+    def test_disabled_spawns_directly(self, fake_repo: Path, tmp_path: Path):
+        """GITSL_CMDSERVER=0 wins over enable_cmdserver()."""
+        log = tmp_path / "sl.log"
+        run_queries(fake_repo, log, "import common\ncommon.enable_cmdserver()\n" + QUERY_TWICE,
+                    GITSL_CMDSERVER="0", MOCK_SL_CMDSERVER="1")
+        assert all(c["via"] == "spawn" and c["argv"][0] == "log" for c in read_sl_log(log))
+
+    def test_off_by_default(self, fake_repo: Path, tmp_path: Path):
+        """One-shot runs do not pay for a server start-up."""
+        log = tmp_path / "sl.log"
+        run_queries(fake_repo, log, QUERY_TWICE, MOCK_SL_CMDSERVER="1")
+        assert [c["argv"][0] for c in read_sl_log(log)] == ["log", "log"]
+
+    def test_outside_repo_spawns(self, tmp_path: Path):
+        """Without a repository there is nothing to serve."""
+        log = tmp_path / "sl.log"
+        plain = tmp_path / "plain"
+        plain.mkdir()
+        run_queries(plain, log, QUERY_TWICE, GITSL_CMDSERVER="1", MOCK_SL_CMDSERVER="1")
+        assert [c["argv"][0] for c in read_sl_log(log)] == ["log", "log"]
@@ -0,0 +1,57 @@
+"""
+Tests for running independent sl queries concurrently.
+
+The mock sl sleeps (MOCK_SL_SLEEP) and logs start times, so overlapping
+calls show up as start times closer together than one call's duration.
+"""
+
+from pathlib import Path
+
+import pytest
+
+from conftest import HEAD_RULE, read_sl_log, rules_env, run_gitsl
+
+
+pytestmark = pytest.mark.execution
+
+SLEEP = 0.5
+
+
+class TestConcurrentQueries:
+    """Independent captured queries overlap instead of running in sequence."""
+
+    def test_status_branch_queries_overlap(self, tmp_path: Path):
+        """status -b --porcelain fetches branch and status at once."""
+        env = rules_env(tmp_path, [HEAD_RULE, {"argv": ["status"], "stdout": "M a.txt"}],
+                        MOCK_SL_SLEEP=str(SLEEP))
+        result = run_gitsl(["status", "-b", "--porcelain"], cwd=tmp_path, env=env)
+        assert result.exit_code == 0
+        assert result.stdout == "## main\n M a.txt\n"
+
+        calls = read_sl_log(tmp_path / "sl.log")
+        assert sorted(c["argv"][0] for c in calls) == ["log", "status"]
+        assert abs(calls[0]["time"] - calls[1]["time"]) < SLEEP
+
+    def test_branch_verbose_marks_current(self, tmp_path: Path):
+        """branch -v prefixes the active bookmark with '* '."""
+        env = rules_env(tmp_path, [
+            HEAD_RULE,
+            {"argv": ["bookmark"], "stdout": "feature: bbbbbbbbbbbb wip\nmain: aaaaaaaaaaaa init"},
+        ], MOCK_SL_SLEEP=str(SLEEP))
+        result = run_gitsl(["branch", "-v"], cwd=tmp_path, env=env)
+        assert result.exit_code == 0
+        assert result.stdout == "  feature: bbbbbbbbbbbb wip\n* main: aaaaaaaaaaaa init\n"
+
+        calls = read_sl_log(tmp_path / "sl.log")
+        assert abs(calls[0]["time"] - calls[1]["time"]) < SLEEP
+
+    def test_status_error_reported(self, tmp_path: Path):
+        """A failing status still wins over a successful branch lookup."""
+        env = rules_env(tmp_path, [
+            HEAD_RULE,
+            {"argv": ["status"], "stderr": "abort: boom", "exit": 255},
+        ])
+        result = run_gitsl(["status", "-b", "--porcelain"], cwd=tmp_path, env=env)
+        assert result.exit_code == 255
+        assert result.stdout == ""
+        assert "abort: boom" in result.stderr
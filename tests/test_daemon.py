@@ -0,0 +1,137 @@
+"""
+Tests for daemon mode (GITSL_DAEMON=1).
+
+A resident per-repo server runs handlers for a thin client that forwards
+argv, cwd, environment and stdio descriptors over a Unix socket.
+"""
+
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+
+from conftest import mock_sl_env, read_sl_log, run_gitsl
+from helpers.commands import run_command
+
+
+daemon_supported = os.name == "posix"
+pytestmark = [
+    pytest.mark.skipif(not daemon_supported, reason="daemon mode requires POSIX"),
+    pytest.mark.daemon,
+]
+
+
+@pytest.fixture
+def daemon_env(tmp_path: Path):
+    """Environment enabling daemon mode with a private socket dir and mock sl."""
+    # Short path: Unix socket paths are limited to ~104 bytes on macOS
+    socket_dir = Path(tempfile.mkdtemp(prefix="gitsl-", dir="/tmp")) / "sockets"
+    env = mock_sl_env(
+        tmp_path / "sl.log",
+        GITSL_DAEMON="1",
+        GITSL_DAEMON_DIR=str(socket_dir),
+        GITSL_DAEMON_IDLE="30",
+    )
+    yield env
+    # Stop any server the test started
+    for lock in socket_dir.glob("*.lock"):
+        pid = lock.read_text().strip()
+        if pid:
+            try:
+                os.kill(int(pid), signal.SIGTERM)
+            except OSError:
+                pass
+    shutil.rmtree(socket_dir.parent, ignore_errors=True)
+
+
+@pytest.fixture
+def fake_repo(fake_repo: Path) -> Path:
+    """The shared fake checkout, with a subdirectory to run from."""
+    (fake_repo / "subdir").mkdir()
+    return fake_repo
+
+
+def wait_for_socket(socket_dir: Path, timeout: float = 10.0) -> Path:
+    """Wait until the auto-started server is listening."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        sockets = list(socket_dir.glob("*.sock"))
+        if sockets:
+            return sockets[0]
+        time.sleep(0.05)
+    raise AssertionError("daemon did not start")
+
+
+class TestDaemonMode:
+    """Commands are served by a resident per-repo process."""
+
+    def test_first_call_runs_in_process_and_starts_server(self, fake_repo, daemon_env):
+        """The first call succeeds locally and leaves a server behind."""
+        env = dict(daemon_env, MOCK_SL_STDOUT="first")
+        result = run_gitsl(["status"], cwd=fake_repo, env=env)
+        assert result.exit_code == 0
+        assert result.stdout == "first\n"
+        wait_for_socket(Path(daemon_env["GITSL_DAEMON_DIR"]))
+
+    def test_served_call_forwards_io_cwd_and_exit_code(self, fake_repo, daemon_env):
+        """Output, errors, exit code and cwd round-trip through the server."""
+        run_gitsl(["status"], cwd=fake_repo, env=daemon_env)
+        wait_for_socket(Path(daemon_env["GITSL_DAEMON_DIR"]))
+
+        env = dict(daemon_env, MOCK_SL_STDOUT="served", MOCK_SL_STDERR="oops",
+                   MOCK_SL_EXIT="42")
+        result = run_gitsl(["log"], cwd=fake_repo / "subdir", env=env)
+        assert result.exit_code == 42
+        assert result.stdout == "served\n"
+        assert "oops" in result.stderr
+
+        # Served sl runs in the worker's own process group, not ours
+        invocations = read_sl_log(Path(daemon_env["MOCK_SL_LOG"]))
+        assert invocations[-1]["argv"][0] == "log"
+        assert invocations[-1]["pgid"] != os.getpgid(0)
+
+    def test_outside_repo_runs_in_process(self, tmp_path, daemon_env):
+        """No repository means no server."""
+        outside = tmp_path / "outside"
+        outside.mkdir()
+        result = run_gitsl(["status"], cwd=outside, env=daemon_env)
+        assert result.exit_code == 0
+        assert not list(Path(daemon_env["GITSL_DAEMON_DIR"]).glob("*.sock"))
+
+    def test_server_exits_when_idle(self, fake_repo, daemon_env):
+        """The server removes its socket after the idle timeout."""
+        env = dict(daemon_env, GITSL_DAEMON_IDLE="0.5")
+        run_gitsl(["status"], cwd=fake_repo, env=env)
+        sock = wait_for_socket(Path(daemon_env["GITSL_DAEMON_DIR"]))
+        deadline = time.time() + 10
+        while sock.exists() and time.time() < deadline:
+            time.sleep(0.05)
+        assert not sock.exists()
+
+    def test_code_change_starts_new_server(self, fake_repo, daemon_env, tmp_path):
+        """Editing any gitsl module means a new server, never the stale one."""
+        code = tmp_path / "code"
+        code.mkdir()
+        project = Path(__file__).parent.parent
+        for module in project.glob("*.py"):
+            shutil.copy2(module, code / module.name)
+        gitsl = [sys.executable, str(code / "gitsl.py")]
+        socket_dir = Path(daemon_env["GITSL_DAEMON_DIR"])
+
+        run_command(gitsl + ["status"], cwd=fake_repo, env=daemon_env)
+        first = wait_for_socket(socket_dir)
+
+        handler = code / "cmd_status.py"
+        handler.write_text(handler.read_text() + "\n# edited\n")
+        run_command(gitsl + ["status"], cwd=fake_repo, env=daemon_env)
+        deadline = time.time() + 10
+        while len(list(socket_dir.glob("*.sock"))) < 2 and time.time() < deadline:
+            time.sleep(0.05)
+        sockets = set(socket_dir.glob("*.sock"))
+        assert len(sockets) == 2
+        assert first in sockets
@@ -0,0 +1,108 @@
+"""
+Tests for command dispatch (lazy handler loading).
+
+Handlers are registered by name in gitsl.COMMANDS and imported only when
+their command runs, so start-up cost stays flat as commands are added.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+from conftest import GITSL, PROJECT_ROOT, mock_sl_env
+from helpers.commands import run_command
+
+
+pytestmark = pytest.mark.dispatch
+
+
+def run_python(code: str, cwd: Path) -> str:
+    """Run a snippet with gitsl importable and mock sl on PATH, return stdout."""
+    # The snippets keep running after gitsl.main(), so sl must not replace them
+    env = mock_sl_env(PYTHONPATH=str(PROJECT_ROOT), GITSL_EXEC="0")
+    result = run_command([sys.executable, "-c", code], cwd=cwd, env=env)
+    assert result.exit_code == 0, result.stderr
+    return result.stdout
+
+
+class TestLazyDispatch:
+    """Only the handler for the requested command is imported."""
+
+    def test_import_loads_no_handlers(self, tmp_path: Path):
+        """Importing gitsl does not import any cmd_* module."""
+        out = run_python(
+            "import sys, gitsl\n"
+            "print(sorted(m for m in sys.modules if m.startswith('cmd_')))",
+            cwd=tmp_path,
+        )
+        assert out.strip() == "[]"
+
+    @pytest.mark.parametrize("command,module", [
+        ("status", "cmd_status"),
+        ("log", "cmd_log"),
+        ("rev-parse", "cmd_rev_parse"),
+    ])
+    def test_dispatch_loads_single_handler(self, tmp_path: Path, command, module):
+        """Running a command imports exactly its own handler."""
+        out = run_python(
+            "import sys, gitsl\n"
+            f"gitsl.main([{command!r}, '--short', 'HEAD'])\n"
+            "sys.stdout.write('MODULES=' + ','.join(sorted("
+            "m for m in sys.modules if m.startswith('cmd_'))) + '\\n')",
+            cwd=tmp_path,
+        )
+        assert f"MODULES={module}\n" in out
+
+    def test_registry_modules_have_handle(self, tmp_path: Path):
+        """Every registered module exists and exposes handle()."""
+        out = run_python(
+            "import importlib, gitsl\n"
+            "for name, mod in gitsl.COMMANDS.items():\n"
+            "    assert callable(importlib.import_module(mod).handle), name\n"
+            "print(len(gitsl.COMMANDS))",
+            cwd=tmp_path,
+        )
+        assert int(out.strip()) >= 20
+
+    def test_unknown_command_not_dispatched(self, tmp_path: Path):
+        """Unregistered commands still reach unsupported handling."""
+        result = run_command(
+            [sys.executable, str(GITSL), "push"], cwd=tmp_path
+        )
+        assert result.exit_code == 0
+        assert "unsupported command: git push" in result.stderr
+
+
+class TestStartupImports:
+    """Normal commands avoid imports that only --version needs."""
+
+    # Generous ceiling across supported Python versions; a jump past it
+    # means something heavy was added to the import path.
+    MAX_NEW_MODULES = 90
+
+    def test_status_import_footprint(self, tmp_path: Path):
+        """Running status imports no importlib.metadata and few modules."""
+        out = run_python(
+            "import sys\n"
+            "before = set(sys.modules)\n"
+            "import gitsl\n"
+            "gitsl.main(['status'])\n"
+            "new = set(sys.modules) - before\n"
+            "sys.stdout.write('COUNT=%d\\n' % len(new))\n"
+            "sys.stdout.write('METADATA=%s\\n' % ('importlib.metadata' in new))\n"
+            "sys.stdout.write('EMAIL=%s\\n' % any(m.startswith('email') for m in new))\n",
+            cwd=tmp_path,
+        )
+        assert "METADATA=False\n" in out
+        assert "EMAIL=False\n" in out
+        count = int(out.split("COUNT=")[1].split()[0])
+        assert count <= self.MAX_NEW_MODULES, f"status imported {count} modules"
+
+    def test_version_still_reported(self, tmp_path: Path):
+        """--version resolves the version lazily."""
+        result = run_command(
+            [sys.executable, str(GITSL), "--version"], cwd=tmp_path
+        )
+        assert result.exit_code == 0
+        assert result.stdout.startswith("gitsl version ")
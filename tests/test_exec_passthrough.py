@@ -0,0 +1,97 @@
+"""
+Tests for exec-based passthrough (exec_sl).
+
+Pure translation commands replace the gitsl process with sl. Uses the
+mock sl, which logs its process id, to tell exec from a child process.
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from conftest import GITSL, mock_sl_env, read_sl_log
+
+
+pytestmark = pytest.mark.execution
+
+posix_only = pytest.mark.skipif(os.name != "posix", reason="exec passthrough is POSIX-only")
+
+
+def run_gitsl_pid(args, cwd: Path, log: Path, data: bytes = b"", **env_vars):
+    """Run gitsl with mock sl; return (completed process, gitsl's pid)."""
+    env = os.environ.copy()
+    env.update(mock_sl_env(log, **env_vars))
+    proc = subprocess.Popen(
+        [sys.executable, str(GITSL)] + args, cwd=cwd, env=env,
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+    )
+    stdout, stderr = proc.communicate(data)
+    return subprocess.CompletedProcess(args, proc.returncode, stdout, stderr), proc.pid
+
+
+def sl_pids(log: Path) -> list:
+    return [entry["pid"] for entry in read_sl_log(log)]
+
+
+@posix_only
+class TestExecPassthrough:
+    """Tail calls to sl replace the gitsl process."""
+
+    @pytest.mark.parametrize("args", [
+        ["grep", "-n", "needle"],
+        ["log", "--oneline", "-n", "5"],
+        ["blame", "file.txt"],
+        ["rm", "file.txt"],
+    ])
+    def test_sl_replaces_gitsl(self, tmp_path: Path, args):
+        """sl runs as the very process the caller started."""
+        log = tmp_path / "sl.log"
+        result, pid = run_gitsl_pid(args, tmp_path, log, MOCK_SL_STDOUT="out")
+        assert result.returncode == 0
+        assert result.stdout == b"out\n"
+        assert sl_pids(log) == [pid]
+
+    def test_exit_code_and_stderr(self, tmp_path: Path):
+        """sl's exit status and stderr reach the caller unchanged."""
+        log = tmp_path / "sl.log"
+        result, _ = run_gitsl_pid(
+            ["grep", "needle"], tmp_path, log, MOCK_SL_EXIT="3", MOCK_SL_STDERR="abort: x",
+        )
+        assert result.returncode == 3
+        assert result.stderr == b"abort: x\n"
+
+    def test_warnings_are_flushed_before_exec(self, tmp_path: Path):
+        """Output written by the handler before exec is not lost."""
+        log = tmp_path / "sl.log"
+        result, _ = run_gitsl_pid(["blame", "-e", "f.txt"], tmp_path, log)
+        assert b"-e/--show-email not supported" in result.stderr
+
+    def test_disabled_by_environment(self, tmp_path: Path):
+        """GITSL_EXEC=0 runs sl as a child instead."""
+        log = tmp_path / "sl.log"
+        result, pid = run_gitsl_pid(["grep", "needle"], tmp_path, log, GITSL_EXEC="0")
+        assert result.returncode == 0
+        assert sl_pids(log) != [pid]
+
+    def test_tracing_runs_sl_as_child(self, tmp_path: Path):
+        """With GITSL_TRACE the trace is still written after sl exits."""
+        log = tmp_path / "sl.log"
+        trace = tmp_path / "trace.jsonl"
+        result, pid = run_gitsl_pid(["grep", "needle"], tmp_path, log, GITSL_TRACE=str(trace))
+        assert result.returncode == 0
+        assert sl_pids(log) != [pid]
+        names = [json.loads(line)["name"] for line in trace.read_text().splitlines()]
+        assert "sl grep" in names
+
+    def test_batch_mode_keeps_running(self, tmp_path: Path):
+        """In batch mode passthrough commands return so the batch continues."""
+        log = tmp_path / "sl.log"
+        result, _ = run_gitsl_pid(
+            ["--batch"], tmp_path, log, data=b"grep needle\nrev-parse --symbolic x\n",
+            MOCK_SL_STDOUT="hit",
+        )
+        assert result.stdout == b"0 4 0\nhit\n\n0 2 0\nx\n\n"
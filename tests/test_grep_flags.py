@@ -130,25 +130,25 @@ class TestGrepTranslation:
         assert result.exit_code == 0
 
 
-class TestGrepUnsupported:
-    """Tests for grep flags that are unsupported (warn and skip)."""
+class TestGrepPostProcessed:
+    """Tests for grep flags applied to sl grep's output."""
 
-    def test_grep_count_c_warning(self, sl_repo_with_commit: Path):
-        """GREP-04: git grep -c warns about unsupported flag."""
+    def test_grep_count_c(self, sl_repo_with_commit: Path):
+        """GREP-04: git grep -c prints matching lines per file."""
         result = run_gitsl(["grep", "-c", "Test"], cwd=sl_repo_with_commit)
-        # Should warn but still run (without the flag)
-        assert "not supported" in result.stderr.lower() or "warning" in result.stderr.lower()
+        assert result.exit_code == 0
+        assert result.stdout == "README.md:1\n"
 
-    def test_grep_count_long_warning(self, sl_repo_with_commit: Path):
-        """GREP-04: git grep --count warns about unsupported flag."""
+    def test_grep_count_long(self, sl_repo_with_commit: Path):
+        """GREP-04: git grep --count prints matching lines per file."""
         result = run_gitsl(["grep", "--count", "Test"], cwd=sl_repo_with_commit)
-        assert "not supported" in result.stderr.lower() or "warning" in result.stderr.lower()
+        assert result.stdout == "README.md:1\n"
 
-    def test_grep_suppress_filename_h_warning(self, sl_repo_with_commit: Path):
-        """GREP-10: git grep -h warns (sl -h shows help instead)."""
+    def test_grep_suppress_filename_h(self, sl_repo_with_commit: Path):
+        """GREP-10: git grep -h leaves out file names (sl -h would show help)."""
         result = run_gitsl(["grep", "-h", "Test"], cwd=sl_repo_with_commit)
-        # Should warn but still run
-        assert "not supported" in result.stderr.lower() or "warning" in result.stderr.lower()
+        assert result.exit_code == 0
+        assert result.stdout == "# Test Repository\n"
 
     def test_grep_force_filename_H_noop(self, sl_repo_with_commit: Path):
         """GREP-11: git grep -H is no-op (already default)."""
@@ -156,24 +156,25 @@ class TestGrepUnsupported:
         # Should work without error (flag silently ignored)
         assert result.exit_code == 0
 
-    def test_grep_only_matching_o_warning(self, sl_repo_with_commit: Path):
-        """GREP-12: git grep -o warns about unsupported flag."""
-        result = run_gitsl(["grep", "-o", "Test"], cwd=sl_repo_with_commit)
-        # Should warn
-        assert "not supported" in result.stderr.lower() or "warning" in result.stderr.lower()
+    def test_grep_only_matching_o(self, sl_repo_with_commit: Path):
+        """GREP-12: git grep -o prints only the matched parts."""
+        result = run_gitsl(["grep", "-o", "Te.t"], cwd=sl_repo_with_commit)
+        assert result.exit_code == 0
+        assert result.stdout == "README.md:Test\n"
 
-    def test_grep_only_matching_long_warning(self, sl_repo_with_commit: Path):
-        """GREP-12: git grep --only-matching warns about unsupported flag."""
+    def test_grep_only_matching_long(self, sl_repo_with_commit: Path):
+        """GREP-12: git grep --only-matching prints only the matched parts."""
         result = run_gitsl(["grep", "--only-matching", "Test"], cwd=sl_repo_with_commit)
-        assert "not supported" in result.stderr.lower() or "warning" in result.stderr.lower()
+        assert result.stdout == "README.md:Test\n"
 
-    def test_grep_quiet_q_warning(self, sl_repo_with_commit: Path):
-        """GREP-13: git grep -q warns about unsupported quiet mode."""
+    def test_grep_quiet_q(self, sl_repo_with_commit: Path):
+        """GREP-13: git grep -q prints nothing and exits 0 on a match."""
         result = run_gitsl(["grep", "-q", "Test"], cwd=sl_repo_with_commit)
-        # Should warn - sl grep doesn't support quiet mode
-        assert "not supported" in result.stderr.lower() or "warning" in result.stderr.lower()
+        assert result.exit_code == 0
+        assert result.stdout == ""
 
-    def test_grep_quiet_long_warning(self, sl_repo_with_commit: Path):
-        """GREP-13: git grep --quiet warns about unsupported quiet mode."""
-        result = run_gitsl(["grep", "--quiet", "Test"], cwd=sl_repo_with_commit)
-        assert "not supported" in result.stderr.lower() or "warning" in result.stderr.lower()
+    def test_grep_quiet_long_no_match(self, sl_repo_with_commit: Path):
+        """GREP-13: git grep --quiet exits 1 without a match."""
+        result = run_gitsl(["grep", "--quiet", "NonExistent"], cwd=sl_repo_with_commit)
+        assert result.exit_code == 1
+        assert result.stdout == ""
@@ -0,0 +1,239 @@
+"""
+Tests for the native working-copy grep engine (GITSL_GREP_ENGINE=native).
+
+Runs in a fake checkout with real files; the mock sl answers the
+tracked file query, and its call log shows which searches reached sl.
+"""
+
+from pathlib import Path
+
+import pytest
+
+from conftest import age, mock_sl_env, run_gitsl, sl_argvs, write_responses
+
+
+pytestmark = pytest.mark.grep
+
+FILES = {
+    "main.c": "int main() {\n    return foo();\n}\n",
+    "src/util.c": "one\ntwo\nFoo three\nfour\nfive\nsix\nseven foo\neight\n",
+    "src/a-b.txt": "food\nfoo.bar\n",
+    "docs/readme.md": "nothing here\n",
+    "untracked.txt": "foo\n",
+}
+TRACKED = ["docs/readme.md", "main.c", "src/a-b.txt", "src/util.c"]
+
+
+def write_listing(repo: Path, names) -> None:
+    listing = repo.parent / "files.out"
+    listing.write_bytes(b"".join(name.encode() + b"\0" for name in names))
+    write_responses(repo.parent / "responses.json",
+                    [{"argv": ["files", "-0"], "stdout_file": str(listing)}])
+
+
+@pytest.fixture
+def repo(settled_repo: Path) -> Path:
+    """The settled fake checkout with FILES written and TRACKED listed."""
+    repo = settled_repo
+    for name, content in FILES.items():
+        (repo / name).parent.mkdir(parents=True, exist_ok=True)
+        (repo / name).write_text(content)
+    write_listing(repo, TRACKED)
+    return repo
+
+
+def run_grep(repo: Path, args, cwd: Path = None, **env_vars):
+    """Run 'git grep <args>' with the native engine; return (result, sl calls)."""
+    log = repo.parent / "sl.log"
+    env = mock_sl_env(log, repo.parent / "responses.json",
+                      **{"GITSL_GREP_ENGINE": "native", **env_vars})
+    result = run_gitsl(["grep"] + args, cwd=cwd or repo, env=env)
+    calls = sl_argvs(log)
+    log.unlink(missing_ok=True)
+    return result, calls
+
+
+class TestNativeSearch:
+    """Output matches git grep's, in sorted path order."""
+
+    def test_plain(self, repo: Path):
+        result, calls = run_grep(repo, ["foo"])
+        assert result.exit_code == 0
+        assert result.stdout == (
+            "main.c:    return foo();\n"
+            "src/a-b.txt:food\n"
+            "src/a-b.txt:foo.bar\n"
+            "src/util.c:seven foo\n"
+        )
+        assert calls == [["files", "-0"]]
+
+    def test_line_numbers_and_ignore_case(self, repo: Path):
+        result, _ = run_grep(repo, ["-n", "-i", "foo", "src/util.c"])
+        assert result.stdout == "src/util.c:3:Foo three\nsrc/util.c:7:seven foo\n"
+
+    def test_word_regexp(self, repo: Path):
+        result, _ = run_grep(repo, ["-w", "foo"])
+        assert result.stdout == (
+            "main.c:    return foo();\n"
+            "src/a-b.txt:foo.bar\n"
+            "src/util.c:seven foo\n"
+        )
+
+    def test_fixed_strings(self, repo: Path):
+        result, _ = run_grep(repo, ["-F", "foo.b"])
+        assert result.stdout == "src/a-b.txt:foo.bar\n"
+        result, _ = run_grep(repo, ["-F", "o()"])
+        assert result.stdout == "main.c:    return foo();\n"
+
+    def test_basic_regular_expressions(self, repo: Path):
+        """Patterns are BREs like sl grep's: '+' is literal, '\\|' alternates."""
+        (repo / "ops.txt").write_text("a+b\naab\nx(y)\n")
+        write_listing(repo, TRACKED + ["ops.txt"])
+        result, _ = run_grep(repo, ["a+b", "ops.txt"])
+        assert result.stdout == "ops.txt:a+b\n"
+        result, _ = run_grep(repo, ["a\\+b", "ops.txt"])
+        assert result.stdout == "ops.txt:aab\n"
+        result, _ = run_grep(repo, ["-l", "x(y)\\|nothing", "ops.txt"])
+        assert result.stdout == "ops.txt\n"
+        result, _ = run_grep(repo, ["a\\{2\\}b", "ops.txt"])
+        assert result.stdout == "ops.txt:aab\n"
+
+    def test_match_must_be_within_a_line(self, repo: Path):
+        """A match spanning lines does not make a file match, even for -l."""
+        result, _ = run_grep(repo, ["-l", "three\\sfour"])
+        assert result.exit_code == 1
+        assert result.stdout == ""
+        result, _ = run_grep(repo, ["-l", "o[^x]b"])
+        assert result.stdout == "src/a-b.txt\n"
+
+    def test_files_with_matches(self, repo: Path):
+        result, _ = run_grep(repo, ["-l", "foo"])
+        assert result.stdout == "main.c\nsrc/a-b.txt\nsrc/util.c\n"
+
+    def test_context_groups(self, repo: Path):
+        result, _ = run_grep(repo, ["-n", "-B1", "-A1", "-i", "foo", "src/util.c"])
+        assert result.stdout == (
+            "src/util.c-2-two\n"
+            "src/util.c:3:Foo three\n"
+            "src/util.c-4-four\n"
+            "--\n"
+            "src/util.c-6-six\n"
+            "src/util.c:7:seven foo\n"
+            "src/util.c-8-eight\n"
+        )
+
+    def test_overlapping_context_merges(self, repo: Path):
+        result, _ = run_grep(repo, ["-C3", "-i", "foo", "src/util.c"])
+        assert "--" not in result.stdout.splitlines()
+        assert len(result.stdout.splitlines()) == 8
+
+    def test_no_match(self, repo: Path):
+        result, _ = run_grep(repo, ["nomatch"])
+        assert result.exit_code == 1
+        assert result.stdout == ""
+
+    def test_untracked_files_are_skipped(self, repo: Path):
+        result, _ = run_grep(repo, ["-l", "foo", "untracked.txt"])
+        assert result.exit_code == 1
+
+
+class TestNativePaths:
+    """Paths are relative to the current directory, like git's."""
+
+    def test_subdirectory(self, repo: Path):
+        result, calls = run_grep(repo, ["-l", "foo"], cwd=repo / "src")
+        assert result.stdout == "a-b.txt\nutil.c\n"
+        assert calls == [["files", "-0"]]
+
+    def test_pathspec_outside_cwd(self, repo: Path):
+        result, _ = run_grep(repo, ["-l", "foo", "../main.c"], cwd=repo / "src")
+        assert result.stdout == "../main.c\n"
+
+    def test_binary_file(self, repo: Path):
+        (repo / "blob.bin").write_bytes(b"\0\1foo\2")
+        write_listing(repo, TRACKED + ["blob.bin"])
+        result, _ = run_grep(repo, ["foo", "blob.bin"])
+        assert result.stdout == "Binary file blob.bin matches\n"
+
+    def test_binary_file_needs_a_line_match(self, repo: Path):
+        (repo / "blob.bin").write_bytes(b"\0foo\nbar")
+        write_listing(repo, TRACKED + ["blob.bin"])
+        result, _ = run_grep(repo, ["foo\\sbar", "blob.bin"])
+        assert result.exit_code == 1
+        assert result.stdout == ""
+
+    def test_large_file(self, repo: Path):
+        """Line numbers and context stay right far into a file of several MB."""
+        lines = ["line %07d" % n for n in range(1, 400001)]
+        for n in (1, 250000, 400000):
+            lines[n - 1] = "hit %07d" % n
+        (repo / "big.txt").write_text("\n".join(lines))  # no final newline
+        write_listing(repo, TRACKED + ["big.txt"])
+        result, _ = run_grep(repo, ["-n", "-C1", "hit", "big.txt"])
+        assert result.stdout == (
+            "big.txt:1:hit 0000001\n"
+            "big.txt-2-line 0000002\n"
+            "--\n"
+            "big.txt-249999-line 0249999\n"
+            "big.txt:250000:hit 0250000\n"
+            "big.txt-250001-line 0250001\n"
+            "--\n"
+            "big.txt-399999-line 0399999\n"
+            "big.txt:400000:hit 0400000\n"
+        )
+
+
+class TestFileListCache:
+    """The tracked file list is reused until the working copy changes."""
+
+    def test_second_search_skips_sl(self, repo: Path):
+        run_grep(repo, ["foo"])
+        result, calls = run_grep(repo, ["-l", "three"])
+        assert result.stdout == "src/util.c\n"
+        assert calls == []
+
+    def test_dirstate_change_invalidates(self, repo: Path):
+        run_grep(repo, ["foo"])
+        (repo / ".sl" / "dirstate").write_text("changed")
+        age(repo / ".sl" / "dirstate", 30)
+        _, calls = run_grep(repo, ["foo"])
+        assert calls == [["files", "-0"]]
+
+    def test_cache_disabled(self, repo: Path):
+        run_grep(repo, ["foo"], GITSL_CACHE="0")
+        _, calls = run_grep(repo, ["foo"], GITSL_CACHE="0")
+        assert calls == [["files", "-0"]]
+
+
+class TestParallelSearch:
+    """Large trees are searched by worker processes with the same output."""
+
+    def test_many_files(self, repo: Path):
+        names = []
+        (repo / "many").mkdir()
+        for n in range(1200):
+            name = f"many/f{n:04d}.txt"
+            (repo / name).write_text(f"line\nhit {n}\n" if n % 100 == 0 else "line\n")
+            names.append(name)
+        write_listing(repo, names)
+        result, _ = run_grep(repo, ["-n", "hit"])
+        assert result.exit_code == 0
+        assert result.stdout == "".join(
+            f"many/f{n:04d}.txt:2:hit {n}\n" for n in range(0, 1200, 100))
+
+
+class TestFallback:
+    """Searches the engine does not handle go to sl grep."""
+
+    @pytest.mark.parametrize("args,expected", [
+        (["-v", "foo"], ["grep", "-V", "foo"]),
+        (["-e", "foo"], ["grep", "-e", "foo"]),
+        (["-n", "\\<foo"], ["grep", "-n", "\\<foo"]),
+    ])
+    def test_uses_sl_grep(self, repo: Path, args, expected):
+        _, calls = run_grep(repo, args)
+        assert calls == [expected]
+
+    def test_engine_is_opt_in(self, repo: Path):
+        _, calls = run_grep(repo, ["foo"], GITSL_GREP_ENGINE="")
+        assert calls == [["grep", "foo"]]
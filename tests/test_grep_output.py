@@ -0,0 +1,147 @@
+"""
+Tests for git grep -c/-o/-q/-h, which rewrite sl grep's output.
+
+The mock sl prints canned grep output, so no real Sapling installation
+is needed. The mock ignores its flags; the canned output is what sl grep
+would print for the flags gitsl passes it.
+"""
+
+import time
+from pathlib import Path
+
+import pytest
+
+from conftest import mock_sl_env, run_gitsl, sl_argvs, write_responses
+
+
+pytestmark = pytest.mark.grep
+
+
+def run_grep(cwd: Path, args, output: str, **env_vars):
+    """Run 'git grep <args>' with sl grep printing output; return (result, sl argv)."""
+    env = mock_sl_env(cwd / "sl.log", **{"MOCK_SL_STDOUT": output, **env_vars})
+    result = run_gitsl(["grep"] + args, cwd=cwd, env=env)
+    return result, sl_argvs(cwd / "sl.log")[-1]
+
+
+@pytest.fixture
+def work_tree(tmp_path: Path) -> Path:
+    """Files whose names contain the separators ':' and '-'."""
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "a-b.txt").write_text("")
+    (tmp_path / "src" / "x:y.txt").write_text("")
+    (tmp_path / "main.c").write_text("")
+    return tmp_path
+
+
+class TestCount:
+    """-c prints '<path>:<matching lines>' per file."""
+
+    def test_counts_per_file(self, work_tree: Path):
+        output = "main.c:foo\nmain.c:foo foo\nsrc/a-b.txt:foo\nsrc/x:y.txt:a:foo"
+        result, argv = run_grep(work_tree, ["-c", "-C2", "foo"], output)
+        assert result.exit_code == 0
+        assert result.stdout == "main.c:2\nsrc/a-b.txt:1\nsrc/x:y.txt:1\n"
+        assert argv == ["grep", "foo"]  # No context lines to count
+
+    def test_no_filename(self, work_tree: Path):
+        result, _ = run_grep(work_tree, ["-c", "-h", "foo"], "main.c:foo\nsrc/a-b.txt:foo")
+        assert result.stdout == "1\n1\n"
+
+    def test_path_prefix_of_another(self, work_tree: Path):
+        """Lines of 'a-b.txt' are not charged to an existing file 'a'."""
+        (work_tree / "a").write_text("")
+        (work_tree / "a-b.txt").write_text("")
+        output = "a:hit\na-b.txt:hit\na-b.txt:a-b.txt:hit"
+        result, _ = run_grep(work_tree, ["-c", "hit"], output)
+        assert result.stdout == "a:1\na-b.txt:2\n"
+
+
+class TestOnlyMatching:
+    """-o prints each matched part on its own line."""
+
+    def test_matched_parts(self, work_tree: Path):
+        result, _ = run_grep(work_tree, ["-o", "-n", "fo\\+"], "main.c:3:foo and fooo")
+        assert result.stdout == "main.c:3:foo\nmain.c:3:fooo\n"
+
+    def test_basic_regular_expression(self, work_tree: Path):
+        """The pattern is read as sl grep reads it: '+' alone is a literal."""
+        result, _ = run_grep(work_tree, ["-o", "a+b"], "main.c:x a+b aab")
+        assert result.stdout == "main.c:a+b\n"
+        result, _ = run_grep(work_tree, ["-o", "x\\|aa*b"], "main.c:x a+b aab")
+        assert result.stdout == "main.c:x\nmain.c:aab\n"
+
+    def test_untranslatable_pattern_shows_lines(self, work_tree: Path):
+        result, _ = run_grep(work_tree, ["-o", "\\<foo"], "main.c:foo bar")
+        assert result.stdout == "main.c:foo bar\n"
+        assert "cannot translate this pattern" in result.stderr
+
+    def test_flags_shape_the_pattern(self, work_tree: Path):
+        result, _ = run_grep(work_tree, ["-o", "-i", "-w", "-F", "a.b"], "main.c:A.B a.bc xa.b a.b")
+        assert result.stdout == "main.c:A.B\nmain.c:a.b\n"
+
+
+class TestNoFilename:
+    """-h strips file names, also from context lines."""
+
+    def test_strips_paths(self, work_tree: Path):
+        output = "src/a-b.txt-1-before\nsrc/a-b.txt:2:foo\n--\nsrc/x:y.txt:9:foo"
+        result, argv = run_grep(work_tree, ["-h", "-n", "-B1", "foo"], output)
+        assert result.stdout == "1-before\n2:foo\n--\n9:foo\n"
+        assert "-h" not in argv  # sl -h shows help
+
+    def test_file_lists_keep_names(self, work_tree: Path):
+        result, _ = run_grep(work_tree, ["-h", "-l", "foo"], "main.c")
+        assert result.stdout == "main.c\n"
+
+
+class TestQuiet:
+    """-q prints nothing and stops sl grep at the first match."""
+
+    def test_match(self, work_tree: Path):
+        result, argv = run_grep(work_tree, ["-q", "-n", "foo"], "main.c:foo")
+        assert result.exit_code == 0
+        assert result.stdout == ""
+        assert argv == ["grep", "-n", "-l", "foo"]
+
+    def test_no_match(self, work_tree: Path):
+        result, _ = run_grep(work_tree, ["-q", "foo"], "", MOCK_SL_EXIT="1")
+        assert result.exit_code == 1
+
+    def test_stops_at_first_match(self, work_tree: Path):
+        """sl is stopped instead of being left to search the whole tree."""
+        output = "\n".join(f"file{n}.txt" for n in range(30))
+        start = time.monotonic()
+        result, _ = run_grep(work_tree, ["-q", "foo"], output, MOCK_SL_LINE_DELAY="0.2")
+        assert result.exit_code == 0
+        assert time.monotonic() - start < 3  # All the output takes 6s
+
+    def test_errors_still_reported(self, work_tree: Path):
+        result, _ = run_grep(work_tree, ["-q", "foo"], "", MOCK_SL_EXIT="255",
+                             MOCK_SL_STDERR="abort: bad pattern")
+        assert result.exit_code == 255
+        assert "abort: bad pattern" in result.stderr
+
+
+class TestLongLines:
+    """Splitting off file names costs the same however many ':' a line holds."""
+
+    def test_many_colons(self, work_tree: Path):
+        line = "src/x:y.txt:" + ":".join('"k%d"' % n for n in range(5000))
+        output = work_tree / "grep.out"
+        output.write_text("\n".join([line] * 300) + "\n")
+        rules = write_responses(work_tree / "responses.json",
+                                [{"argv": ["grep"], "stdout_file": str(output)}])
+        start = time.monotonic()
+        result, _ = run_grep(work_tree, ["-c", "k1"], "", MOCK_SL_RESPONSES=str(rules))
+        elapsed = time.monotonic() - start
+        assert result.stdout == "src/x:y.txt:300\n"
+        assert elapsed < 5
+
+    def test_context_group_of_next_file(self, work_tree: Path):
+        """After '--', a line is not charged to the previous file by its prefix."""
+        (work_tree / "a").write_text("")
+        (work_tree / "a-b.txt").write_text("")
+        output = "a:1:hit\n--\na-b.txt-1-before\na-b.txt:2:hit"
+        result, _ = run_grep(work_tree, ["-h", "-n", "-B1", "hit"], output)
+        assert result.stdout == "1:hit\n--\n1-before\n2:hit\n"
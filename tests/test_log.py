@@ -403,24 +403,26 @@ class TestLogComplexFlags:
         assert len(lines) >= 1
 
 
-class TestLogPickaxeWarnings:
-    """Tests for LOG-17, LOG-18 pickaxe warnings."""
+class TestLogPickaxe:
+    """Tests for LOG-17, LOG-18 pickaxe search."""
 
-    def test_pickaxe_S_warns(self, sl_repo_with_commit: Path):
-        """LOG-17: -S warns about unsupported pickaxe."""
+    def test_pickaxe_S_finds_commit(self, sl_repo_with_commit: Path):
+        """LOG-17: -S shows commits that add or remove the string."""
+        result = run_gitsl(["log", "-STest Repository", "--oneline"], cwd=sl_repo_with_commit)
+        assert result.exit_code == 0
+        assert "Initial commit" in result.stdout
+
+    def test_pickaxe_S_no_match(self, sl_repo_with_commit: Path):
+        """LOG-17: -S shows nothing when no commit changes the string."""
         result = run_gitsl(["log", "-Ssearchterm", "-1"], cwd=sl_repo_with_commit)
-        # Should succeed but warn
         assert result.exit_code == 0
-        # Warning should be in stderr
-        assert "not supported" in result.stderr.lower() or "warning" in result.stderr.lower()
+        assert result.stdout == ""
 
-    def test_pickaxe_G_warns(self, sl_repo_with_commit: Path):
-        """LOG-18: -G warns about unsupported regex pickaxe."""
-        result = run_gitsl(["log", "-Gpattern", "-1"], cwd=sl_repo_with_commit)
-        # Should succeed but warn
+    def test_pickaxe_G_finds_commit(self, sl_repo_with_commit: Path):
+        """LOG-18: -G shows commits whose changed lines match the regex."""
+        result = run_gitsl(["log", "-G^# Test", "--oneline"], cwd=sl_repo_with_commit)
         assert result.exit_code == 0
-        # Warning should be in stderr
-        assert "not supported" in result.stderr.lower() or "warning" in result.stderr.lower()
+        assert "Initial commit" in result.stdout
 
 
 class TestLogExistingFlags:
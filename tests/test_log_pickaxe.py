@@ -0,0 +1,126 @@
+"""
+Tests for git log -S/-G (pickaxe search).
+
+The mock sl answers the scanning 'sl log -p' with canned per-commit
+diffs, and every 'sl log -r' that shows matches is recorded, so no real
+Sapling installation is needed.
+"""
+
+import time
+from pathlib import Path
+
+import pytest
+
+from conftest import mock_sl_env, run_gitsl, sl_argvs, write_responses
+
+
+pytestmark = pytest.mark.log
+
+A, B, C, D = ("a" * 40, "b" * 40, "c" * 40, "d" * 40)
+
+# Newest first, as 'sl log -p' prints them
+SCAN_OUTPUT = "".join([
+    # A adds an occurrence of foo
+    f"\x01{A}\n",
+    "diff --git a/f.txt b/f.txt\n", "--- a/f.txt\n", "+++ b/f.txt\n",
+    "@@ -1,1 +1,2 @@\n", " keep\n", "+new foo here\n",
+    # B only moves foo around: same count, but changed lines mention it
+    f"\x01{B}\n",
+    "diff --git a/f.txt b/f.txt\n", "--- a/f.txt\n", "+++ b/f.txt\n",
+    "@@ -1,1 +1,1 @@\n", "-x foo\n", "+y foo\n",
+    # C touches a file named foo; its headers are not changes
+    f"\x01{C}\n",
+    "diff --git a/foo b/foo\n", "--- a/foo\n", "+++ b/foo\n",
+    "@@ -1,1 +1,1 @@\n", "-1\n", "+2\n",
+    # D removes foo from one file and adds it to another
+    f"\x01{D}\n",
+    "diff --git a/g.txt b/g.txt\n", "--- a/g.txt\n", "+++ b/g.txt\n",
+    "@@ -1,1 +0,0 @@\n", "-old foo\n",
+    "diff --git a/h.txt b/h.txt\n", "--- a/h.txt\n", "+++ b/h.txt\n",
+    "@@ -0,0 +1,1 @@\n", "+foo foo\n",
+])
+
+
+def run_pickaxe(tmp_path: Path, args, **env_vars):
+    """Run 'git log <args>' against the canned scan; return (result, show calls)."""
+    rules = [
+        {"argv": ["log", "-p"], "stdout": SCAN_OUTPUT.rstrip("\n")},
+        {"argv": ["log", "-r"], "stdout": "shown"},
+    ]
+    responses = write_responses(tmp_path / "rules.json", rules)
+    env = mock_sl_env(tmp_path / "sl.log", responses, **env_vars)
+    result = run_gitsl(["log"] + args, cwd=tmp_path, env=env)
+    return result, sl_argvs(tmp_path / "sl.log")
+
+
+def shown(calls) -> list:
+    """The commits each 'sl log -r' call showed."""
+    return [call[2].split(" + ") for call in calls if call[:2] == ["log", "-r"]]
+
+
+class TestPickaxe:
+    """-S counts occurrences, -G matches changed lines."""
+
+    def test_s_finds_added_and_removed_strings(self, tmp_path: Path):
+        result, calls = run_pickaxe(tmp_path, ["-Sfoo"])
+        assert result.exit_code == 0
+        # The first match is shown on its own, as soon as it is found
+        assert shown(calls) == [[A], [D]]
+        assert calls[0][:4] == ["log", "-p", "-T", "\\x01{node}\\n"]
+
+    def test_s_with_separate_argument(self, tmp_path: Path):
+        _, calls = run_pickaxe(tmp_path, ["-S", "foo"])
+        assert shown(calls) == [[A], [D]]
+
+    def test_g_matches_changed_lines(self, tmp_path: Path):
+        _, calls = run_pickaxe(tmp_path, ["-Gfo+"])
+        assert shown(calls) == [[A], [B, D]]
+
+    def test_pickaxe_regex(self, tmp_path: Path):
+        _, calls = run_pickaxe(tmp_path, ["-Sne. fo+", "--pickaxe-regex"])
+        assert shown(calls) == [[A]]
+
+    def test_file_headers_are_not_changes(self, tmp_path: Path):
+        _, calls = run_pickaxe(tmp_path, ["-Gfoo"])
+        assert C not in [node for nodes in shown(calls) for node in nodes]
+
+    def test_display_flags_apply_to_matches(self, tmp_path: Path):
+        _, calls = run_pickaxe(tmp_path, ["-Sfoo", "--oneline", "--stat"])
+        show_calls = [call for call in calls if call[:2] == ["log", "-r"]]
+        assert all("--stat" in call and "-T" in call for call in show_calls)
+        assert "--stat" not in calls[0]
+
+    def test_reverse_shows_oldest_first(self, tmp_path: Path):
+        _, calls = run_pickaxe(tmp_path, ["-Sfoo", "--reverse"])
+        assert shown(calls) == [[D, A]]
+
+    def test_limit_counts_matches(self, tmp_path: Path):
+        _, calls = run_pickaxe(tmp_path, ["-Gfoo", "-n", "2", "--reverse"])
+        assert shown(calls) == [[B, A]]
+
+    def test_zero_limit_shows_nothing(self, tmp_path: Path):
+        result, calls = run_pickaxe(tmp_path, ["-Sfoo", "-n", "0"])
+        assert result.exit_code == 0
+        assert result.stdout == ""
+        assert calls == []
+
+    def test_no_matches(self, tmp_path: Path):
+        result, calls = run_pickaxe(tmp_path, ["-Snothing"])
+        assert result.exit_code == 0
+        assert shown(calls) == []
+
+    def test_stops_once_limit_is_reached(self, tmp_path: Path):
+        """With -n satisfied, the scan is stopped instead of read to the end."""
+        start = time.monotonic()
+        _, calls = run_pickaxe(tmp_path, ["-Sfoo", "-1"], MOCK_SL_LINE_DELAY="0.2")
+        assert time.monotonic() - start < 3  # The whole scan takes over 5s
+        assert shown(calls) == [[A]]
+
+    def test_scan_failure_is_reported(self, tmp_path: Path):
+        result, _ = run_pickaxe(tmp_path, ["-Sfoo"], MOCK_SL_EXIT="255")
+        assert result.exit_code == 255
+
+    def test_invalid_regex(self, tmp_path: Path):
+        result = run_gitsl(["log", "-G("], cwd=tmp_path)
+        assert result.exit_code == 128
+        assert "invalid regex" in result.stderr
@@ -0,0 +1,110 @@
+"""
+Tests for the revsets 'git log --reverse' translates to.
+
+Limits and filters are pushed into a single revset so sl never has to
+materialize the whole ancestry. GITSL_DEBUG prints the translated argv
+without running sl, so no Sapling installation is needed.
+"""
+
+import shlex
+from pathlib import Path
+
+import pytest
+
+from conftest import run_gitsl
+
+
+pytestmark = pytest.mark.log
+
+def sl_argv(args, cwd: Path) -> list:
+    """Return the sl argv gitsl would run for 'git log <args>'."""
+    result = run_gitsl(["log"] + args, cwd=cwd, env={"GITSL_DEBUG": "1"})
+    assert result.exit_code == 0, result.stderr
+    line = next(l for l in result.stderr.splitlines() if "Would execute:" in l)
+    return shlex.split(line.split("Would execute:", 1)[1])
+
+
+def revset(args, cwd: Path) -> str:
+    argv = sl_argv(args, cwd)
+    return argv[argv.index("-r") + 1]
+
+
+class TestReverseRevset:
+    """--reverse selects the newest N commits, then lists them oldest first."""
+
+    def test_limit_is_pushed_down(self, tmp_path: Path):
+        argv = sl_argv(["--reverse", "-n", "20"], tmp_path)
+        assert argv == ["sl", "log", "-r", "last(ancestors(.), 20)"]
+
+    def test_without_limit(self, tmp_path: Path):
+        assert revset(["--reverse"], tmp_path) == "ancestors(.)"
+
+    def test_filters_are_pushed_down(self, tmp_path: Path):
+        assert revset(
+            ["--reverse", "-5", "--since=2024-01-01", "--author=bob", "--grep=fix", "--no-merges"],
+            tmp_path,
+        ) == (
+            "last(ancestors(.) & date('>2024-01-01') & user('bob') & keyword('fix')"
+            " & not merge(), 5)"
+        )
+
+    def test_repeated_filters_match_any(self, tmp_path: Path):
+        assert revset(["--reverse", "--author=a", "--author=b"], tmp_path) == (
+            "ancestors(.) & (user('a') + user('b'))"
+        )
+
+    def test_paths_become_file_filters(self, tmp_path: Path):
+        """Existing paths and everything after '--' are path limits."""
+        (tmp_path / "README").write_text("x")
+        assert revset(["--reverse", "-3", "README", "--", "gone"], tmp_path) == (
+            "last(ancestors(.) & (file('relpath:README') + file('relpath:gone')), 3)"
+        )
+
+    def test_revisions_and_ranges(self, tmp_path: Path):
+        assert revset(["--reverse", "HEAD~2"], tmp_path) == "ancestors(.~2)"
+        assert revset(["--reverse", "main..HEAD"], tmp_path) == "only(., main)"
+        assert revset(["--reverse", "--all"], tmp_path) == "all()"
+
+    def test_values_are_quoted(self, tmp_path: Path):
+        assert revset(["--reverse", "--author=o'neil"], tmp_path) == (
+            "ancestors(.) & user('o\\'neil')"
+        )
+
+    def test_other_flags_still_apply(self, tmp_path: Path):
+        argv = sl_argv(["--reverse", "--oneline", "--stat", "-2"], tmp_path)
+        assert argv[argv.index("-r") + 1] == "last(ancestors(.), 2)"
+        assert "--stat" in argv and "-T" in argv
+        assert "-l" not in argv
+
+
+class TestFirstParentRevset:
+    """--first-parent follows first parents lazily, with limits pushed down."""
+
+    def test_newest_first_with_limit(self, tmp_path: Path):
+        argv = sl_argv(["--first-parent", "-n", "3", "--oneline"], tmp_path)
+        assert argv[argv.index("-r") + 1] == "reverse(last(_firstancestors(.), 3))"
+        assert "-l" not in argv
+
+    def test_with_reverse(self, tmp_path: Path):
+        assert revset(["--first-parent", "--reverse", "-2"], tmp_path) == (
+            "last(_firstancestors(.), 2)"
+        )
+
+    def test_range_excludes_full_ancestry(self, tmp_path: Path):
+        """'A..B' walks first parents from B and stops at A's history."""
+        assert revset(["--first-parent", "main..HEAD"], tmp_path) == (
+            "reverse((_firstancestors(.) - ancestors(main)))"
+        )
+
+    def test_all_and_filters(self, tmp_path: Path):
+        assert revset(["--first-parent", "--all", "--author=bob"], tmp_path) == (
+            "reverse(_firstancestors(heads(all())) & user('bob'))"
+        )
+
+
+class TestPlainLog:
+    """Without --reverse, sl's own lazy flags are used."""
+
+    def test_native_flags(self, tmp_path: Path):
+        argv = sl_argv(["-n", "5", "--author=bob", "--since=2024-01-01"], tmp_path)
+        assert argv == ["sl", "log", "-u", "bob", "-l", "5", "-d", ">2024-01-01"]
@@ -0,0 +1,111 @@
+"""
+Tests for translation plans.
+
+Pure-translation handlers expose plan(parsed), which works out the sl
+commands without running them. GITSL_DEBUG prints that plan, and
+handle() runs it through execute_plan. Uses the mock sl, so no real
+Sapling installation is needed.
+"""
+
+from pathlib import Path
+
+import pytest
+
+from conftest import mock_sl_env, run_gitsl, sl_argvs
+
+
+pytestmark = pytest.mark.dispatch
+
+
+def run_gitsl_mock(args, cwd: Path, **env_vars):
+    """Run gitsl with the mock sl on PATH, logging sl calls next to cwd."""
+    return run_gitsl(args, cwd=cwd, env=mock_sl_env(cwd / "sl.log", **env_vars))
+
+
+def sl_calls(cwd: Path) -> list:
+    return sl_argvs(cwd / "sl.log")
+
+
+class TestDebugShowsPlan:
+    """GITSL_DEBUG prints the translated argv and runs nothing."""
+
+    @pytest.mark.parametrize("args,expected", [
+        (["grep", "-v", "x"], "sl grep -V x"),
+        (["blame", "-b", "f.txt"], "sl annotate --ignore-space-change f.txt"),
+        (["log", "--oneline", "-n", "3"], "sl log -T '{node|short} {desc|firstline}\\n' -l 3"),
+        (["clean", "-fd"], "sl purge --files --dirs"),
+    ])
+    def test_real_argv(self, tmp_path: Path, args, expected):
+        result = run_gitsl_mock(args, tmp_path, GITSL_DEBUG="1")
+        assert result.exit_code == 0
+        assert f"[DEBUG] Would execute: {expected}\n" in result.stderr
+        assert sl_calls(tmp_path) == []
+
+    def test_streamed_output_names_transform(self, tmp_path: Path):
+        result = run_gitsl_mock(["status", "--porcelain"], tmp_path, GITSL_DEBUG="1")
+        assert "[DEBUG] Would execute: sl status\n" in result.stderr
+        assert "[DEBUG] Output: stream through translate_status_line\n" in result.stderr
+
+    def test_every_command_is_shown(self, tmp_path: Path):
+        result = run_gitsl_mock(["switch", "-c", "feature"], tmp_path, GITSL_DEBUG="1")
+        assert "[DEBUG] Would execute: sl bookmark feature\n" in result.stderr
+        assert "[DEBUG] Would execute: sl goto feature\n" in result.stderr
+
+    def test_messages_and_refusal(self, tmp_path: Path):
+        result = run_gitsl_mock(["clean"], tmp_path, GITSL_DEBUG="1")
+        assert "[DEBUG] Message: fatal: clean.requireForce" in result.stderr
+        assert "[DEBUG] Would exit 128 without running sl\n" in result.stderr
+        assert "Would execute" not in result.stderr
+
+    def test_handlers_without_plan_fall_back(self, tmp_path: Path):
+        """Handlers that must ask sl while translating show the naive argv."""
+        result = run_gitsl_mock(["stash", "drop"], tmp_path, GITSL_DEBUG="1")
+        assert "[DEBUG] Would execute: sl stash drop\n" in result.stderr
+        assert sl_calls(tmp_path) == []
+
+    @pytest.mark.parametrize("args,expected", [
+        (["restore", "--source=HEAD~1", "f.txt"], "sl revert -r 'HEAD~1' f.txt"),
+        (["stash", "list"], "sl shelve --list"),
+        (["stash", "push", "-m", "wip"], "sl shelve -m wip"),
+        (["stash", "show", "-p", "myshelf"], "sl shelve -p myshelf"),
+    ])
+    def test_restore_and_stash(self, tmp_path: Path, args, expected):
+        result = run_gitsl_mock(args, tmp_path, GITSL_DEBUG="1")
+        assert f"[DEBUG] Would execute: {expected}\n" in result.stderr
+        assert sl_calls(tmp_path) == []
+
+    def test_quiet_output_is_captured(self, tmp_path: Path):
+        result = run_gitsl_mock(["restore", "-q", "f.txt"], tmp_path, GITSL_DEBUG="1")
+        assert "[DEBUG] Would execute: sl revert f.txt\n" in result.stderr
+        assert "[DEBUG] Output: captured and discarded\n" in result.stderr
+
+
+class TestExecutePlan:
+    """handle() runs the same plan that debug mode prints."""
+
+    def test_commands_run_in_order(self, tmp_path: Path):
+        result = run_gitsl_mock(["switch", "-c", "feature"], tmp_path)
+        assert result.exit_code == 0
+        assert sl_calls(tmp_path) == [["bookmark", "feature"], ["goto", "feature"]]
+
+    def test_stops_at_first_failure(self, tmp_path: Path):
+        result = run_gitsl_mock(["switch", "-c", "feature"], tmp_path, MOCK_SL_EXIT="1")
+        assert result.exit_code == 1
+        assert sl_calls(tmp_path) == [["bookmark", "feature"]]
+
+    def test_messages_precede_command(self, tmp_path: Path):
+        result = run_gitsl_mock(["diff", "--staged"], tmp_path)
+        assert result.stderr.startswith("Warning: Sapling has no staging area.")
+        assert sl_calls(tmp_path) == [["diff"]]
+
+    def test_captured_output_is_dropped(self, tmp_path: Path):
+        result = run_gitsl_mock(["stash", "-q"], tmp_path, MOCK_SL_STDOUT="shelved as default",
+                                MOCK_SL_EXIT="1")
+        assert result.exit_code == 1
+        assert result.stdout == ""
+        assert sl_calls(tmp_path) == [["shelve"]]
+
+    def test_refusal_runs_nothing(self, tmp_path: Path):
+        result = run_gitsl_mock(["clean"], tmp_path)
+        assert result.exit_code == 128
+        assert sl_calls(tmp_path) == []
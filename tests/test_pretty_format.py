@@ -0,0 +1,63 @@
+"""
+Tests for --pretty=format:/--format= in git log and git show.
+
+Git format strings are compiled into one sl template. GITSL_DEBUG prints
+the translated argv without running sl, so no Sapling installation is
+needed.
+"""
+
+import shlex
+from pathlib import Path
+
+import pytest
+
+from conftest import run_gitsl
+
+
+pytestmark = [pytest.mark.log, pytest.mark.show]
+
+def sl_template(command: str, fmt: str, cwd: Path) -> str:
+    """Return the -T template gitsl would pass to sl for a format option."""
+    result = run_gitsl([command, fmt], cwd=cwd, env={"GITSL_DEBUG": "1"})
+    assert result.exit_code == 0, result.stderr
+    line = next(l for l in result.stderr.splitlines() if "Would execute:" in l)
+    argv = shlex.split(line.split("Would execute:", 1)[1])
+    return argv[argv.index("-T") + 1]
+
+
+class TestFormatCompiler:
+    """Placeholders become sl template keywords in a single pass."""
+
+    @pytest.mark.parametrize("fmt,template", [
+        ("%h %s", "{node|short} {desc|firstline}\\n"),
+        ("%H%n", "{node}\\n"),
+        ("%an <%ae>", "{author|person} <{author|email}>\\n"),
+        ("%cn %cd", "{author|person} {date|isodate}\\n"),
+        ("%P", "{join(parents % '{node}', ' ')}\\n"),
+        ("%T", "{manifest}\\n"),
+        ("%h%x00%s", "{node|short}\\x00{desc|firstline}\\n"),
+        ("%%h", "%h\\n"),
+    ])
+    def test_placeholders(self, tmp_path: Path, fmt, template):
+        assert sl_template("log", f"--format={fmt}", tmp_path) == template
+
+    def test_longest_placeholder_wins(self, tmp_path: Path):
+        """'%ad' is a date, never '%a' followed by 'd'; '%d' stays refs."""
+        assert sl_template("log", "--format=%ad|%d", tmp_path) == "{date|isodate}|{bookmarks}\\n"
+
+    def test_padding_applies_to_next_placeholder(self, tmp_path: Path):
+        assert sl_template("log", "--format=%<(10)%an|%>(8)%h", tmp_path) == (
+            "{pad(author|person, 10)}|{pad(node|short, 8, ' ', True)}\\n"
+        )
+
+    def test_template_syntax_is_escaped(self, tmp_path: Path):
+        """Literal braces and backslashes are not read as sl template syntax."""
+        assert sl_template("log", "--format={%h}\\t", tmp_path) == "\\{{node|short}}\\\\t\\n"
+
+    def test_colors_dropped_unknown_kept(self, tmp_path: Path):
+        assert sl_template("log", "--format=%Cred%h%Creset %q", tmp_path) == "{node|short} %q\\n"
+
+    def test_show_uses_same_compiler(self, tmp_path: Path):
+        assert sl_template("show", "--pretty=format:%h %cn", tmp_path) == (
+            "{node|short} {author|person}\\n"
+        )
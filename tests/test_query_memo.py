@@ -0,0 +1,65 @@
+"""
+Tests for memoized read-only sl queries.
+
+Uses the mock sl with MOCK_SL_LOG to count how often sl is spawned.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+from conftest import PROJECT_ROOT, mock_sl_env, run_gitsl, sl_argvs
+from helpers.commands import run_command
+
+
+pytestmark = pytest.mark.execution
+
+class TestQueryMemo:
+    """Repeated queries within one invocation spawn sl once."""
+
+    def test_stash_refs_share_one_listing(self, tmp_path: Path):
+        """Translating several stash@{n} refs lists shelves only once."""
+        log = tmp_path / "sl.log"
+        result = run_gitsl(
+            ["stash", "drop", "stash@{0}", "stash@{0}"], cwd=tmp_path,
+            env=mock_sl_env(log, PYTHONPATH=str(PROJECT_ROOT), MOCK_SL_STDOUT="default  (1m ago)  wip"),
+        )
+        assert result.exit_code == 0
+        assert sl_argvs(log) == [
+            ["shelve", "--list"],
+            ["shelve", "--delete", "default", "default"],
+        ]
+
+    def test_mutation_invalidates_memo(self, tmp_path: Path):
+        """A query after run_sl/run_sl_captured sees fresh state."""
+        log = tmp_path / "sl.log"
+        code = (
+            "import common\n"
+            "common.query_sl(['status'])\n"
+            "common.query_sl(['status'])\n"
+            "common.run_sl(['add', 'f'])\n"
+            "common.query_sl(['status'])\n"
+            "common.run_sl_captured(['remove', 'f'])\n"
+            "common.query_sl(['status'])\n"
+        )
+        result = run_command([sys.executable, "-c", code], cwd=tmp_path, env=mock_sl_env(log, PYTHONPATH=str(PROJECT_ROOT)))
+        assert result.exit_code == 0, result.stderr
+        assert [a[0] for a in sl_argvs(log)] == [
+            "status", "add", "status", "remove", "status",
+        ]
+
+    def test_memo_is_per_directory(self, tmp_path: Path):
+        """The same query from another directory is not shared."""
+        log = tmp_path / "sl.log"
+        other = tmp_path / "other"
+        other.mkdir()
+        code = (
+            "import common\n"
+            "common.query_sl(['root'])\n"
+            f"common.query_sl(['root'], cwd={str(other)!r})\n"
+            f"common.query_sl(['root'], cwd={str(other)!r})\n"
+        )
+        result = run_command([sys.executable, "-c", code], cwd=tmp_path, env=mock_sl_env(log, PYTHONPATH=str(PROJECT_ROOT)))
+        assert result.exit_code == 0, result.stderr
+        assert sl_argvs(log) == [["root"], ["root"]]
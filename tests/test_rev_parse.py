@@ -181,3 +181,29 @@ class TestRevParseSymbolic:
         result = run_gitsl(["rev-parse", "--symbolic", "master"], cwd=sl_repo_with_commit)
         assert result.exit_code == 0
         assert result.stdout.strip() == "master"
+
+
+class TestRevParsePrefix:
+    """REVP-07/08: git rev-parse --show-prefix and --show-cdup."""
+
+    def test_show_prefix_at_root_is_empty(self, sl_repo_with_commit: Path):
+        """--show-prefix prints an empty line at the repository root."""
+        result = run_gitsl(["rev-parse", "--show-prefix"], cwd=sl_repo_with_commit)
+        assert result.exit_code == 0
+        assert result.stdout == "\n"
+
+    def test_show_prefix_from_subdirectory(self, sl_repo_with_commit: Path):
+        """--show-prefix prints the subdirectory path with trailing slash."""
+        subdir = sl_repo_with_commit / "a" / "b"
+        subdir.mkdir(parents=True)
+        result = run_gitsl(["rev-parse", "--show-prefix"], cwd=subdir)
+        assert result.exit_code == 0
+        assert result.stdout.strip() == "a/b/"
+
+    def test_show_cdup_from_subdirectory(self, sl_repo_with_commit: Path):
+        """--show-cdup prints one ../ per directory level."""
+        subdir = sl_repo_with_commit / "a" / "b"
+        subdir.mkdir(parents=True)
+        result = run_gitsl(["rev-parse", "--show-cdup"], cwd=subdir)
+        assert result.exit_code == 0
+        assert result.stdout.strip() == "../../"
@@ -0,0 +1,94 @@
+"""
+Tests for in-process repository discovery in git rev-parse.
+
+Root-relative rev-parse queries walk the filesystem instead of running
+'sl root', so these run against a fake checkout with the mock sl on PATH
+and assert that sl is never started.
+"""
+
+from pathlib import Path
+
+import pytest
+
+from conftest import mock_sl_env, run_gitsl
+
+
+pytestmark = pytest.mark.rev_parse
+
+
+@pytest.fixture
+def fake_repo(fake_repo: Path) -> Path:
+    """The shared fake checkout with a nested subdirectory, symlinks resolved."""
+    (fake_repo / "src" / "pkg").mkdir(parents=True)
+    return fake_repo.resolve()
+
+
+def run_rev_parse(args, cwd: Path, log: Path):
+    return run_gitsl(["rev-parse"] + args, cwd=cwd, env=mock_sl_env(log))
+
+
+@pytest.mark.parametrize("flag,expected", [
+    ("--show-toplevel", "{root}"),
+    ("--git-dir", "{root}/.sl"),
+    ("--is-inside-work-tree", "true"),
+    ("--show-prefix", "src/pkg/"),
+    ("--show-cdup", "../../"),
+])
+def test_answers_without_spawning_sl(fake_repo: Path, tmp_path: Path, flag, expected):
+    """Each flag is answered from the filesystem alone."""
+    log = tmp_path / "sl.log"
+    result = run_rev_parse([flag], fake_repo / "src" / "pkg", log)
+    assert result.exit_code == 0
+    assert result.stdout.strip() == expected.format(root=fake_repo)
+    assert not log.exists()
+
+
+def test_hg_marker_is_git_dir(tmp_path: Path):
+    """Repositories with a .hg directory report it as the git dir."""
+    repo = tmp_path / "hgrepo"
+    (repo / ".hg").mkdir(parents=True)
+    result = run_rev_parse(["--git-dir"], repo, tmp_path / "sl.log")
+    assert result.stdout.strip() == str(repo.resolve() / ".hg")
+
+
+def test_git_backed_checkout(tmp_path: Path):
+    """A .git directory with Sapling's files in .git/sl marks a root."""
+    repo = tmp_path / "gitbacked"
+    (repo / ".git" / "sl").mkdir(parents=True)
+    result = run_rev_parse(["--git-dir"], repo, tmp_path / "sl.log")
+    assert result.stdout.strip() == str(repo.resolve() / ".git")
+
+
+def test_plain_git_checkout_is_not_a_repo(tmp_path: Path):
+    """A .git directory without .git/sl is a git checkout, not Sapling's."""
+    repo = tmp_path / "plain"
+    (repo / ".git").mkdir(parents=True)
+    result = run_rev_parse(["--show-toplevel"], repo, tmp_path / "sl.log")
+    assert result.exit_code == 128
+    result = run_rev_parse(["--is-inside-work-tree"], repo, tmp_path / "sl.log")
+    assert result.stdout.strip() == "false"
+
+
+def test_vendored_git_checkout_inside_repo(fake_repo: Path, tmp_path: Path):
+    """A plain .git below a Sapling root does not end the walk there."""
+    vendored = fake_repo / "src" / "pkg"
+    (vendored / ".git").mkdir()
+    result = run_rev_parse(["--show-toplevel"], vendored, tmp_path / "sl.log")
+    assert result.stdout.strip() == str(fake_repo)
+
+
+@pytest.mark.parametrize("flag", ["--show-toplevel", "--git-dir", "--show-prefix", "--show-cdup"])
+def test_outside_repo_fails_like_git(tmp_path: Path, flag):
+    """Outside a repository git's fatal message and exit code are used."""
+    result = run_rev_parse([flag], tmp_path, tmp_path / "sl.log")
+    assert result.exit_code == 128
+    assert result.stderr == (
+        "fatal: not a git repository (or any of the parent directories): .git\n"
+    )
+
+
+def test_is_inside_work_tree_outside_repo(tmp_path: Path):
+    """--is-inside-work-tree still prints false and exits 0 outside a repo."""
+    result = run_rev_parse(["--is-inside-work-tree"], tmp_path, tmp_path / "sl.log")
+    assert result.exit_code == 0
+    assert result.stdout.strip() == "false"
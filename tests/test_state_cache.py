@@ -0,0 +1,110 @@
+"""
+Tests for the on-disk repository state cache.
+
+Runs against a fake checkout with the mock sl on PATH; the mock's call log
+shows whether a query reached sl or was answered from the cache.
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from conftest import HEAD_OUTPUT, age, mock_sl_env, run_gitsl, sl_argvs
+
+
+pytestmark = pytest.mark.cache
+
+# Mock answer to the combined HEAD template query
+def run_abbrev_ref(repo: Path, log: Path, **extra):
+    env = mock_sl_env(log, **{"MOCK_SL_STDOUT": HEAD_OUTPUT, **extra})
+    return run_gitsl(["rev-parse", "--abbrev-ref", "HEAD"], cwd=repo, env=env)
+
+
+def spawn_count(log: Path) -> int:
+    return len(sl_argvs(log))
+
+
+class TestStateCache:
+    """Repository state queries are reused across invocations."""
+
+    def test_second_call_skips_sl(self, settled_repo: Path, tmp_path: Path):
+        """An unchanged repository answers from the cache."""
+        log = tmp_path / "sl.log"
+        first = run_abbrev_ref(settled_repo, log)
+        second = run_abbrev_ref(settled_repo, log)
+        assert first.stdout == second.stdout == "main\n"
+        assert spawn_count(log) == 1
+        assert (settled_repo / ".sl" / "gitsl-cache.json").exists()
+
+    def test_state_change_invalidates(self, settled_repo: Path, tmp_path: Path):
+        """Changing a state file makes the next call ask sl again."""
+        log = tmp_path / "sl.log"
+        run_abbrev_ref(settled_repo, log)
+        current = settled_repo / ".sl" / "bookmarks.current"
+        current.write_text("feature")
+        age(current, 30)
+        run_abbrev_ref(settled_repo, log)
+        assert spawn_count(log) == 2
+
+    def test_recently_modified_state_not_stored(self, settled_repo: Path, tmp_path: Path):
+        """Results read from just-modified files are not cached."""
+        log = tmp_path / "sl.log"
+        (settled_repo / ".sl" / "dirstate").write_text("fresh")
+        run_abbrev_ref(settled_repo, log)
+        run_abbrev_ref(settled_repo, log)
+        assert spawn_count(log) == 2
+
+    def test_failures_not_cached(self, settled_repo: Path, tmp_path: Path):
+        """Only successful results are stored."""
+        log = tmp_path / "sl.log"
+        run_abbrev_ref(settled_repo, log, MOCK_SL_EXIT="255")
+        run_abbrev_ref(settled_repo, log)
+        assert spawn_count(log) == 2
+
+    def test_disabled_by_env(self, settled_repo: Path, tmp_path: Path):
+        """GITSL_CACHE=0 always runs sl and writes nothing."""
+        log = tmp_path / "sl.log"
+        run_abbrev_ref(settled_repo, log, GITSL_CACHE="0")
+        run_abbrev_ref(settled_repo, log, GITSL_CACHE="0")
+        assert spawn_count(log) == 2
+        assert not (settled_repo / ".sl" / "gitsl-cache.json").exists()
+
+    def test_size_bound_evicts_least_recent(self, settled_repo: Path, tmp_path: Path):
+        """Old entries are dropped once the cache exceeds its size bound."""
+        log = tmp_path / "sl.log"
+        big = HEAD_OUTPUT + "x" * 40000
+        run_abbrev_ref(settled_repo, log, MOCK_SL_STDOUT=big)
+        subdir = settled_repo / "sub"
+        subdir.mkdir()
+        run_abbrev_ref(subdir, log, MOCK_SL_STDOUT=big)
+        cache = json.loads((settled_repo / ".sl" / "gitsl-cache.json").read_text())
+        keys = list(cache["entries"])
+        assert len(keys) == 1
+        assert keys[0].startswith("sub\0log\0")
+
+
+class TestHeadInfo:
+    """HEAD questions share one combined template query."""
+
+    @pytest.mark.parametrize("args,expected", [
+        (["rev-parse", "--abbrev-ref", "HEAD"], "main\n"),
+        (["rev-parse", "--short", "HEAD"], "a" * 7 + "\n"),
+        (["rev-parse", "--verify", "HEAD"], "a" * 40 + "\n"),
+        (["branch", "--show-current"], "main\n"),
+    ])
+    def test_head_queries_share_cache(self, settled_repo: Path, tmp_path: Path, args, expected):
+        """After any HEAD query, the others are answered without sl."""
+        log = tmp_path / "sl.log"
+        run_abbrev_ref(settled_repo, log)
+        result = run_gitsl(args, cwd=settled_repo, env=mock_sl_env(log))
+        assert result.exit_code == 0
+        assert result.stdout == expected
+        assert spawn_count(log) == 1
+
+    def test_detached_head(self, settled_repo: Path, tmp_path: Path):
+        """No active bookmark reads as a detached HEAD."""
+        log = tmp_path / "sl.log"
+        result = run_abbrev_ref(settled_repo, log, GITSL_CACHE="0",
+                                MOCK_SL_STDOUT="\n" + "b" * 40 + "\n" + "b" * 12 + "\npublic")
+        assert result.stdout == "HEAD\n"
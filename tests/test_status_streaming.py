@@ -0,0 +1,216 @@
+"""
+Tests for the streaming porcelain transform of git status.
+
+Uses the mock sl: MOCK_SL_LINE_DELAY makes it emit lines slowly, so the
+tests can see translated lines arriving before sl finishes.
+"""
+
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from conftest import GITSL, HEAD_RULE, rules_env, run_gitsl, sl_argvs
+
+
+pytestmark = pytest.mark.status
+
+
+class TestStatusStreaming:
+    """Porcelain output is translated line by line."""
+
+    def test_translates_every_line(self, tmp_path: Path):
+        """All status codes map to git's XY codes."""
+        env = rules_env(tmp_path, MOCK_SL_STDOUT="M a\nA b\nR c\n? d\n! e\nnot a status line")
+        result = run_gitsl(["status", "--porcelain"], cwd=tmp_path, env=env)
+        assert result.exit_code == 0
+        assert result.stdout == " M a\nA  b\nD  c\n?? d\n D e\n"
+
+    def test_first_line_before_sl_finishes(self, tmp_path: Path):
+        """The first translated line is written while sl is still running."""
+        delay = 0.5
+        env = os.environ.copy()
+        env.update(rules_env(tmp_path, MOCK_SL_STDOUT="M a\nM b\nM c",
+                             MOCK_SL_LINE_DELAY=str(delay)))
+        start = time.monotonic()
+        proc = subprocess.Popen(
+            [sys.executable, str(GITSL), "status", "--porcelain"],
+            cwd=tmp_path, env=env, stdout=subprocess.PIPE, text=True,
+        )
+        first = proc.stdout.readline()
+        first_at = time.monotonic() - start
+        rest = proc.stdout.read()
+        total = time.monotonic() - start
+        assert proc.wait() == 0
+        assert first == " M a\n"
+        assert rest == " M b\n M c\n"
+        assert total - first_at >= 2 * delay * 0.9
+
+    def test_branch_header_precedes_lines(self, tmp_path: Path):
+        """-b writes the header before the first status line."""
+        env = rules_env(tmp_path, [HEAD_RULE, {"argv": ["status"], "stdout": "? new"}])
+        result = run_gitsl(["status", "-s", "-b"], cwd=tmp_path, env=env)
+        assert result.stdout == "## main\n?? new\n"
+
+    def test_branch_header_precedes_plain_output(self, tmp_path: Path):
+        """Without porcelain, sl's own output follows the header, also when sl
+        runs as a child writing to the same block-buffered pipe."""
+        env = rules_env(tmp_path, [HEAD_RULE, {"argv": ["status"], "stdout": "M a.txt"}],
+                        GITSL_EXEC="0", PYTHONUNBUFFERED="")
+        result = run_gitsl(["status", "-b"], cwd=tmp_path, env=env)
+        assert result.exit_code == 0
+        assert result.stdout.startswith("## main\nM a.txt")
+
+    def test_branch_header_on_clean_tree(self, tmp_path: Path):
+        """-b on a clean working copy still prints the header."""
+        env = rules_env(tmp_path, [HEAD_RULE, {"argv": ["status"], "stdout": ""}])
+        result = run_gitsl(["status", "--porcelain", "-b"], cwd=tmp_path, env=env)
+        assert result.exit_code == 0
+        assert result.stdout == "## main\n"
+
+    def test_failure_passes_stderr_and_exit_code(self, tmp_path: Path):
+        """sl errors go straight to stderr; no header is printed."""
+        env = rules_env(tmp_path, [
+            HEAD_RULE, {"argv": ["status"], "stderr": "abort: no repository found", "exit": 255},
+        ])
+        result = run_gitsl(["status", "--porcelain", "-b"], cwd=tmp_path, env=env)
+        assert result.exit_code == 255
+        assert result.stdout == ""
+        assert "abort: no repository found" in result.stderr
+
+
+class TestStatusNulTerminated:
+    """STAT-06: -z reads 'sl status --print0' and writes raw bytes."""
+
+    def run_z(self, tmp_path: Path, raw: bytes, args=("-z",), rules=()):
+        raw_file = tmp_path / "status.bin"
+        raw_file.write_bytes(raw)
+        env = {**os.environ, **rules_env(tmp_path, list(rules) + [
+            {"argv": ["status"], "stdout_file": str(raw_file)},
+        ])}
+        result = subprocess.run(
+            [sys.executable, str(GITSL), "status"] + list(args),
+            cwd=tmp_path, env=env, capture_output=True,
+        )
+        return result, sl_argvs(tmp_path / "sl.log")
+
+    def test_records_translated(self, tmp_path: Path):
+        """Each record gets git's XY code and a NUL terminator."""
+        result, argvs = self.run_z(tmp_path, b"M a\0? b c\0R d\0")
+        assert result.returncode == 0
+        assert result.stdout == b" M a\0?? b c\0D  d\0"
+        assert ["status", "--print0"] in argvs
+
+    def test_non_utf8_and_newline_names_untouched(self, tmp_path: Path):
+        """File names are copied byte for byte."""
+        result, _ = self.run_z(tmp_path, b"M caf\xe9\0? two\nlines\0")
+        assert result.stdout == b" M caf\xe9\0?? two\nlines\0"
+
+    def test_porcelain_z_with_branch(self, tmp_path: Path):
+        """--porcelain -z -b starts with a NUL-terminated branch header."""
+        result, _ = self.run_z(tmp_path, b"A new\0", args=("--porcelain", "-z", "-b"),
+                               rules=[HEAD_RULE])
+        assert result.stdout == b"## main\0A  new\0"
+
+    def test_large_listing_streams_in_chunks(self, tmp_path: Path):
+        """Records split across read boundaries are reassembled."""
+        names = [f"dir/file-{i:06d}.txt".encode() for i in range(20000)]
+        raw = b"".join(b"? " + name + b"\0" for name in names)
+        result, _ = self.run_z(tmp_path, raw)
+        assert result.stdout == b"".join(b"?? " + name + b"\0" for name in names)
+
+
+V2_HEAD_RULE = {
+    "argv": ["log", "-r", "."],
+    "stdout": "c" * 40 + "\nmain\nremote/main\n2\n1\n",
+}
+
+
+class TestStatusPorcelainV2:
+    """STAT-07: --porcelain=v2 records and branch headers."""
+
+    def run_v2(self, tmp_path: Path, status_out: bytes, args, rules=(), cwd: Path = None):
+        raw_file = tmp_path / "status.bin"
+        raw_file.write_bytes(status_out)
+        env = {**os.environ, **rules_env(tmp_path, list(rules) + [
+            {"argv": ["status"], "stdout_file": str(raw_file)},
+        ])}
+        return subprocess.run(
+            [sys.executable, str(GITSL), "status"] + list(args),
+            cwd=cwd or tmp_path, env=env, capture_output=True,
+        )
+
+    def test_records(self, tmp_path: Path):
+        """Changes become '1' records, unknown '?' and ignored '!'."""
+        (tmp_path / "mod.sh").write_text("#!/bin/sh\n")
+        (tmp_path / "mod.sh").chmod(0o755)
+        (tmp_path / "new.txt").write_text("x")
+        result = self.run_v2(
+            tmp_path, b"M mod.sh\nA new.txt\nR gone.txt\n! lost.txt\n? u.txt\nI i.txt\n",
+            ["--porcelain=v2"],
+        )
+        zeros = "0" * 40 + " " + "0" * 40
+        assert result.returncode == 0
+        assert result.stdout.decode().splitlines() == [
+            f"1 .M N... 100755 100755 100755 {zeros} mod.sh",
+            f"1 A. N... 000000 100644 100644 {zeros} new.txt",
+            f"1 D. N... 100644 000000 000000 {zeros} gone.txt",
+            f"1 .D N... 100644 100644 000000 {zeros} lost.txt",
+            "? u.txt",
+            "! i.txt",
+        ]
+
+    def test_modes_from_subdirectory(self, tmp_path: Path, fake_repo: Path):
+        """Root-relative paths are looked up under the root, not the current directory."""
+        (fake_repo / "bin").mkdir()
+        (fake_repo / "bin" / "tool").write_text("#!/bin/sh\n")
+        (fake_repo / "bin" / "tool").chmod(0o755)
+        (fake_repo / "bin" / "link").symlink_to("tool")
+        result = self.run_v2(tmp_path, b"M bin/tool\nM bin/link\n", ["--porcelain=v2"],
+                             cwd=fake_repo / "bin")
+        zeros = "0" * 40 + " " + "0" * 40
+        assert result.stdout.decode().splitlines() == [
+            f"1 .M N... 100755 100755 100755 {zeros} bin/tool",
+            f"1 .M N... 120000 120000 120000 {zeros} bin/link",
+        ]
+        assert sl_argvs(tmp_path / "sl.log") == [["status", "--root-relative"]]
+
+    def test_branch_headers_with_upstream(self, tmp_path: Path):
+        """--branch adds oid, head, upstream and ahead/behind headers."""
+        result = self.run_v2(tmp_path, b"? u.txt\n", ["--porcelain=v2", "--branch"],
+                             rules=[V2_HEAD_RULE])
+        assert result.stdout.decode() == (
+            f"# branch.oid {'c' * 40}\n"
+            "# branch.head main\n"
+            "# branch.upstream remote/main\n"
+            "# branch.ab +2 -1\n"
+            "? u.txt\n"
+        )
+
+    def test_branch_headers_detached_initial(self, tmp_path: Path):
+        """No bookmark and no commits: detached, initial, no upstream."""
+        rule = {"argv": ["log", "-r", "."], "stdout": "0" * 40 + "\n\n\n\n\n"}
+        result = self.run_v2(tmp_path, b"", ["--porcelain=v2", "-b"], rules=[rule])
+        assert result.returncode == 0
+        assert result.stdout.decode() == "# branch.oid (initial)\n# branch.head (detached)\n"
+
+    def test_nul_terminated(self, tmp_path: Path):
+        """-z terminates headers and records with NUL, paths untouched."""
+        result = self.run_v2(tmp_path, b"? caf\xe9\0", ["--porcelain=v2", "-z", "-b"],
+                             rules=[V2_HEAD_RULE])
+        assert result.stdout.split(b"\0") == [
+            b"# branch.oid " + b"c" * 40,
+            b"# branch.head main",
+            b"# branch.upstream remote/main",
+            b"# branch.ab +2 -1",
+            b"? caf\xe9",
+            b"",
+        ]
+
+    def test_v1_explicit(self, tmp_path: Path):
+        """--porcelain=v1 keeps the v1 format."""
+        result = self.run_v2(tmp_path, b"M a\n", ["--porcelain=v1"])
+        assert result.stdout == b" M a\n"
@@ -0,0 +1,83 @@
+"""
+Tests for GITSL_TRACE per-phase timing and sl call tracing.
+
+Runs gitsl against the mock sl and inspects the trace file it writes.
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from conftest import mock_sl_env, run_gitsl
+
+
+pytestmark = pytest.mark.trace
+
+def traced_env(trace: Path, **extra) -> dict:
+    return mock_sl_env(**{"GITSL_TRACE": str(trace), "GITSL_CACHE": "0", **extra})
+
+
+def read_jsonl(trace: Path) -> list:
+    return [json.loads(line) for line in trace.read_text().splitlines()]
+
+
+class TestTrace:
+    """GITSL_TRACE records phases, sl calls and transforms."""
+
+    def test_phases_and_spawns(self, tmp_path: Path):
+        """A run records start-up, parsing, import, the handler and sl."""
+        trace = tmp_path / "trace.jsonl"
+        result = run_gitsl(["stash", "list"], cwd=tmp_path,
+                           env=traced_env(trace, MOCK_SL_STDOUT="default  (1m ago)  wip"))
+        assert result.exit_code == 0
+
+        events = read_jsonl(trace)
+        names = [e["name"] for e in events]
+        for expected in ("startup", "parse_argv", "import", "git stash", "sl shelve"):
+            assert expected in names
+        spawn = next(e for e in events if e["cat"] == "spawn")
+        assert spawn["args"]["argv"] == ["shelve", "--list"]
+        assert spawn["args"]["exit"] == 0
+        assert spawn["dur"] > 0
+        assert all(e["pid"] == events[0]["pid"] for e in events)
+
+    def test_captured_query_sizes(self, tmp_path: Path):
+        """Captured queries record exit code and output byte counts."""
+        trace = tmp_path / "trace.jsonl"
+        run_gitsl(["rev-parse", "--verify", "nope"], cwd=tmp_path,
+                  env=traced_env(trace, MOCK_SL_EXIT="255", MOCK_SL_STDERR="abort: unknown"))
+        spawn = next(e for e in read_jsonl(trace) if e["cat"] == "spawn")
+        assert spawn["args"]["exit"] == 255
+        assert spawn["args"]["stdout_bytes"] == 0
+        assert spawn["args"]["stderr_bytes"] == len("abort: unknown\n")
+
+    def test_transform_event(self, tmp_path: Path):
+        """Streaming status records a transform event with line counts."""
+        trace = tmp_path / "trace.jsonl"
+        run_gitsl(["status", "--porcelain"], cwd=tmp_path,
+                  env=traced_env(trace, MOCK_SL_STDOUT="M a\n? b"))
+        events = read_jsonl(trace)
+        transform = next(e for e in events if e["cat"] == "transform")
+        assert transform["name"] == "translate_status_line"
+        assert transform["args"]["lines"] == 2
+        spawn = next(e for e in events if e["cat"] == "spawn")
+        assert spawn["args"]["argv"][0] == "status"
+        assert spawn["args"]["lines"] == 2
+
+    def test_chrome_json_appends_across_runs(self, tmp_path: Path):
+        """A .json trace is one Chrome JSON array shared by several runs."""
+        trace = tmp_path / "trace.json"
+        for _ in range(2):
+            run_gitsl(["stash", "list"], cwd=tmp_path, env=traced_env(trace))
+        text = trace.read_text()
+        assert text.startswith("[\n")
+        events = json.loads(text.rstrip().rstrip(",") + "]")
+        assert len({e["pid"] for e in events}) == 2
+        assert all(e["ph"] in ("X", "i") for e in events)
+
+    def test_no_trace_without_env(self, tmp_path: Path):
+        """Nothing is written when GITSL_TRACE is unset."""
+        env = mock_sl_env()
+        run_gitsl(["stash", "list"], cwd=tmp_path, env=env)
+        assert list(tmp_path.iterdir()) == []